@@ -0,0 +1,112 @@
+"""
+Batched in-page actions.
+
+Typing a query one send_keys() call per character costs one WebDriver round trip per
+keystroke. The helpers here run a whole sequence (type + submit, or a series of scrolls)
+as a single execute_async_script() call. The delays between steps are picked in Python
+with the same ranges the step-by-step code uses and then replayed inside the page,
+so the timing profile stays the same.
+"""
+import random
+
+import pacing
+
+# Types the query into the search box one character at a time and then submits the form.
+# The callback fires before submitting because the navigation would otherwise drop it.
+TYPE_AND_SUBMIT_SCRIPT = """
+var box = arguments[0], text = arguments[1], delays = arguments[2], done = arguments[arguments.length - 1];
+box.focus();
+box.value = '';
+box.dispatchEvent(new Event('input', {bubbles: true}));
+var i = 0;
+function typeNext() {
+    if (i < text.length) {
+        var ch = text[i];
+        box.dispatchEvent(new KeyboardEvent('keydown', {key: ch, bubbles: true}));
+        box.value += ch;
+        box.dispatchEvent(new Event('input', {bubbles: true}));
+        box.dispatchEvent(new KeyboardEvent('keyup', {key: ch, bubbles: true}));
+        setTimeout(typeNext, delays[i++] * 1000);
+        return;
+    }
+    done(true);
+    setTimeout(function () {
+        box.dispatchEvent(new KeyboardEvent('keydown', {key: 'Enter', keyCode: 13, bubbles: true}));
+        if (box.form) {
+            if (box.form.requestSubmit) { box.form.requestSubmit(); } else { box.form.submit(); }
+        }
+    }, 0);
+}
+typeNext();
+"""
+
+# Scrolls by a fixed step, waiting the given delay after every scroll.
+SCROLL_SCRIPT = """
+var step = arguments[0], delays = arguments[1], done = arguments[arguments.length - 1];
+var i = 0;
+function scrollNext() {
+    if (i >= delays.length) { done(true); return; }
+    window.scrollBy(0, step);
+    setTimeout(scrollNext, delays[i++] * 1000);
+}
+scrollNext();
+"""
+
+# Extra seconds allowed on top of the planned delays before the script counts as timed out
+SCRIPT_TIMEOUT_MARGIN = 10
+
+
+def keystroke_delays(text, delay_range=pacing.PROFILES['normal']['keystroke']):
+    """Random delay after each character, same range as typing with send_keys()"""
+    return [random.uniform(*delay_range) for _ in text]
+
+
+def scroll_delays(count=pacing.SCROLLS_PER_SEARCH, delay_range=pacing.PROFILES['normal']['scroll']):
+    """Random delay after each scroll, same range as the step-by-step scroll loop"""
+    return [random.uniform(*delay_range) for _ in range(count)]
+
+
+def run_async_script(driver, script, timeout, *args):
+    """
+    Runs an async script with a script timeout of timeout seconds, then puts the driver's
+    own script timeout back, so later execute_async_script() calls are not cut short.
+    """
+    previous = driver.timeouts.script
+    driver.set_script_timeout(timeout)
+    try:
+        return driver.execute_async_script(script, *args)
+    finally:
+        driver.set_script_timeout(previous)
+
+
+def _run(driver, script, total_delay, *args):
+    return run_async_script(driver, script, total_delay + SCRIPT_TIMEOUT_MARGIN, *args)
+
+
+def type_and_submit(driver, search_box, text, delays=None):
+    """
+    Types text into search_box and submits its form in a single WebDriver call.
+
+    Args:
+        driver (WebDriver): Driver that owns search_box.
+        search_box (WebElement): The input to type into.
+        text (str): Text to type.
+        delays (list, optional): Seconds to wait after each character. Defaults to keystroke_delays(text).
+    """
+    if delays is None:
+        delays = keystroke_delays(text)
+    return _run(driver, TYPE_AND_SUBMIT_SCRIPT, sum(delays), search_box, text, delays)
+
+
+def scroll(driver, step, delays=None):
+    """
+    Scrolls down by step pixels once per entry in delays, in a single WebDriver call.
+
+    Args:
+        driver (WebDriver): Driver to scroll.
+        step (int): Pixels to scroll each time.
+        delays (list, optional): Seconds to wait after each scroll. Defaults to scroll_delays().
+    """
+    if delays is None:
+        delays = scroll_delays()
+    return _run(driver, SCROLL_SCRIPT, sum(delays), step, delays)
@@ -0,0 +1,268 @@
+"""
+Minimal asyncio WebDriver client for the engine.
+
+Speaks the W3C WebDriver protocol (plus msedgedriver's CDP endpoint) to one msedgedriver
+process over plain asyncio streams, with one keep-alive connection per session. Waiting
+for the driver never blocks a thread, so one event loop can drive many sessions.
+Only the commands search and quest need are implemented.
+"""
+import asyncio
+import json
+import socket
+
+# Key W3C uses for element references in commands, script arguments and results
+ELEMENT_KEY = 'element-6066-11e4-a52e-4a4b3fc34cf8'
+
+# Key codes for send_keys()
+RETURN = '\ue006'
+
+# Seconds to wait for a freshly started msedgedriver to accept sessions
+DRIVER_START_TIMEOUT = 20
+
+
+class WebDriverError(Exception):
+    """An error reported by the driver, with the W3C error code in .error"""
+    def __init__(self, error, message=''):
+        super().__init__(f"{error}: {message}" if message else error)
+        self.error = error
+        self.message = message
+
+
+class NoSuchElementError(WebDriverError):
+    pass
+
+
+class StaleElementError(WebDriverError):
+    pass
+
+
+class WebDriverTimeoutError(WebDriverError):
+    pass
+
+
+ERRORS = {
+    'no such element': NoSuchElementError,
+    'stale element reference': StaleElementError,
+    'timeout': WebDriverTimeoutError,
+    'script timeout': WebDriverTimeoutError,
+}
+
+
+class HttpConnection:
+    """One keep-alive HTTP/1.1 connection, used for one request at a time"""
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self._reader = None
+        self._writer = None
+        self._lock = asyncio.Lock()
+
+    async def request(self, method, path, payload=None):
+        """Sends a JSON request and returns (status, body bytes)"""
+        body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+        head = (f"{method} {path} HTTP/1.1\r\n"
+                f"Host: {self.host}:{self.port}\r\n"
+                f"Content-Type: application/json;charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: keep-alive\r\n\r\n").encode('ascii')
+        async with self._lock:
+            reused = self._writer is not None
+            if not reused:
+                await self._connect()
+            try:
+                self._writer.write(head + body)
+                await self._writer.drain()
+                status_line = await self._reader.readuntil(b'\r\n')
+            except (ConnectionError, asyncio.IncompleteReadError):
+                self.close()
+                if not reused:
+                    raise
+                # The driver closed the idle connection before reading the request, send it again
+                await self._connect()
+                self._writer.write(head + body)
+                await self._writer.drain()
+                status_line = await self._reader.readuntil(b'\r\n')
+            return int(status_line.split()[1]), await self._read_rest()
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+    async def _read_rest(self):
+        headers = {}
+        while True:
+            line = await self._reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if 'content-length' in headers:
+            data = await self._reader.readexactly(int(headers['content-length']))
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await self._reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                chunk = await self._reader.readexactly(size + 2)  # the chunk and its CRLF
+                if size == 0:
+                    break
+                chunks.append(chunk[:-2])
+            data = b''.join(chunks)
+        else:
+            data = await self._reader.read()
+            headers['connection'] = 'close'
+
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+        return data
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+
+def _value(status, data):
+    """Returns the value of a WebDriver response, raising WebDriverError for errors"""
+    try:
+        value = json.loads(data)['value'] if data else None
+    except (ValueError, KeyError, TypeError):
+        raise WebDriverError('unknown error', f"HTTP {status}: {data[:200]!r}")
+    if status >= 400 or (isinstance(value, dict) and 'error' in value):
+        error = value.get('error', 'unknown error') if isinstance(value, dict) else 'unknown error'
+        message = value.get('message', '') if isinstance(value, dict) else str(value)
+        raise ERRORS.get(error, WebDriverError)(error, message)
+    return value
+
+
+class DriverProcess:
+    """
+    An msedgedriver process that every session of the engine runs on.
+
+    Args:
+        path (str): msedgedriver binary, e.g. from startup.resolve_driver().
+    """
+    def __init__(self, path):
+        self.path = path
+        self.port = None
+        self.process = None
+
+    async def start(self):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            self.port = sock.getsockname()[1]
+        self.process = await asyncio.create_subprocess_exec(
+            self.path, f"--port={self.port}",
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+
+        connection = HttpConnection('127.0.0.1', self.port)
+        deadline = asyncio.get_running_loop().time() + DRIVER_START_TIMEOUT
+        try:
+            while True:
+                try:
+                    status = _value(*await connection.request('GET', '/status'))
+                    if status.get('ready', True):
+                        return
+                except (OSError, WebDriverError, asyncio.IncompleteReadError):
+                    connection.close()
+                if self.process.returncode is not None:
+                    raise WebDriverError('session not created', f"msedgedriver exited with code {self.process.returncode}")
+                if asyncio.get_running_loop().time() > deadline:
+                    raise WebDriverError('timeout', "msedgedriver did not start")
+                await asyncio.sleep(0.05)
+        finally:
+            connection.close()
+
+    async def new_session(self, capabilities):
+        """Starts a browser with capabilities (e.g. Options.to_capabilities()) and returns its Session"""
+        connection = HttpConnection('127.0.0.1', self.port)
+        try:
+            value = _value(*await connection.request('POST', '/session', {'capabilities': {'alwaysMatch': capabilities}}))
+        except BaseException:
+            connection.close()
+            raise
+        return Session(connection, value['sessionId'], value.get('capabilities'))
+
+    async def stop(self):
+        if self.process is not None and self.process.returncode is None:
+            self.process.terminate()
+            try:
+                await asyncio.wait_for(self.process.wait(), 10)
+            except asyncio.TimeoutError:
+                self.process.kill()
+
+
+class Session:
+    """One browser session. Elements are W3C element references ({ELEMENT_KEY: id})."""
+    def __init__(self, connection, session_id, capabilities=None):
+        self.connection = connection
+        self.session_id = session_id
+        self.capabilities = capabilities or {}
+
+    async def command(self, method, path, payload=None):
+        return _value(*await self.connection.request(method, f"/session/{self.session_id}{path}", payload))
+
+    async def get(self, url):
+        await self.command('POST', '/url', {'url': url})
+
+    async def current_url(self):
+        return await self.command('GET', '/url')
+
+    async def execute(self, script, *args):
+        return await self.command('POST', '/execute/sync', {'script': script, 'args': list(args)})
+
+    async def execute_async(self, script, *args):
+        return await self.command('POST', '/execute/async', {'script': script, 'args': list(args)})
+
+    async def script_timeout(self):
+        """Script timeout in seconds, None if scripts may run forever"""
+        timeout = (await self.command('GET', '/timeouts'))['script']
+        return None if timeout is None else timeout / 1000
+
+    async def set_script_timeout(self, seconds):
+        await self.command('POST', '/timeouts', {'script': None if seconds is None else int(seconds * 1000)})
+
+    async def execute_cdp(self, cmd, params=None):
+        return await self.command('POST', '/ms/cdp/execute', {'cmd': cmd, 'params': params or {}})
+
+    async def find_elements(self, css):
+        return await self.command('POST', '/elements', {'using': 'css selector', 'value': css})
+
+    async def find_element(self, css):
+        """Returns the first element matching css, or None"""
+        elements = await self.find_elements(css)
+        return elements[0] if elements else None
+
+    async def is_clickable(self, element):
+        element_id = element[ELEMENT_KEY]
+        return (await self.command('GET', f"/element/{element_id}/displayed")
+                and await self.command('GET', f"/element/{element_id}/enabled"))
+
+    async def click(self, element):
+        await self.command('POST', f"/element/{element[ELEMENT_KEY]}/click", {})
+
+    async def clear(self, element):
+        await self.command('POST', f"/element/{element[ELEMENT_KEY]}/clear", {})
+
+    async def send_keys(self, element, text):
+        await self.command('POST', f"/element/{element[ELEMENT_KEY]}/value", {'text': text})
+
+    async def window_handles(self):
+        return await self.command('GET', '/window/handles')
+
+    async def current_window_handle(self):
+        return await self.command('GET', '/window')
+
+    async def switch_to_window(self, handle):
+        await self.command('POST', '/window', {'handle': handle})
+
+    async def close_window(self):
+        await self.command('DELETE', '/window')
+
+    async def quit(self):
+        """Ends the session and closes the browser. Errors are ignored."""
+        try:
+            await self.command('DELETE', '')
+        except (OSError, WebDriverError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connection.close()
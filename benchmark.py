@@ -0,0 +1,713 @@
+"""
+Offline benchmark for search() and quest().
+
+Serves local stand-ins for bing.com and rewards.bing.com, runs the automation against them
+and reports per-search and per-card wall-clock, WebDriver command counts and browser RSS.
+Also measures how fast the command line entry point starts (--task cli). Every run is
+appended to a JSON lines file so results can be compared across versions.
+
+    python benchmark.py --task all --searches 5
+"""
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import argparse
+import html
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+import pacing
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+DEFAULT_OUTPUT = "bench_results.jsonl"
+
+# Points the fixture site awards per search, matching preflight.POINTS_PER_SEARCH
+SEARCH_POINTS = 3
+
+# Modules the command line entry point must not import before a mode is chosen
+HEAVY_MODULES = ("selenium", "tkinter", "search", "quest", "gui")
+
+SEARCH_HOME_PAGE = """<!DOCTYPE html>
+<html><head><title>Bing</title></head>
+<body>
+<form id="sb_form" action="/search" method="get">
+  <input id="sb_form_q" name="q" type="search" autocomplete="off">
+</form>
+</body></html>
+"""
+
+RESULTS_PAGE = """<!DOCTYPE html>
+<html><head><title>{query} - Search</title></head>
+<body>
+<form id="sb_form" action="/search" method="get">
+  <input id="sb_form_q" name="q" type="search" value="{query}">
+</form>
+<ol id="b_results">
+{results}
+</ol>
+</body></html>
+"""
+
+RESULT_ITEM = '<li class="b_algo" style="height: 200px"><h2>Result {index} for {query}</h2></li>'
+
+REWARDS_PAGE = """<!DOCTYPE html>
+<html><head><title>Microsoft Rewards</title>
+<style>mee-card {{ display: block; width: 300px; height: 120px; margin: 10px; }}
+mee-card a {{ display: block; width: 100%; height: 100%; }}</style>
+</head>
+<body>
+<div class="m-card-group">
+{daily_cards}
+</div>
+<div id="more-activities">
+  <mee-card-group id="more-activities">
+    <div class="m-card-group">
+{more_cards}
+    </div>
+  </mee-card-group>
+</div>
+</body></html>
+"""
+
+CARD = ('<mee-card><a href="/activity/{card_id}" target="_blank" data-bi-id="activity-{card_id}">'
+        'Activity {card_id} <span class="mee-icon {icon}"></span></a></mee-card>')
+
+ACTIVITY_PAGE = """<!DOCTYPE html>
+<html><head><title>Activity {card_id}</title></head>
+<body><h1>Activity {card_id}</h1></body></html>
+"""
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """
+    Serves the fixture pages. The card counts and which cards are completed come from the
+    server object; opening an activity page marks its card completed, like the real dashboard.
+    """
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/":
+            self.send_page(SEARCH_HOME_PAGE)
+        elif url.path == "/search":
+            # Count the search towards today's points, like the real site
+            counter = "mobileSearch" if "Mobile" in self.headers.get("User-Agent", "") else "pcSearch"
+            with self.server.points_lock:
+                self.server.search_points[counter] = min(self.server.search_points_max,
+                                                         self.server.search_points[counter] + SEARCH_POINTS)
+            query = html.escape(parse_qs(url.query).get("q", [""])[0])
+            results = "\n".join(RESULT_ITEM.format(index=i + 1, query=query) for i in range(10))
+            self.send_page(RESULTS_PAGE.format(query=query, results=results))
+        elif url.path == "/rewards/":
+            daily = self.server.daily_cards
+            more = self.server.more_cards
+            self.send_page(REWARDS_PAGE.format(
+                daily_cards="\n".join(self.card(i + 1) for i in range(daily)),
+                more_cards="\n".join(self.card(daily + i + 1) for i in range(more)),
+            ))
+        elif url.path == "/rewards/api/getuserinfo":
+            self.send_json(self.userinfo())
+        elif url.path.startswith("/activity/"):
+            card_id = url.path.rsplit("/", 1)[-1]
+            if card_id.isdigit():
+                self.server.completed.add(int(card_id))
+            self.send_page(ACTIVITY_PAGE.format(card_id=html.escape(card_id)))
+        else:
+            self.send_error(404)
+
+    def card(self, card_id):
+        icon = "mee-icon-SkypeCircleCheck" if card_id in self.server.completed else "mee-icon-AddMedium"
+        return CARD.format(card_id=card_id, icon=icon)
+
+    def userinfo(self):
+        """The slice of the dashboard's user info that preflight.py reads"""
+        with self.server.points_lock:
+            counters = {
+                key: [{"pointProgress": points, "pointProgressMax": self.server.search_points_max}]
+                for key, points in self.server.search_points.items()
+            }
+        return {"dashboard": {"userStatus": {"counters": counters}}}
+
+    def send_json(self, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_page(self, body):
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    """Runs the fixture site on a free localhost port in a background thread"""
+
+    def __init__(self, daily_cards=3, more_cards=6, completed_cards=0, searches_per_day=5, searches_done=0):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+        self.httpd.daily_cards = daily_cards
+        self.httpd.more_cards = more_cards
+        self.httpd.completed = set(range(1, completed_cards + 1))
+        # Search points per device, as shown on the dashboard
+        self.httpd.search_points_max = searches_per_day * SEARCH_POINTS
+        self.httpd.search_points = {
+            "pcSearch": min(searches_done, searches_per_day) * SEARCH_POINTS,
+            "mobileSearch": min(searches_done, searches_per_day) * SEARCH_POINTS,
+        }
+        self.httpd.points_lock = threading.Lock()
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class CommandCounter:
+    """Counts WebDriver commands sent by any driver while installed"""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+        self._original = None
+
+    def __enter__(self):
+        from selenium.webdriver.remote.webdriver import WebDriver
+        self._original = original = WebDriver.execute
+        counter = self
+
+        def counting_execute(driver, driver_command, params=None):
+            with counter._lock:
+                counter.count += 1
+            return original(driver, driver_command, params)
+
+        WebDriver.execute = counting_execute
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        from selenium.webdriver.remote.webdriver import WebDriver
+        WebDriver.execute = self._original
+
+
+class RssSampler:
+    """
+    Samples the resident memory of every process started by this one
+    (msedgedriver and the Edge process tree). Needs psutil; reports nothing without it.
+    """
+
+    def __init__(self, interval=0.5):
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        me = psutil.Process()
+        while not self._stop.is_set():
+            total = 0
+            for child in me.children(recursive=True):
+                try:
+                    total += child.memory_info().rss
+                except psutil.Error:
+                    pass
+            if total:
+                self.samples.append(total)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        if psutil:
+            self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stop.set()
+        if psutil:
+            self._thread.join()
+
+    def summary(self):
+        if not self.samples:
+            return None
+        return {
+            "peak_mb": round(max(self.samples) / 2 ** 20, 1),
+            "avg_mb": round(statistics.mean(self.samples) / 2 ** 20, 1),
+        }
+
+
+class ProgressTimer:
+    """
+    Progress callback that timestamps every update. search() and quest() report progress once
+    per search and once per card, so the gaps between updates are the per-unit durations.
+    """
+
+    def __init__(self):
+        self.times = []
+
+    def __call__(self, value):
+        self.times.append((time.monotonic(), value))
+
+    def intervals(self, drop_last=False):
+        times = [t for t, value in self.times]
+        if drop_last:
+            # quest() reports 100% right after the last card, that gap is not a card
+            times = times[:-1]
+        return [round(b - a, 3) for a, b in zip(times, times[1:])]
+
+
+class PhaseTimer:
+    """Collects the phase events search() and quest() emit while installed"""
+
+    def __enter__(self):
+        import events
+
+        self.aggregator = events.get_stream().subscribe(events.Aggregator())
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        import events
+
+        events.get_stream().unsubscribe(self.aggregator)
+
+    def summary(self):
+        return {
+            name: {"count": row["count"], "p50_s": round(row["p50"], 3), "p95_s": round(row["p95"], 3)}
+            for name, row in self.aggregator.summary().items()
+        }
+
+
+def summarize(durations):
+    if not durations:
+        return None
+    return {
+        "count": len(durations),
+        "mean_s": round(statistics.mean(durations), 3),
+        "median_s": round(statistics.median(durations), 3),
+        "max_s": round(max(durations), 3),
+    }
+
+
+@contextmanager
+def scratch_journal():
+    """A throwaway Journal, so benchmark runs never count as real progress"""
+    from journal import Journal
+
+    with tempfile.TemporaryDirectory() as tmp:
+        yield Journal(os.path.join(tmp, "journal.sqlite3"))
+
+
+def last_launch():
+    """Launch phase timings of the browser the last task started, if it started one"""
+    import startup
+
+    launches = startup.recent_launches()
+    return launches[-1].as_dict() if launches else None
+
+
+def bench_search(server, num_searches, headless, pacer, batch_actions=False, navigation="home",
+                 load_profile="full", auto_size=False, low_memory=False):
+    from browser import BrowserConfig
+    from search import search
+
+    timer = ProgressTimer()
+    with scratch_journal() as journal, PhaseTimer() as phases, CommandCounter() as commands, RssSampler() as rss:
+        started = time.monotonic()
+        searches_done = search(
+            num_searches_input=num_searches,
+            progress_callback=timer,
+            bing_url=server.base_url + "/",
+            batch_actions=batch_actions,
+            navigation=navigation,
+            pacing_profile=pacer,
+            browser_config=BrowserConfig(headless=headless, load_profile=load_profile, low_memory=low_memory),
+            avoid_recent=False,
+            journal=journal,
+            auto_size=auto_size,
+            userinfo_url=server.base_url + "/rewards/api/getuserinfo",
+        )
+        total = time.monotonic() - started
+
+    return {
+        "total_s": round(total, 3),
+        "per_search": summarize(timer.intervals()),
+        "webdriver_commands": commands.count,
+        "searches_done": searches_done,
+        "commands_per_search": round(commands.count / max(1, searches_done), 1),
+        "rss": rss.summary(),
+        "launch": last_launch(),
+        "phases": phases.summary(),
+    }
+
+
+def bench_search_all(server, num_searches, headless, pacer, load_profile="full", low_memory=False):
+    """Runs desktop and then phone searches in one browser, switched by emulation"""
+    import startup
+    from browser import BrowserConfig
+    from search import search_all
+
+    timer = ProgressTimer()
+    with scratch_journal() as journal, PhaseTimer() as phases, CommandCounter() as commands, RssSampler() as rss:
+        launches_before = len(startup.recent_launches())
+        started = time.monotonic()
+        searches_done = search_all(
+            num_searches_input=num_searches,
+            progress_callback=timer,
+            bing_url=server.base_url + "/",
+            pacing_profile=pacer,
+            browser_config=BrowserConfig(headless=headless, load_profile=load_profile, low_memory=low_memory),
+            avoid_recent=False,
+            journal=journal,
+        )
+        total = time.monotonic() - started
+        launches = len(startup.recent_launches()) - launches_before
+
+    return {
+        "total_s": round(total, 3),
+        "per_search": summarize(timer.intervals()),
+        "webdriver_commands": commands.count,
+        "searches_done": searches_done,
+        "browser_launches": launches,
+        "rss": rss.summary(),
+        "phases": phases.summary(),
+    }
+
+
+def bench_quest(server, headless, pacer, parallel_tabs=1, load_profile="full", low_memory=False):
+    from browser import BrowserConfig
+    from quest import quest
+
+    timer = ProgressTimer()
+    with scratch_journal() as journal, PhaseTimer() as phases, CommandCounter() as commands, RssSampler() as rss:
+        started = time.monotonic()
+        quest(
+            progress_callback=timer,
+            rewards_url=server.base_url + "/rewards/",
+            pacing_profile=pacer,
+            parallel_tabs=parallel_tabs,
+            browser_config=BrowserConfig(headless=headless, load_profile=load_profile, low_memory=low_memory),
+            journal=journal,
+        )
+        total = time.monotonic() - started
+
+    cards = server.httpd.daily_cards + server.httpd.more_cards
+    return {
+        "total_s": round(total, 3),
+        "per_card": summarize(timer.intervals(drop_last=True)),
+        "webdriver_commands": commands.count,
+        "commands_per_card": round(commands.count / max(1, cards), 1),
+        "rss": rss.summary(),
+        "launch": last_launch(),
+        "phases": phases.summary(),
+    }
+
+
+def bench_engine(server, sessions, num_searches, headless, pacer, load_profile="full", low_memory=False):
+    """Runs searches on several fresh browser sessions at once from the asyncio engine"""
+    from browser import BrowserConfig
+    from engine import Engine
+
+    peak_threads = threading.active_count()
+
+    def track_threads(profile_name, value):
+        nonlocal peak_threads
+        peak_threads = max(peak_threads, threading.active_count())
+
+    profiles = [(f"session-{n + 1}", None) for n in range(sessions)]
+    with scratch_journal() as journal, PhaseTimer() as phases, RssSampler() as rss:
+        threads_before = threading.active_count()
+        started = time.monotonic()
+        results = Engine(max_sessions=sessions, pacer=pacer).run(
+            "search",
+            profiles,
+            progress_callback=track_threads,
+            num_searches_input=num_searches,
+            bing_url=server.base_url + "/",
+            pacing_profile=pacer,
+            browser_config=BrowserConfig(headless=headless, load_profile=load_profile, low_memory=low_memory),
+            avoid_recent=False,
+            journal=journal,
+        )
+        total = time.monotonic() - started
+
+    searches_done = sum(result.value or 0 for result in results)
+    return {
+        "total_s": round(total, 3),
+        "searches_done": searches_done,
+        "searches_per_s": round(searches_done / total, 2) if total else None,
+        "failed_sessions": sum(1 for result in results if not result.ok),
+        "threads_before": threads_before,
+        "peak_threads": peak_threads,
+        "rss": rss.summary(),
+        "phases": phases.summary(),
+    }
+
+
+def parse_importtime(output):
+    """
+    Parses python -X importtime output into a list of (module, self_us, cumulative_us, depth)
+    in output order. A module is listed after everything it imported, one depth level deeper.
+    """
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return modules
+
+
+def direct_imports(modules, parent):
+    """Returns (module, cumulative_us) for the modules parent imported itself"""
+    names = [name for name, _, _, _ in modules]
+    end = names.index(parent)
+    depth = modules[end][3]
+    result = []
+    for name, _, cumulative_us, module_depth in reversed(modules[:end]):
+        if module_depth <= depth:
+            break
+        if module_depth == depth + 1:
+            result.append((name, cumulative_us))
+    return result
+
+
+def bench_cli(runs):
+    """Times importing main.py and running main.py --help in fresh interpreters"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    import_times = []
+    help_times = []
+    modules = []
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                              cwd=root, capture_output=True, text=True)
+        modules = parse_importtime(proc.stderr)
+        main_times = [cumulative for name, _, cumulative, _ in modules if name == "main"]
+        if not main_times:
+            raise RuntimeError(f"Could not import main.py: {proc.stderr.strip().splitlines()[-1:]}")
+        import_times.append(main_times[0] / 1e6)
+
+        started = time.monotonic()
+        subprocess.run([sys.executable, "main.py", "--help"], cwd=root, capture_output=True)
+        help_times.append(time.monotonic() - started)
+
+    # What main.py itself pulls in, slowest first
+    direct = sorted(direct_imports(modules, "main"), key=lambda item: item[1], reverse=True)
+    return {
+        "import_ms": round(statistics.median(import_times) * 1000, 1),
+        "help_ms": round(statistics.median(help_times) * 1000, 1),
+        "import_main": summarize(import_times),
+        "help_wall": summarize(help_times),
+        "slowest_imports_ms": {name: round(us / 1000, 1) for name, us in direct[:5]},
+        "heavy_modules": sorted(name for name, _, _, _ in modules if name in HEAVY_MODULES),
+    }
+
+
+def bench_corpus(lines, num_searches, runs=5):
+    """
+    Times picking num_searches terms from a generated corpus file of the given length,
+    with a full recently-used index to avoid, and measures the peak memory of one pick.
+    """
+    import corpus
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "terms.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            for i in range(lines):
+                f.write(f"generated search term {i}\n")
+        recent = {corpus.term_hash(f"generated search term {i}") for i in range(corpus.RECENT_CAPACITY)}
+
+        durations = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            corpus.reservoir_sample(corpus.iter_terms(path), num_searches, exclude=recent)
+            durations.append(time.perf_counter() - started)
+
+        tracemalloc.start()
+        try:
+            corpus.reservoir_sample(corpus.iter_terms(path), num_searches, exclude=recent)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "select_ms": round(statistics.median(durations) * 1000, 1),
+        "select": summarize(durations),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def current_version():
+    """Short git commit of the working tree, so results can be lined up with versions"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def load_previous(path, task, params):
+    """Returns the most recent stored result for task run with the same params, or None"""
+    if not os.path.exists(path):
+        return None
+    previous = None
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("task") == task and record.get("params") == params:
+                previous = record
+    return previous
+
+
+def print_result(task, result, previous):
+    print(f"\n{task} benchmark:")
+    for key, value in result["metrics"].items():
+        line = f"  {key}: {value}"
+        old = previous and previous["metrics"].get(key)
+        if isinstance(value, (int, float)) and isinstance(old, (int, float)) and old:
+            line += f" ({(value - old) / old * 100:+.1f}% vs {previous['version']})"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark search() and quest() against local fixture pages")
+    parser.add_argument("--task", choices=["search", "search-all", "quest", "cli", "corpus", "engine", "all"], default="all")
+    parser.add_argument("--searches", type=int, default=5, help="Number of searches to run")
+    parser.add_argument("--auto-size", action="store_true",
+                        help="Size the search run from the fixture dashboard's search points")
+    parser.add_argument("--searches-done", type=int, default=0,
+                        help="Searches the fixture dashboard shows as already done today")
+    parser.add_argument("--daily-cards", type=int, default=3, help="Cards in the main card group")
+    parser.add_argument("--more-cards", type=int, default=6, help="Cards in #more-activities")
+    parser.add_argument("--tabs", type=int, default=1, help="Activity tabs open at once in quest mode")
+    parser.add_argument("--completed-cards", type=int, default=0, help="Cards already completed before the run")
+    parser.add_argument("--batch-actions", action="store_true", help="Run searches with batched in-page actions")
+    parser.add_argument("--navigation", choices=["home", "direct"], default="home", help="Search navigation mode")
+    parser.add_argument("--load-profile", choices=["full", "lean", "minimal"], default="full",
+                        help="Page-load profile to run with")
+    parser.add_argument("--low-memory", action="store_true", help="Run Edge in low-memory mode")
+    parser.add_argument("--pace", choices=sorted(pacing.PROFILES), default=pacing.DEFAULT_PROFILE,
+                        help="Pacing profile to run with")
+    parser.add_argument("--virtual-clock", action="store_true",
+                        help="Account for pacing delays on a virtual clock instead of sleeping")
+    parser.add_argument("--show-browser", action="store_true", help="Run Edge with its UI instead of headless")
+    parser.add_argument("--sessions", type=int, default=4,
+                        help="Browser sessions the engine task runs at the same time")
+    parser.add_argument("--cli-runs", type=int, default=5, help="Interpreter starts to time for the cli task")
+    parser.add_argument("--corpus-lines", type=int, default=100000,
+                        help="Lines in the generated terms file for the corpus task")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="JSON lines file results are appended to")
+    args = parser.parse_args()
+
+    if psutil is None:
+        print("psutil is not installed, browser RSS will not be reported (pip install psutil)")
+
+    tasks = ["cli", "corpus", "search", "quest"] if args.task == "all" else [args.task]
+    version = current_version()
+    headless = not args.show_browser
+
+    with FixtureServer(args.daily_cards, args.more_cards, args.completed_cards,
+                       args.searches, args.searches_done) as server:
+        for task in tasks:
+            pacer = pacing.Pacer(args.pace, clock=pacing.VirtualClock() if args.virtual_clock else None)
+            if task == "cli":
+                metrics = bench_cli(args.cli_runs)
+            elif task == "corpus":
+                metrics = bench_corpus(args.corpus_lines, args.searches)
+            elif task == "engine":
+                metrics = bench_engine(server, args.sessions, args.searches, headless, pacer, args.load_profile,
+                                       args.low_memory)
+            elif task == "search-all":
+                metrics = bench_search_all(server, args.searches, headless, pacer, args.load_profile,
+                                           args.low_memory)
+            elif task == "search":
+                metrics = bench_search(server, args.searches, headless, pacer, args.batch_actions, args.navigation,
+                                       args.load_profile, args.auto_size, args.low_memory)
+            else:
+                metrics = bench_quest(server, headless, pacer, args.tabs, args.load_profile, args.low_memory)
+            if args.virtual_clock and task in ("search", "search-all", "quest", "engine"):
+                metrics["virtual_pacing_s"] = round(pacer.clock.now(), 3)
+
+            # Runs are only compared with earlier runs of the same params
+            if task == "cli":
+                params = {"runs": args.cli_runs}
+            elif task == "corpus":
+                params = {"lines": args.corpus_lines, "searches": args.searches}
+            elif task == "engine":
+                params = {
+                    "sessions": args.sessions,
+                    "searches": args.searches,
+                    "headless": headless,
+                    "pace": args.pace,
+                    "load_profile": args.load_profile,
+                    "low_memory": args.low_memory,
+                    "virtual_clock": args.virtual_clock,
+                }
+            else:
+                params = {
+                    "searches": args.searches,
+                    "auto_size": args.auto_size,
+                    "searches_done": args.searches_done,
+                    "daily_cards": args.daily_cards,
+                    "more_cards": args.more_cards,
+                    "completed_cards": args.completed_cards,
+                    "tabs": args.tabs,
+                    "headless": headless,
+                    "batch_actions": args.batch_actions,
+                    "navigation": args.navigation,
+                    "pace": args.pace,
+                    "load_profile": args.load_profile,
+                    "low_memory": args.low_memory,
+                    "virtual_clock": args.virtual_clock,
+                }
+
+            result = {
+                "task": task,
+                "version": version,
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "params": params,
+                "metrics": metrics,
+            }
+            print_result(task, result, load_previous(args.output, task, result["params"]))
+            with open(args.output, "a", encoding="utf-8") as f:
+                f.write(json.dumps(result) + "\n")
+
+    print(f"\nResults appended to {args.output}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\nBenchmark cancelled by user.")
+        sys.exit(1)
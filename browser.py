@@ -0,0 +1,274 @@
+import os
+
+# selenium (directly and through startup) is imported where drivers are built, so that
+# reading presets such as LOAD_PROFILES stays cheap for the command line entry point
+
+# Device presets. 'phone' emulates an iPhone 10. 'emulation' is what emulation.py needs to
+# switch a running desktop browser to the device; None means the browser's own settings.
+DEVICES = {
+    'desktop': {
+        'user_agent': None,
+        'window_size': None,  # maximized
+        'emulation': None,
+    },
+    'phone': {
+        'user_agent': (
+            "Mozilla/5.0 (iPhone; CPU iPhone OS 13_2_3 like Mac OS X) "
+            "AppleWebKit/605.1.15 (KHTML, like Gecko) Version/13.0.3 Mobile/15E148 Safari/604.1"
+        ),
+        'window_size': (375, 812),  # Scaled down for browser
+        'emulation': {
+            'platform': 'iPhone',
+            'device_scale_factor': 3,
+            'max_touch_points': 5,
+        },
+    },
+}
+
+# URL patterns for resource types the automation never looks at
+RESOURCE_TYPE_PATTERNS = {
+    'image': ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*://th.bing.com/th*"],
+    'font': ["*.woff", "*.woff2", "*.ttf", "*.otf"],
+    'media': ["*.mp4", "*.webm", "*.mp3", "*.m3u8"],
+    'stylesheet': ["*.css"],
+}
+
+# Third-party analytics and ad requests
+TRACKER_PATTERNS = [
+    "*doubleclick.net*",
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*clarity.ms*",
+    "*scorecardresearch.com*",
+    "*bat.bing.com*",
+]
+
+# Page-load profiles:
+#   full    - wait for every page to load completely, block nothing (the browser default)
+#   lean    - return once the DOM is ready and skip images, fonts, media and trackers
+#   minimal - do not wait for page loads at all (the waits module does the waiting) and
+#             additionally skip stylesheets
+LOAD_PROFILES = {
+    'full': {
+        'strategy': 'normal',
+        'blocked_types': (),
+        'blocked_urls': (),
+    },
+    'lean': {
+        'strategy': 'eager',
+        'blocked_types': ('image', 'font', 'media'),
+        'blocked_urls': tuple(TRACKER_PATTERNS),
+    },
+    'minimal': {
+        'strategy': 'none',
+        'blocked_types': ('image', 'font', 'media', 'stylesheet'),
+        'blocked_urls': tuple(TRACKER_PATTERNS),
+    },
+}
+
+DEFAULT_LOAD_PROFILE = 'full'
+
+# Low-memory mode: at most this many renderer processes, however many tabs are open
+LOW_MEMORY_RENDERER_LIMIT = 2
+
+# Edge flags of the low-memory mode
+LOW_MEMORY_ARGS = (
+    f"--renderer-process-limit={LOW_MEMORY_RENDERER_LIMIT}",
+    "--process-per-site",
+    "--enable-low-end-device-mode",
+    "--enable-features=AutomaticTabDiscarding",
+    "--js-flags=--max-old-space-size=512",
+    "--disk-cache-size=33554432",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-sync",
+    "--disable-default-apps",
+)
+
+# Low-memory mode restarts the browser after this many searches, or once its process tree
+# uses more than this many MiB (see memory.py), unless search() is told otherwise
+LOW_MEMORY_RECYCLE_AFTER = 30
+LOW_MEMORY_MAX_RSS_MB = 1500
+
+
+def execute_cdp(driver, cmd, params=None):
+    """
+    Sends a Chrome DevTools Protocol command to the browser behind driver. Drivers attached
+    to the shared msedgedriver (see startup.py) have no execute_cdp_cmd(), but their
+    connection knows the same vendor command.
+    """
+    if hasattr(driver, 'execute_cdp_cmd'):
+        return driver.execute_cdp_cmd(cmd, params or {})
+    return driver.execute('executeCdpCommand', {'cmd': cmd, 'params': params or {}})['value']
+
+
+class BrowserConfig:
+    """
+    Describes how to launch Edge and creates drivers from that description.
+
+    A config is never changed once created (use replace() to derive a new one), so the same
+    config can be shared by jobs running side by side in one process.
+
+    Args:
+        headless (bool): Run the browser without UI.
+        device (str): Device preset from DEVICES.
+        profile_path (str, optional): Path to Edge user profile. If None, uses default profile.
+        extra_args (iterable, optional): Additional Edge command line flags.
+        load_profile (str): Page-load profile from LOAD_PROFILES.
+        blocked_types (iterable, optional): Resource types from RESOURCE_TYPE_PATTERNS to block.
+            Defaults to the load profile's.
+        blocked_urls (iterable, optional): Extra URL patterns to block on top of the load profile's.
+        low_memory (bool): Launch Edge with LOW_MEMORY_ARGS, and let search() restart it periodically.
+    """
+    def __init__(self, headless=False, device='desktop', profile_path=None, extra_args=(),
+                 load_profile=DEFAULT_LOAD_PROFILE, blocked_types=None, blocked_urls=(), low_memory=False):
+        if device not in DEVICES:
+            raise ValueError(f"Unknown device: {device}")
+        if load_profile not in LOAD_PROFILES:
+            raise ValueError(f"Unknown page-load profile: {load_profile}")
+        if blocked_types is not None:
+            unknown = set(blocked_types) - set(RESOURCE_TYPE_PATTERNS)
+            if unknown:
+                raise ValueError(f"Unknown resource types: {', '.join(sorted(unknown))}")
+            blocked_types = tuple(blocked_types)
+        self.headless = headless
+        self.device = device
+        self.profile_path = profile_path
+        self.extra_args = tuple(extra_args)
+        self.load_profile = load_profile
+        self.blocked_types = blocked_types
+        self.blocked_urls = tuple(blocked_urls)
+        self.low_memory = low_memory
+
+    @property
+    def is_phone(self):
+        return self.device == 'phone'
+
+    @property
+    def user_data_dir(self):
+        """Edge "User Data" directory the profile lives in, or None for a throwaway profile.
+        Edge runs one browser per directory, whichever of its profiles is asked for."""
+        return os.path.dirname(self.profile_path) if self.profile_path else None
+
+    def replace(self, **changes):
+        """Returns a copy of this config with the given fields changed"""
+        fields = {
+            'headless': self.headless,
+            'device': self.device,
+            'profile_path': self.profile_path,
+            'extra_args': self.extra_args,
+            'load_profile': self.load_profile,
+            'blocked_types': self.blocked_types,
+            'blocked_urls': self.blocked_urls,
+            'low_memory': self.low_memory,
+        }
+        fields.update(changes)
+        return BrowserConfig(**fields)
+
+    def key(self):
+        """Hashable key; two configs with equal keys launch identical browsers"""
+        return (self.headless, self.device, self.profile_path, self.extra_args,
+                self.load_profile, self.blocked_types, self.blocked_urls, self.low_memory)
+
+    @property
+    def page_load_strategy(self):
+        return LOAD_PROFILES[self.load_profile]['strategy']
+
+    def blocked_patterns(self):
+        """Returns every URL pattern the browser should block"""
+        settings = LOAD_PROFILES[self.load_profile]
+        types = settings['blocked_types'] if self.blocked_types is None else self.blocked_types
+        patterns = []
+        for resource_type in types:
+            patterns.extend(RESOURCE_TYPE_PATTERNS[resource_type])
+        patterns.extend(settings['blocked_urls'])
+        patterns.extend(self.blocked_urls)
+        return patterns
+
+    def describe_load_profile(self):
+        """One-line description of the page-load profile for run summaries"""
+        return (f"{self.load_profile} (load strategy '{self.page_load_strategy}', "
+                f"{len(self.blocked_patterns())} blocked URL patterns)")
+
+    def build_options(self):
+        """Returns Edge Options for this config"""
+        from selenium.webdriver.edge.options import Options
+
+        edge_options = Options()
+
+        device = DEVICES[self.device]
+        if device['user_agent']:
+            edge_options.add_argument(f"--user-agent={device['user_agent']}")
+        if device['window_size']:
+            edge_options.add_argument("--window-size={},{}".format(*device['window_size']))
+        else:
+            edge_options.add_argument("--start-maximized")
+
+        if self.headless:
+            edge_options.add_argument("--headless")
+
+        # Add user data directory if profile path is specified
+        if self.profile_path:
+            edge_options.add_argument(f"--user-data-dir={self.user_data_dir}")
+            edge_options.add_argument(f"--profile-directory={os.path.basename(self.profile_path)}")
+
+        if self.low_memory:
+            for arg in LOW_MEMORY_ARGS:
+                edge_options.add_argument(arg)
+
+        for arg in self.extra_args:
+            edge_options.add_argument(arg)
+
+        edge_options.page_load_strategy = self.page_load_strategy
+        return edge_options
+
+    def create_driver(self):
+        """Launches a new Edge browser for this config"""
+        import startup
+
+        if self.profile_path:
+            print(f"Using Edge profile: {self.profile_path}")
+        driver = startup.launch(self.build_options())
+        self.apply_blocking(driver)
+        return driver
+
+    def apply_blocking(self, driver):
+        """
+        Blocks this config's URL patterns in the driver's current tab. DevTools network
+        settings are per tab, so tabs opened later need apply_blocking_to_tabs().
+        """
+        patterns = self.blocked_patterns()
+        if not patterns:
+            return
+        try:
+            execute_cdp(driver, 'Network.enable')
+            execute_cdp(driver, 'Network.setBlockedURLs', {'urls': patterns})
+        except Exception as e:
+            print(f"Could not block resources, loading pages in full: {e}")
+
+    def apply_blocking_to_tabs(self, driver, handles, return_to):
+        """
+        Blocks this config's URL patterns in each tab in handles, e.g. activity tabs a card
+        click opened, then switches back to the tab return_to. Requests a tab made before
+        this call are not affected.
+        """
+        if not self.blocked_patterns():
+            return
+        for handle in handles:
+            driver.switch_to.window(handle)
+            self.apply_blocking(driver)
+        driver.switch_to.window(return_to)
+
+
+def resolve_config(browser_config, isPhone=None, profile_path=None):
+    """
+    Combines the browser_config passed to search()/quest() with their isPhone and
+    profile_path arguments, which take precedence when given. Returns a new BrowserConfig.
+    """
+    config = browser_config or BrowserConfig()
+    device = config.device if isPhone is None else ('phone' if isPhone else 'desktop')
+    return config.replace(
+        device=device,
+        profile_path=profile_path or config.profile_path,
+    )
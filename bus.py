@@ -0,0 +1,125 @@
+"""
+Thread-safe bus between worker threads and the GUI.
+
+Workers never touch Tk. They publish state (a profile's progress, its status) and output
+to a Bus; the Tk loop drains it on a fixed tick. State is coalesced, only the latest value
+per job and key is kept, so a tick costs the same whether one profile or twenty reported
+since the last one. Output is split into lines per job, so lines printed by concurrent
+profiles never interleave, and each line carries the ID of the job that printed it.
+
+sys.stdout is replaced once by a BusStdout; a thread's output goes to the job it is bound
+to with Bus.job(), so search and quest runs can print at the same time.
+"""
+from collections import deque
+from contextlib import contextmanager
+import threading
+
+# Output lines kept while the Tk loop is not draining; the oldest are dropped beyond this
+BACKLOG_LINES = 50000
+
+
+def profile_job(task, profile_name):
+    """Job ID for one profile of a run, e.g. 'search/Profile 1'"""
+    return f"{task}/{profile_name}"
+
+
+def split_job(job):
+    """Returns (task, profile_name) for a profile job, (job, None) for a run-level job"""
+    task, _, profile_name = job.partition('/')
+    return task, profile_name or None
+
+
+class Bus:
+    """
+    Coalescing state and per-job output, written from any thread and drained by one.
+
+    Args:
+        backlog (int): Output lines kept until drained, oldest dropped first.
+    """
+    def __init__(self, backlog=BACKLOG_LINES):
+        self._lock = threading.Lock()
+        self._state = {}                       # (job, key) -> latest value
+        self._lines = deque(maxlen=backlog)    # (job, line) pairs, newline included
+        self._partial = {}                     # job -> text not yet ended by a newline
+        self._local = threading.local()
+
+    def set(self, job, key, value):
+        """Publishes a state value, replacing any value for job and key not yet drained"""
+        with self._lock:
+            self._state[(job, key)] = value
+
+    def write(self, job, text):
+        """Adds output of job. Complete lines become available to drain(), the rest waits."""
+        with self._lock:
+            lines = (self._partial.pop(job, '') + text).split('\n')
+            rest = lines.pop()
+            for line in lines:
+                self._lines.append((job, line + '\n'))
+            if rest:
+                self._partial[job] = rest
+
+    def flush_job(self, job):
+        """Makes a job's unfinished line available to drain()"""
+        with self._lock:
+            rest = self._partial.pop(job, '')
+            if rest:
+                self._lines.append((job, rest))
+
+    def drain(self, max_lines=None):
+        """
+        Takes everything published so far.
+
+        Args:
+            max_lines (int, optional): Take at most this many output lines; the rest stays
+                for the next call.
+
+        Returns:
+            tuple: ({(job, key): value}, [(job, line), ...])
+        """
+        with self._lock:
+            state, self._state = self._state, {}
+            count = len(self._lines) if max_lines is None else min(max_lines, len(self._lines))
+            lines = [self._lines.popleft() for _ in range(count)]
+        return state, lines
+
+    def pending(self):
+        """Returns True if anything is waiting to be drained"""
+        with self._lock:
+            return bool(self._state or self._lines)
+
+    def current_job(self):
+        """Job the calling thread is bound to, or None"""
+        return getattr(self._local, 'job', None)
+
+    @contextmanager
+    def job(self, job):
+        """Binds the calling thread to job for the enclosed block, e.g. a worker running one profile"""
+        previous = self.current_job()
+        self._local.job = job
+        try:
+            yield job
+        finally:
+            self.flush_job(job)
+            self._local.job = previous
+
+
+class BusStdout:
+    """
+    File-like object for sys.stdout that writes to a Bus, as output of the job the
+    writing thread is bound to.
+
+    Args:
+        bus (Bus): Bus to write to.
+        default_job (str, optional): Job for threads that are not bound to one.
+    """
+    def __init__(self, bus, default_job=None):
+        self.bus = bus
+        self.default_job = default_job
+
+    def write(self, text):
+        job = self.bus.current_job()
+        self.bus.write(job if job is not None else self.default_job, text)
+        return len(text)
+
+    def flush(self):
+        pass
@@ -0,0 +1,109 @@
+"""
+Reading the state of Rewards dashboard cards.
+
+Everything quest() needs to decide which cards to click is collected by one
+execute_script() call per card group instead of several WebDriver calls per card.
+Cards are addressed by stable keys rather than WebElements, so a reload of the
+dashboard never leaves quest() holding stale elements.
+"""
+import json
+import uuid
+
+# Icon the dashboard shows on a card whose activity is already done
+COMPLETED_ICON_SELECTOR = "span.mee-icon-SkypeCircleCheck"
+
+# Card groups on the dashboard, as CSS selectors resolved inside the page
+MAIN_GROUP_SELECTOR = "div.m-card-group"
+MORE_ACTIVITIES_GROUP_SELECTOR = "mee-card-group#more-activities div.m-card-group"
+
+# Shared by the scripts below: lists the mee-cards of a container with a stable, unique key each
+# (data-bi-id, else link target, else title, else position; repeats get a #n suffix).
+# The container can be an element or a CSS selector.
+CARD_KEYS_JS = """
+function cardKeys(container) {
+    if (typeof container === 'string') { container = document.querySelector(container); }
+    if (!container) { return []; }
+    var cards = container.querySelectorAll('mee-card'), seen = {}, result = [];
+    for (var i = 0; i < cards.length; i++) {
+        var card = cards[i], link = card.querySelector('a');
+        var href = link ? link.getAttribute('href') : null;
+        var title = (card.textContent || '').replace(/\\s+/g, ' ').trim().slice(0, 80);
+        var key = (link && link.getAttribute('data-bi-id')) || href || title || ('card-' + i);
+        seen[key] = (seen[key] || 0) + 1;
+        if (seen[key] > 1) { key += '#' + seen[key]; }
+        result.push({card: card, key: key, href: href});
+    }
+    return result;
+}
+"""
+
+# Returns a compact JSON array with one entry per mee-card in the container:
+#   index     - position of the card in the container
+#   key       - stable identifier, see cardKeys()
+#   completed - whether the completed icon is shown
+#   href      - link target of the card, if any
+CARD_SCAN_SCRIPT = CARD_KEYS_JS + """
+var entries = cardKeys(arguments[0]), completedSelector = arguments[1], result = [];
+for (var i = 0; i < entries.length; i++) {
+    result.push({
+        index: i,
+        key: entries[i].key,
+        completed: !!entries[i].card.querySelector(completedSelector),
+        href: entries[i].href
+    });
+}
+return JSON.stringify(result);
+"""
+
+# Finds the card with the given key, scrolls it into view and returns it (or null)
+FIND_CARD_SCRIPT = CARD_KEYS_JS + """
+var entries = cardKeys(arguments[0]), key = arguments[1];
+for (var i = 0; i < entries.length; i++) {
+    if (entries[i].key === key) {
+        entries[i].card.scrollIntoView({block: 'center'});
+        return entries[i].card;
+    }
+}
+return null;
+"""
+
+MARK_PAGE_SCRIPT = "window.__edgeAutomatorPage = arguments[0];"
+READ_MARK_SCRIPT = "return window.__edgeAutomatorPage || null;"
+
+
+def scan_cards(driver, container):
+    """
+    Returns the state of every mee-card in container as a list of dicts
+    with index, key, completed and href, read in a single WebDriver call.
+
+    Args:
+        driver (WebDriver): Driver showing the dashboard.
+        container (WebElement or str): Card group element, or a CSS selector for it.
+    """
+    return json.loads(driver.execute_script(CARD_SCAN_SCRIPT, container, COMPLETED_ICON_SELECTOR))
+
+
+def find_card(driver, container, key):
+    """
+    Re-resolves the card with key in container, scrolled into view. Returns None if
+    the card is gone. Always returns a fresh element, so it cannot be stale.
+    """
+    return driver.execute_script(FIND_CARD_SCRIPT, container, key)
+
+
+def mark_page(driver):
+    """Tags the current document and returns the tag. Call after every navigation."""
+    token = uuid.uuid4().hex
+    driver.execute_script(MARK_PAGE_SCRIPT, token)
+    return token
+
+
+def page_changed(driver, token):
+    """
+    Cheap check whether the document tagged by mark_page() has been replaced,
+    i.e. the page was reloaded or navigated away. Any error counts as changed.
+    """
+    try:
+        return driver.execute_script(READ_MARK_SCRIPT) != token
+    except Exception:
+        return True
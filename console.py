@@ -0,0 +1,67 @@
+"""
+The GUI console: a text widget that shows everything printed while the GUI runs.
+"""
+from collections import deque
+import tkinter as tk
+
+# Console defaults
+CONSOLE_MAX_LINES = 5000       # lines kept in the console and its buffer
+
+
+class ConsoleView:
+    """
+    The console widget. Only called from the Tk loop, which appends each tick's output
+    with a single insert. The console and a ring buffer of its lines keep at most
+    max_lines lines, dropping the oldest.
+    """
+    def __init__(self, text_widget, max_lines=CONSOLE_MAX_LINES):
+        self.text_widget = text_widget
+        self.max_lines = max_lines
+        self.lines = deque(maxlen=max_lines)
+        self.partial = ""  # last line, not yet ended by a newline
+
+    def append(self, text):
+        if not text:
+            return
+        self.buffer(text)
+        self.text_widget.configure(state="normal")
+        self.text_widget.insert(tk.END, text)
+        self.trim_widget()
+        self.text_widget.see(tk.END)
+        self.text_widget.configure(state="disabled")
+
+    def buffer(self, text):
+        """Adds text to the ring buffer of lines"""
+        lines = (self.partial + text).split("\n")
+        self.partial = lines.pop()
+        self.lines.extend(lines)
+
+    def trim_widget(self):
+        """Deletes the oldest lines from the widget beyond max_lines"""
+        line_count = int(self.text_widget.index("end-1c").split(".")[0])
+        excess = line_count - self.max_lines
+        if excess > 0:
+            self.text_widget.delete("1.0", f"{excess + 1}.0")
+
+    def set_max_lines(self, max_lines):
+        """Changes how many lines are kept, trimming right away if needed"""
+        self.max_lines = max(1, max_lines)
+        self.lines = deque(self.lines, maxlen=self.max_lines)
+        self.text_widget.configure(state="normal")
+        self.trim_widget()
+        self.text_widget.configure(state="disabled")
+
+    def save(self, path):
+        """Writes the buffered lines to path"""
+        with open(path, "w", encoding="utf-8") as f:
+            for line in self.lines:
+                f.write(line + "\n")
+            if self.partial:
+                f.write(self.partial)
+
+    def clear(self):
+        self.lines.clear()
+        self.partial = ""
+        self.text_widget.configure(state="normal")
+        self.text_widget.delete(1.0, tk.END)
+        self.text_widget.configure(state="disabled")
@@ -0,0 +1,295 @@
+"""
+Search terms for search().
+
+Terms come from the built-in list or from a text file with one term per line (blank lines
+and lines starting with # are ignored). Files are streamed and sampled with a reservoir,
+so a 100k+ line corpus costs one pass over the file and memory for the selected terms only.
+
+Terms used recently, by any run on any profile, are kept as 8-byte hashes in a small
+file in the data directory and are only picked again when there is nothing fresh left.
+"""
+from array import array
+from itertools import islice
+import hashlib
+import math
+import os
+import random
+import threading
+
+import paths
+
+DEFAULT_SEARCH_TERMS = (
+    # Technology (10)
+    "latest technology news 2023",
+    "best new gadgets 2023",
+    "AI advancements this year",
+    "cybersecurity tips for beginners",
+    "how to build a PC",
+    "smart home device reviews",
+    "upcoming smartphone releases",
+    "best laptops for programming",
+    "cloud computing trends",
+    "blockchain technology explained",
+
+    # Food/Cooking (10)
+    "best recipes for dinner tonight",
+    "quick healthy meals under 30 minutes",
+    "vegetarian meal prep ideas",
+    "baking tips for beginners",
+    "international cuisine recipes",
+    "keto diet meal plans",
+    "instant pot recipes 2023",
+    "gluten-free dessert ideas",
+    "meal prep for weight loss",
+    "food presentation techniques",
+
+    # Learning/Education (10)
+    "how to learn programming fast",
+    "best online courses 2023",
+    "language learning techniques",
+    "mathematics for beginners",
+    "science experiments for kids",
+    "history documentaries to watch",
+    "photography tips for beginners",
+    "music theory basics",
+    "public speaking skills",
+    "critical thinking exercises",
+
+    # Travel (10)
+    "top travel destinations 2023",
+    "budget travel tips Europe",
+    "best beaches in the world",
+    "solo travel safety tips",
+    "eco-friendly travel options",
+    "hidden gem vacation spots",
+    "road trip packing list",
+    "cultural etiquette guide",
+    "best travel credit cards",
+    "how to travel with pets",
+
+    # Fitness/Health (10)
+    "fitness tips for beginners at home",
+    "yoga routines for flexibility",
+    "weight training fundamentals",
+    "nutrition for muscle building",
+    "mental health self-care tips",
+    "home workout no equipment",
+    "running tips for beginners",
+    "sleep improvement techniques",
+    "stress management exercises",
+    "posture correction exercises",
+
+    # Books/Literature (10)
+    "best book recommendations 2023",
+    "classic novels everyone should read",
+    "self-improvement books 2023",
+    "how to read more books",
+    "sci-fi book series to start",
+    "biographies of famous people",
+    "book club discussion ideas",
+    "speed reading techniques",
+    "best audiobook platforms",
+    "writing your first novel",
+
+    # Lifestyle (10)
+    "sustainable living ideas for homes",
+    "minimalism for beginners",
+    "zero waste lifestyle tips",
+    "ethical fashion brands",
+    "mindfulness meditation guide",
+    "digital detox methods",
+    "tiny house living pros and cons",
+    "homemade natural cleaning products",
+    "capsule wardrobe essentials",
+    "financial independence tips",
+
+    # Productivity (10)
+    "best productivity tools 2023",
+    "time management techniques",
+    "how to stop procrastinating",
+    "notetaking apps comparison",
+    "morning routine for success",
+    "email management strategies",
+    "focus techniques for studying",
+    "remote work best practices",
+    "goal setting frameworks",
+    "decision making strategies",
+
+    # Hobbies (10)
+    "gardening tips for spring 2023",
+    "indoor plant care guide",
+    "beginner painting techniques",
+    "woodworking projects for starters",
+    "knitting patterns for beginners",
+    "home brewing beer guide",
+    "astronomy for amateurs",
+    "bird watching essentials",
+    "chess strategies for beginners",
+    "collecting rare coins guide",
+)
+
+# Text file used instead of DEFAULT_SEARCH_TERMS when search() is not given one
+TERMS_FILE = os.environ.get('EDGE_AUTOMATOR_TERMS_FILE')
+
+RECENT_TERMS_FILE = 'recent_terms.bin'
+# How many recently used terms are remembered; 8 bytes each on disk and in memory
+RECENT_CAPACITY = 4096
+
+
+def iter_terms(path):
+    """Yields the terms in a corpus file one at a time, without reading the whole file"""
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            term = line.strip()
+            if term and not term.startswith('#'):
+                yield term
+
+
+def term_hash(term):
+    """64-bit hash of a term, ignoring case and spacing"""
+    normalized = ' '.join(term.casefold().split())
+    return int.from_bytes(hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def reservoir_sample(terms, k, exclude=(), rng=random):
+    """
+    Picks k distinct terms uniformly at random from an iterable of any length in one pass.
+
+    Terms whose hash is in exclude are only used when there are fewer than k others. To
+    allow for them the reservoir holds k + len(exclude) terms, so memory depends on k and
+    the size of exclude but not on the length of terms.
+
+    Args:
+        terms (iterable): Terms to choose from.
+        k (int): Number of terms wanted.
+        exclude (set, optional): term_hash() values to avoid.
+        rng (random.Random, optional): Source of randomness.
+
+    Returns:
+        list: Up to k terms in random order, fewer only if there are fewer distinct terms.
+    """
+    if k <= 0:
+        return []
+    sample = _reservoir(terms, k + len(exclude), rng)
+    rng.shuffle(sample)
+
+    fresh, stale, seen = [], [], set()
+    for term in sample:
+        key = term_hash(term)
+        if key in seen:
+            continue  # the corpus repeats a term
+        seen.add(key)
+        (stale if key in exclude else fresh).append(term)
+    chosen = fresh[:k] + stale[:max(0, k - len(fresh))]
+    rng.shuffle(chosen)
+    return chosen
+
+
+def _reservoir(items, size, rng):
+    """
+    Algorithm L: a uniform sample of size items. Random numbers are only drawn for items
+    that enter the reservoir, everything in between is skipped without being looked at.
+    """
+    items = iter(items)
+    reservoir = list(islice(items, size))
+    if len(reservoir) < size:
+        return reservoir
+    w = math.exp(math.log(1.0 - rng.random()) / size)
+    while True:
+        skip = math.floor(math.log(1.0 - rng.random()) / math.log(1.0 - w)) if w < 1.0 else 0
+        item = next(islice(items, skip, None), None)
+        if item is None:
+            return reservoir
+        reservoir[rng.randrange(size)] = item
+        w *= math.exp(math.log(1.0 - rng.random()) / size)
+
+
+class RecentTerms:
+    """
+    Persistent ring of the hashes of the most recently used terms, shared by all runs and profiles.
+
+    Args:
+        path (str, optional): File to keep the hashes in. Defaults to RECENT_TERMS_FILE in the data directory.
+        capacity (int): Number of hashes to keep.
+    """
+    def __init__(self, path=None, capacity=RECENT_CAPACITY):
+        self.path = path or paths.data_file(RECENT_TERMS_FILE)
+        self.capacity = capacity
+        self._lock = threading.Lock()
+
+    def _read(self):
+        hashes = array('Q')
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+            hashes.frombytes(data[:len(data) - len(data) % hashes.itemsize])
+        except OSError:
+            pass
+        return hashes
+
+    def load(self):
+        """Returns the recent hashes as a set"""
+        with self._lock:
+            return set(self._read())
+
+    def add(self, terms):
+        """Records terms as used, dropping the oldest hashes beyond capacity"""
+        with self._lock:
+            hashes = self._read()
+            hashes.extend(term_hash(term) for term in terms)
+            hashes = hashes[-self.capacity:]
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp_path, 'wb') as f:
+                    hashes.tofile(f)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"Could not save recently used search terms: {e}")
+
+    def clear(self):
+        with self._lock:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+_recent = None
+_recent_lock = threading.Lock()
+# Held while a selection reads and then updates the recent terms
+_select_lock = threading.Lock()
+
+
+def recent_terms():
+    """Returns the process-wide RecentTerms, so concurrent profiles share one lock"""
+    global _recent
+    with _recent_lock:
+        if _recent is None:
+            _recent = RecentTerms()
+        return _recent
+
+
+def select_terms(count, terms_file=None, avoid_recent=True):
+    """
+    Picks count search terms, avoiding terms used recently by any run if possible.
+    The picked terms are recorded as recent straight away, so profiles running at the
+    same time do not pick the same ones.
+
+    Args:
+        count (int): Number of terms wanted.
+        terms_file (str, optional): Corpus file. Defaults to TERMS_FILE, else DEFAULT_SEARCH_TERMS.
+        avoid_recent (bool): Whether to consult and update the recently used terms.
+
+    Returns:
+        list: The terms, fewer than count only if the corpus is smaller than count.
+    """
+    terms_file = terms_file or TERMS_FILE
+    source = iter_terms(terms_file) if terms_file else DEFAULT_SEARCH_TERMS
+    if not avoid_recent:
+        return reservoir_sample(source, count)
+
+    recent = recent_terms()
+    with _select_lock:
+        chosen = reservoir_sample(source, count, exclude=recent.load())
+        recent.add(chosen)
+    return chosen
@@ -0,0 +1,576 @@
+"""
+Long-running automator daemon.
+
+A separate run pays for Python imports, the driver launch and the profile load every time,
+then throws them away. The daemon keeps a job queue and a SessionPool of warm per-profile
+browsers, so repeated jobs cost only the work itself. It runs jobs one at a time (a profile
+can only be open in one browser), runs daily schedules, and accepts submissions over a small
+HTTP API bound to 127.0.0.1:
+
+    GET  /status                  daemon and queue state
+    GET  /jobs                    all jobs, without output
+    POST /jobs                    submit a job spec, returns {"id": ...}
+    GET  /jobs/<id>?since=N       one job, with its output lines from line N
+    POST /jobs/<id>/cancel        cancel a queued job or stop a running one
+    GET  /schedules               daily schedules
+    POST /schedules               add or replace a schedule {"name", "at": "HH:MM", "spec"}
+    DELETE /schedules/<name>      remove a schedule
+    POST /shutdown                stop the daemon
+
+Every request needs the token from the daemon file (DAEMON_FILE in the data directory) in
+the X-Automator-Token header. The same file tells clients the port, so main.py can find a
+running daemon and hand its run over instead of starting Edge itself.
+
+A job spec is JSON:
+
+    {"task": "search", "profiles": ["Default"], "parallel": 1, "events_file": null,
+     "options": {"isPhone": false, "headless": true, "load_profile": "lean",
+                 "num_searches_input": 10, "pacing_profile": "normal", ...}}
+
+options are search()/quest() keyword arguments, with headless and load_profile in place of
+a BrowserConfig. An empty profiles list runs on Edge's default profile.
+"""
+from collections import deque
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import json
+import os
+import queue
+import secrets
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import events as run_events
+import paths
+import tasks
+from bus import Bus, BusStdout, profile_job, split_job
+
+DAEMON_FILE = 'daemon.json'
+SCHEDULES_FILE = 'schedules.json'
+
+# Port to listen on; 0 picks a free one, which clients read from DAEMON_FILE
+PORT = int(os.environ.get('EDGE_AUTOMATOR_DAEMON_PORT', '0'))
+TOKEN_HEADER = 'X-Automator-Token'
+
+# Tasks a warm browser runs before it is restarted
+SESSION_MAX_JOBS = 50
+# Output lines kept per job, and finished jobs kept for clients to read
+JOB_OUTPUT_LINES = 5000
+JOB_HISTORY = 50
+# Seconds between output pumps and between schedule checks
+PUMP_INTERVAL = 0.2
+SCHEDULE_INTERVAL = 30
+
+FINISHED = ('done', 'failed', 'cancelled')
+
+
+def job_kwargs(options):
+    """
+    Turns the JSON-safe options of a job spec into search()/quest() keyword arguments:
+    headless, load_profile and low_memory become a BrowserConfig.
+    """
+    from browser import BrowserConfig, DEFAULT_LOAD_PROFILE
+    kwargs = dict(options)
+    kwargs['browser_config'] = BrowserConfig(headless=kwargs.pop('headless', False),
+                                             load_profile=kwargs.pop('load_profile', DEFAULT_LOAD_PROFILE),
+                                             low_memory=kwargs.pop('low_memory', False))
+    return kwargs
+
+
+def validate_spec(spec):
+    """Raises ValueError if spec is not a job the daemon can run unattended"""
+    if not isinstance(spec, dict):
+        raise ValueError("job spec must be a JSON object")
+    task = spec.get('task')
+    if task not in tasks.TASKS or not tasks.get_task(task).browser_task:
+        raise ValueError(f"unknown task: {task}")
+    options = spec.get('options', {})
+    if not isinstance(options, dict):
+        raise ValueError("options must be a JSON object")
+    if task in tasks.SEARCH_TASKS and not options.get('num_searches_input') and not options.get('auto_size'):
+        raise ValueError("search jobs need num_searches_input or auto_size, the daemon cannot ask")
+    if not isinstance(spec.get('profiles', []), list):
+        raise ValueError("profiles must be a list of profile names")
+
+
+class Job:
+    """A submitted run and everything it printed"""
+    def __init__(self, job_id, spec):
+        self.id = job_id
+        self.spec = spec
+        self.status = 'queued'
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.results = []
+        self.error = None
+        self.progress = {}     # profile name -> 0-100
+        self.executor = None   # ProfileExecutor while running on named profiles
+        self.stop_event = threading.Event()
+        self.output = deque(maxlen=JOB_OUTPUT_LINES)
+        self.output_total = 0  # lines ever added, so clients can ask for lines since N
+
+    def add_output(self, line):
+        self.output.append(line)
+        self.output_total += 1
+
+    def as_dict(self, since=None):
+        """JSON view of the job; with since, includes the output lines from line since on"""
+        data = {
+            'id': self.id,
+            'task': self.spec['task'],
+            'profiles': self.spec.get('profiles', []),
+            'status': self.status,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            'progress': dict(self.progress),
+            'results': list(self.results),
+            'error': self.error,
+        }
+        if since is not None:
+            first = self.output_total - len(self.output)
+            data['output'] = list(self.output)[max(0, since - first):]
+            data['next'] = self.output_total
+        return data
+
+
+def parse_time(at):
+    """Returns a time of day such as '7:30' as 'HH:MM' ('07:30'). Raises ValueError on anything else."""
+    if not isinstance(at, str):
+        raise ValueError(f"not a time of day (HH:MM): {at!r}")
+    try:
+        return datetime.strptime(at.strip(), '%H:%M').strftime('%H:%M')
+    except ValueError:
+        raise ValueError(f"not a time of day (HH:MM): {at!r}") from None
+
+
+class Schedule:
+    """A job spec submitted once a day at a local time, e.g. '07:30'"""
+    def __init__(self, name, at, spec, last_run=None):
+        self.name = name
+        # Zero-padded, so that due() can compare it with the current time as text
+        self.at = parse_time(at)
+        self.spec = spec
+        self.last_run = last_run  # date of the last submission, 'YYYY-MM-DD'
+
+    def due(self, now):
+        """True if the schedule has not run today and its time has come (missed runs catch up)"""
+        return self.last_run != now.date().isoformat() and now.strftime('%H:%M') >= self.at
+
+    def as_dict(self):
+        return {'name': self.name, 'at': self.at, 'spec': self.spec, 'last_run': self.last_run}
+
+
+class Daemon:
+    """
+    Job queue, warm sessions and schedules behind the HTTP API.
+
+    Args:
+        port (int, optional): Port to listen on. Defaults to PORT.
+        session_max_jobs (int): Tasks a warm browser runs before it is restarted.
+    """
+    def __init__(self, port=None, session_max_jobs=SESSION_MAX_JOBS):
+        from session import SessionPool
+        self.port = PORT if port is None else port
+        self.token = secrets.token_urlsafe(16)
+        self.bus = Bus()
+        self.session_pool = SessionPool(max_jobs=session_max_jobs)
+        self.jobs = {}
+        self.queue = queue.Queue()
+        self.current = None
+        self.schedules = self._load_schedules()
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._stopping = threading.Event()
+        self.httpd = None
+
+    # Jobs
+
+    def submit(self, spec):
+        """Queues a job spec and returns the Job"""
+        validate_spec(spec)
+        with self._lock:
+            job = Job(str(self._next_id), spec)
+            self._next_id += 1
+            self.jobs[job.id] = job
+            self._forget_old_jobs()
+        self.queue.put(job)
+        print(f"Queued job {job.id}: {spec['task']} on {', '.join(spec.get('profiles') or ['default profile'])}")
+        return job
+
+    def cancel(self, job_id):
+        """Cancels a queued job or stops a running one. Returns the Job, or None if unknown."""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        job.stop_event.set()
+        if job.status == 'queued':
+            job.status = 'cancelled'
+            job.finished = time.time()
+        elif job.status == 'running' and job.executor is not None:
+            job.executor.stop()
+        return job
+
+    def _forget_old_jobs(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.status in FINISHED]
+        for job_id in finished[:max(0, len(finished) - JOB_HISTORY)]:
+            del self.jobs[job_id]
+
+    def _work(self):
+        while not self._stopping.is_set():
+            try:
+                job = self.queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            if job.status != 'queued':
+                continue
+            self.current = job
+            with self.bus.job(job.id):
+                self._run(job)
+            self.current = None
+
+    def _run(self, job):
+        from executor import ProfileExecutor, print_summary
+        from pacing import Pacer
+        from profiles import get_edge_profiles
+
+        job.status = 'running'
+        job.started = time.time()
+        spec = job.spec
+        sinks = []
+        phase_stats = run_events.get_stream().subscribe(run_events.Aggregator(job=job.id))
+        try:
+            if spec.get('events_file'):
+                sinks.append(run_events.JsonlSink(spec['events_file']))
+            kwargs = job_kwargs(spec.get('options', {}))
+            kwargs['session_pool'] = self.session_pool
+            kwargs['events'] = run_events.Emitter(sinks=sinks, job=job.id)
+            task = tasks.get_task(spec['task']).load()
+
+            names = spec.get('profiles') or []
+            if not names:
+                value = task(stop_event=job.stop_event,
+                             progress_callback=lambda value: self._set_progress(job, 'default', value),
+                             **kwargs)
+                job.results = [f"default: done (result: {value})"]
+            else:
+                edge_profiles = get_edge_profiles()
+                unknown = [name for name in names if name not in edge_profiles]
+                if unknown:
+                    raise ValueError(f"Unknown Edge profile(s): {', '.join(unknown)}")
+                pacer = Pacer(kwargs.get('pacing_profile') or 'normal')
+                job.executor = ProfileExecutor(max_workers=spec.get('parallel', 1), pacer=pacer,
+                                               job_context=lambda name: self.bus.job(profile_job(job.id, name)))
+                results = job.executor.run(
+                    task,
+                    [(name, edge_profiles[name]) for name in names],
+                    progress_callback=lambda name, value: self._set_progress(job, name, value),
+                    **kwargs
+                )
+                print_summary(results)
+                job.results = [str(result) for result in results]
+            phase_stats.print_summary("Time per phase")
+            job.status = 'cancelled' if job.stop_event.is_set() else 'done'
+        except Exception as e:
+            print(f"Job {job.id} failed: {e}")
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            run_events.get_stream().unsubscribe(phase_stats)
+            for sink in sinks:
+                sink.close()
+            job.executor = None
+            job.finished = time.time()
+            print(f"Job {job.id} {job.status} after {job.finished - job.started:.0f}s")
+
+    def _set_progress(self, job, profile_name, value):
+        job.progress[profile_name] = value
+
+    def _pump(self):
+        """Moves output from the bus to the jobs that printed it, and echoes it to the console"""
+        console = sys.__stdout__
+        while not self._stopping.wait(PUMP_INTERVAL):
+            _, lines = self.bus.drain()
+            for job_id, line in lines:
+                if job_id is None:
+                    console.write(line)
+                    continue
+                parent, profile_name = split_job(job_id)
+                text = f"[{profile_name}] {line}" if profile_name else line
+                job = self.jobs.get(parent)
+                if job is not None:
+                    job.add_output(text)
+                console.write(f"[job {parent}] {text}")
+            console.flush()
+
+    # Schedules
+
+    def _load_schedules(self):
+        try:
+            with open(paths.data_file(SCHEDULES_FILE), 'r', encoding='utf-8') as f:
+                return {entry['name']: Schedule(**entry) for entry in json.load(f)}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Could not read schedules, starting without: {e}")
+            return {}
+
+    def _save_schedules(self):
+        path = paths.data_file(SCHEDULES_FILE)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump([schedule.as_dict() for schedule in self.schedules.values()], f, indent=2)
+        os.replace(path + '.tmp', path)
+
+    def add_schedule(self, name, at, spec):
+        validate_spec(spec)
+        with self._lock:
+            self.schedules[name] = Schedule(name, at, spec)
+            self._save_schedules()
+        print(f"Scheduled {name} daily at {at}")
+        return self.schedules[name]
+
+    def remove_schedule(self, name):
+        with self._lock:
+            schedule = self.schedules.pop(name, None)
+            if schedule is not None:
+                self._save_schedules()
+        return schedule
+
+    def _schedule_loop(self):
+        while True:
+            now = datetime.now()
+            with self._lock:
+                due = [schedule for schedule in self.schedules.values() if schedule.due(now)]
+                for schedule in due:
+                    schedule.last_run = now.date().isoformat()
+                if due:
+                    self._save_schedules()
+            for schedule in due:
+                print(f"Running schedule {schedule.name}")
+                try:
+                    self.submit(schedule.spec)
+                except ValueError as e:
+                    print(f"Schedule {schedule.name} has an invalid job: {e}")
+            if self._stopping.wait(SCHEDULE_INTERVAL):
+                return
+
+    # Lifecycle
+
+    def status(self):
+        return {
+            'pid': os.getpid(),
+            'current': self.current.id if self.current else None,
+            'queued': sum(1 for job in self.jobs.values() if job.status == 'queued'),
+            'jobs': len(self.jobs),
+            'schedules': len(self.schedules),
+        }
+
+    def serve_forever(self):
+        """Runs the daemon until shutdown() or Ctrl-C"""
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', self.port), DaemonHandler)
+        self.httpd.daemon_state = self
+        self.port = self.httpd.server_address[1]
+        sys.stdout = BusStdout(self.bus)
+
+        threads = [threading.Thread(target=target, daemon=True, name=name)
+                   for target, name in ((self._work, 'daemon-jobs'), (self._pump, 'daemon-output'),
+                                        (self._schedule_loop, 'daemon-schedules'))]
+        for thread in threads:
+            thread.start()
+
+        # The token lets a caller run jobs that read and write files, so only this user may read it
+        daemon_file = paths.data_file(DAEMON_FILE)
+        fd = os.open(daemon_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        os.chmod(daemon_file, 0o600)  # the mode above only applies to a new file
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'pid': os.getpid(), 'port': self.port, 'token': self.token}, f)
+        print(f"Edge Automator daemon listening on http://127.0.0.1:{self.port} ({len(self.schedules)} schedule(s))")
+        try:
+            self.httpd.serve_forever()
+        except KeyboardInterrupt:
+            print("Stopping daemon...")
+        finally:
+            self._stopping.set()
+            if self.current is not None:
+                self.cancel(self.current.id)
+            self.httpd.server_close()
+            try:
+                os.remove(daemon_file)
+            except OSError:
+                pass
+            for thread in threads:
+                thread.join(timeout=5)
+            self.session_pool.close_all()
+            sys.stdout = sys.__stdout__
+
+    def shutdown(self):
+        # serve_forever() must be stopped from another thread than the one serving the request
+        threading.Thread(target=self.httpd.shutdown, daemon=True).start()
+
+
+class DaemonHandler(BaseHTTPRequestHandler):
+    """HTTP front of the Daemon in server.daemon_state"""
+
+    def log_message(self, format, *args):
+        pass  # the daemon's console shows jobs, not requests
+
+    def _reply(self, status, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _authorized(self):
+        if secrets.compare_digest(self.headers.get(TOKEN_HEADER, ''), self.server.daemon_state.token):
+            return True
+        self._reply(403, {'error': 'missing or wrong token'})
+        return False
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        daemon = self.server.daemon_state
+        url = urlparse(self.path)
+        parts = url.path.strip('/').split('/')
+        if parts == ['status']:
+            self._reply(200, daemon.status())
+        elif parts == ['jobs']:
+            self._reply(200, [job.as_dict() for job in list(daemon.jobs.values())])
+        elif len(parts) == 2 and parts[0] == 'jobs' and parts[1] in daemon.jobs:
+            since = int(parse_qs(url.query).get('since', ['0'])[0])
+            self._reply(200, daemon.jobs[parts[1]].as_dict(since=since))
+        elif parts == ['schedules']:
+            self._reply(200, [schedule.as_dict() for schedule in daemon.schedules.values()])
+        else:
+            self._reply(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        daemon = self.server.daemon_state
+        parts = urlparse(self.path).path.strip('/').split('/')
+        try:
+            if parts == ['jobs']:
+                self._reply(201, {'id': daemon.submit(self._body()).id})
+            elif len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'cancel':
+                job = daemon.cancel(parts[1])
+                self._reply(200 if job else 404, job.as_dict() if job else {'error': 'not found'})
+            elif parts == ['schedules']:
+                body = self._body()
+                self._reply(201, daemon.add_schedule(body['name'], body['at'], body['spec']).as_dict())
+            elif parts == ['shutdown']:
+                self._reply(200, {'stopping': True})
+                daemon.shutdown()
+            else:
+                self._reply(404, {'error': 'not found'})
+        except (ValueError, KeyError, TypeError) as e:
+            self._reply(400, {'error': str(e)})
+
+    def do_DELETE(self):
+        if not self._authorized():
+            return
+        parts = urlparse(self.path).path.strip('/').split('/')
+        if len(parts) == 2 and parts[0] == 'schedules' and self.server.daemon_state.remove_schedule(parts[1]):
+            self._reply(200, {'removed': parts[1]})
+        else:
+            self._reply(404, {'error': 'not found'})
+
+
+class DaemonClient:
+    """
+    Talks to a running daemon.
+
+    Args:
+        port (int): Port from the daemon file.
+        token (str): Token from the daemon file.
+    """
+    def __init__(self, port, token):
+        self.base_url = f"http://127.0.0.1:{port}"
+        self.token = token
+
+    def request(self, method, path, data=None, timeout=10):
+        body = json.dumps(data).encode('utf-8') if data is not None else None
+        request = urllib.request.Request(self.base_url + path, data=body, method=method,
+                                         headers={TOKEN_HEADER: self.token, 'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            raise ValueError(json.loads(e.read() or b'{}').get('error', e.reason))
+
+    def status(self, timeout=10):
+        return self.request('GET', '/status', timeout=timeout)
+
+    def submit(self, spec):
+        """Queues a job and returns its ID"""
+        return self.request('POST', '/jobs', spec)['id']
+
+    def job(self, job_id, since=0):
+        return self.request('GET', f"/jobs/{job_id}?since={since}")
+
+    def cancel(self, job_id):
+        return self.request('POST', f"/jobs/{job_id}/cancel")
+
+    def add_schedule(self, name, at, spec):
+        return self.request('POST', '/schedules', {'name': name, 'at': at, 'spec': spec})
+
+    def follow(self, job_id, interval=0.5):
+        """
+        Prints a job's output until it finishes and returns its final state. Ctrl-C cancels
+        the job, then keeps following it while it stops.
+        """
+        since = 0
+        cancelled = False
+        while True:
+            try:
+                job = self.job(job_id, since)
+                for line in job['output']:
+                    print(line, end='')
+                since = job['next']
+                if job['status'] in FINISHED:
+                    return job
+                time.sleep(interval)
+            except KeyboardInterrupt:
+                if cancelled:
+                    raise
+                print(f"\nCancelling job {job_id}...")
+                self.cancel(job_id)
+                cancelled = True
+
+    def run(self, spec):
+        """Submits a job, follows it to the end and returns its final state"""
+        job_id = self.submit(spec)
+        position = self.status()['queued']
+        print(f"Submitted job {job_id} to the daemon" + (f" ({position} queued)" if position > 1 else ""))
+        return self.follow(job_id)
+
+
+def find_daemon():
+    """Returns a DaemonClient for the daemon running on this machine, or None"""
+    try:
+        with open(paths.data_file(DAEMON_FILE), 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+        client = DaemonClient(entry['port'], entry['token'])
+        client.status(timeout=1)
+        return client
+    except (OSError, ValueError, KeyError, TypeError):
+        return None  # no daemon file, or a stale one
+
+
+def main():
+    """Entry point of --mode daemon"""
+    if find_daemon() is not None:
+        print("A daemon is already running.")
+        return
+    Daemon().serve_forever()
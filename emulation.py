@@ -0,0 +1,48 @@
+"""
+Switches a running browser between the DEVICES presets.
+
+BrowserConfig bakes the device into the launch (user agent flag, window size), so desktop
+and phone searches on one profile used to take two browsers. The DevTools Emulation domain
+does the same to a live tab instead: user agent, viewport, device scale factor and touch.
+The overrides apply to the current tab and persist across its navigations, like the URL
+blocking of BrowserConfig.apply_blocking(), so switch before the first navigation of a run.
+"""
+from browser import DEVICES, execute_cdp
+
+# Device a browser is launched as when emulation is going to switch it
+LAUNCH_DEVICE = 'desktop'
+
+
+def commands(device):
+    """
+    Returns the CDP commands that make the current tab behave as device.
+
+    Args:
+        device (str): Device preset from DEVICES.
+
+    Returns:
+        list: (command, params) pairs, to send in order.
+    """
+    preset = DEVICES[device]
+    emulation = preset['emulation']
+    if emulation is None:
+        # Back to the browser's own settings; an empty user agent removes the override
+        return [
+            ('Emulation.clearDeviceMetricsOverride', {}),
+            ('Emulation.setTouchEmulationEnabled', {'enabled': False}),
+            ('Emulation.setUserAgentOverride', {'userAgent': ''}),
+        ]
+    width, height = preset['window_size']
+    return [
+        ('Emulation.setUserAgentOverride', {'userAgent': preset['user_agent'], 'platform': emulation['platform']}),
+        ('Emulation.setDeviceMetricsOverride', {'width': width, 'height': height,
+                                                'deviceScaleFactor': emulation['device_scale_factor'],
+                                                'mobile': True}),
+        ('Emulation.setTouchEmulationEnabled', {'enabled': True, 'maxTouchPoints': emulation['max_touch_points']}),
+    ]
+
+
+def emulate(driver, device):
+    """Makes the driver's current tab behave as device, e.g. 'phone' on a browser launched as a desktop"""
+    for cmd, params in commands(device):
+        execute_cdp(driver, cmd, params)
@@ -0,0 +1,682 @@
+"""
+asyncio engine: search and quest on many profiles from one event loop.
+
+ProfileExecutor runs one OS thread per profile, and each thread spends nearly all its time
+blocked in a sleep or a WebDriver HTTP call. The engine runs the same flows as coroutines
+over aiodriver instead: page waits poll with asyncio.sleep, pacing goes through
+Pacer.pause_async, and every session talks to one shared msedgedriver over its own
+keep-alive connection. Dozens of sessions run on a single thread, so thread count and
+context switches stay flat as sessions are added.
+
+The flows reuse the rest of the tree as is: BrowserConfig for launching, the in-page
+scripts of actions, cards and waits, corpus term selection, the journal and the event
+stream. search()'s and quest()'s session pool and interactive prompts have no
+equivalent here; search runs need a number of searches or auto_size.
+"""
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+import uuid
+
+from aiodriver import DriverProcess, WebDriverError, NoSuchElementError, StaleElementError, RETURN
+from browser import resolve_config
+from executor import ProfileResult
+import actions
+import cards as card_state
+import corpus
+import emulation
+import errors as run_errors
+import events as run_events
+import journal as run_journal
+import memory as browser_memory
+import pacing
+import preflight
+import quest as rewards_quest
+import search as bing_search
+import startup
+import waits
+
+# The same page elements waits.py waits for, as CSS selectors
+SEARCH_BOX_CSS = f"#{waits.SEARCH_BOX[1]}"
+RESULTS_CSS = f"#{waits.RESULTS_CONTAINER[1]}"
+
+
+async def wait_until(condition, timeout=10, interval=waits.POLL_INTERVAL):
+    """
+    Awaits condition() every interval seconds until it returns something truthy, and
+    returns that. Missing or stale elements count as not yet. Raises TimeoutError.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        try:
+            result = await condition()
+        except (NoSuchElementError, StaleElementError):
+            result = None
+        if result:
+            return result
+        if loop.time() >= deadline:
+            raise TimeoutError(f"condition not met within {timeout}s")
+        await asyncio.sleep(interval)
+
+
+async def dwell(since, min_dwell, clock):
+    """Non-blocking waits.dwell(): waits out whatever is left of the minimum dwell time"""
+    if not min_dwell:
+        return
+    target = random.uniform(*min_dwell) if isinstance(min_dwell, (tuple, list)) else min_dwell
+    remaining = target - (clock.now() - since)
+    if isinstance(clock, pacing.VirtualClock):
+        clock.sleep(remaining)
+    elif remaining > 0:
+        await asyncio.sleep(remaining)
+
+
+async def sleep(seconds, clock):
+    """clock.sleep() that leaves the event loop running on a real clock"""
+    if isinstance(clock, pacing.VirtualClock):
+        clock.sleep(seconds)
+    elif seconds > 0:
+        await asyncio.sleep(seconds)
+
+
+async def page_url(session):
+    """Async errors.current_url()"""
+    try:
+        return await session.current_url()
+    except Exception:
+        return None
+
+
+async def mark_document(session):
+    """Async waits.mark_document()"""
+    token = uuid.uuid4().hex
+    try:
+        await session.execute(waits.MARK_DOCUMENT_SCRIPT, token)
+    except WebDriverError:
+        pass
+    return token
+
+
+async def load(session, url, timeout=30, track=False):
+    """Async waits.load()"""
+    token = await mark_document(session) if track else None
+    await session.get(url)
+    if track:
+        await wait_until(lambda: session.execute(waits.NEW_DOCUMENT_SCRIPT, token), timeout)
+
+
+async def wait_for_element(session, css, timeout=10, clickable=False):
+    """Waits for the first element matching css (and for it to be clickable) and returns it"""
+    async def found():
+        element = await session.find_element(css)
+        if element is not None and clickable and not await session.is_clickable(element):
+            return None
+        return element
+    return await wait_until(found, timeout)
+
+
+async def run_async_script(session, script, timeout, *args):
+    """Async actions.run_async_script()"""
+    previous = await session.script_timeout()
+    await session.set_script_timeout(timeout)
+    try:
+        return await session.execute_async(script, *args)
+    finally:
+        await session.set_script_timeout(previous)
+
+
+async def run_script(session, script, total_delay, *args):
+    """Async actions._run(): an in-page sequence whose delays add up to total_delay"""
+    return await run_async_script(session, script, total_delay + actions.SCRIPT_TIMEOUT_MARGIN, *args)
+
+
+async def open_session(process, config):
+    """Starts a browser for config on process, with the config's URL blocking applied"""
+    if config.profile_path:
+        print(f"Using Edge profile: {config.profile_path}")
+    session = await process.new_session(config.build_options().to_capabilities())
+    await apply_blocking(session, config)
+    return session
+
+
+async def apply_blocking(session, config):
+    """Async BrowserConfig.apply_blocking()"""
+    patterns = config.blocked_patterns()
+    if not patterns:
+        return
+    try:
+        await session.execute_cdp('Network.enable')
+        await session.execute_cdp('Network.setBlockedURLs', {'urls': patterns})
+    except WebDriverError as e:
+        print(f"Could not block resources, loading pages in full: {e}")
+
+
+async def apply_blocking_to_tabs(session, config, handles, return_to):
+    """Async BrowserConfig.apply_blocking_to_tabs()"""
+    if not config.blocked_patterns():
+        return
+    for handle in handles:
+        await session.switch_to_window(handle)
+        await apply_blocking(session, config)
+    await session.switch_to_window(return_to)
+
+
+async def emulate_device(session, device):
+    """Async emulation.emulate()"""
+    for cmd, params in emulation.commands(device):
+        await session.execute_cdp(cmd, params)
+
+
+async def read_search_progress(session, userinfo_url=None, track=False):
+    """Async preflight.read_search_progress()"""
+    try:
+        userinfo_url = userinfo_url or preflight.USERINFO_URL
+        await load(session, userinfo_url, timeout=15, track=track)
+        outcome = await run_async_script(session, preflight.FETCH_COUNTERS_SCRIPT, preflight.FETCH_TIMEOUT, userinfo_url)
+        progress = preflight.parse_counters(preflight.fetched_data(outcome))
+    except Exception as e:
+        print(f"Could not read search progress from the Rewards dashboard: {e}")
+        return None
+    for counter in progress.values():
+        print(f"Rewards dashboard: {counter}")
+    return progress
+
+
+async def search_session(process, isPhone=None, num_searches_input=None, progress_callback=None, stop_event=None,
+                         profile_path=None, min_dwell=None, bing_url=None, batch_actions=False, navigation='home',
+                         pacing_profile=None, browser_config=None, terms_file=None, avoid_recent=True, resume=False,
+                         journal=None, auto_size=False, userinfo_url=None, events=None, recycle_after=None,
+                         max_rss_mb=None, emulate=False, error_policy=None, session=None):
+    """
+    search() as a coroutine on an engine session. Takes search()'s arguments, except that
+    num_searches_input or auto_size is required. Returns the number of searches that completed.
+
+    A session passed in is used instead of opening one, and left open; it is not recycled.
+    """
+    if navigation not in bing_search.NAVIGATION_MODES:
+        raise ValueError(f"Unknown navigation mode: {navigation}")
+    if num_searches_input is None and not auto_size:
+        raise ValueError("The engine needs a number of searches or auto_size")
+    bing_url = bing_url or bing_search.BING_URL
+    pacer = pacing.get_pacer(pacing_profile)
+    if min_dwell is None:
+        min_dwell = pacer.delay_range('page_dwell')
+    config = resolve_config(browser_config, isPhone, profile_path)
+    launch_config = config.replace(device=emulation.LAUNCH_DEVICE) if emulate else config
+    track_loads = config.page_load_strategy == 'none'
+    num_searches = max(1, num_searches_input) if num_searches_input is not None else None
+    owned = session is None
+
+    journal = run_journal.get_journal(journal)
+    journal_profile = run_journal.profile_key(config.profile_path)
+    journal_task = run_journal.search_task(config.device)
+    if resume and not auto_size:
+        done_today = await asyncio.to_thread(journal.count, journal_profile, journal_task)
+        if done_today >= num_searches:
+            print(f"All {num_searches} searches were already done today on this profile")
+            return 0
+        if done_today:
+            print(f"Resuming: {done_today} of {num_searches} searches already done today")
+            num_searches -= done_today
+
+    run_stats = run_events.Aggregator()
+    events = run_events.get_emitter(events, sinks=[run_stats], task='search', engine='async',
+                                    profile=run_events.profile_label(config.profile_path), device=config.device)
+
+    memory_stats = browser_memory.MemoryStats()
+    recycle_after, max_rss_mb = browser_memory.recycle_limits(config, recycle_after, max_rss_mb)
+    searches_on_session = 0
+    error_policy = error_policy or run_errors.ErrorPolicy()
+
+    searches_done = 0
+    try:
+        if owned:
+            with events.span('driver_launch', pooled=False):
+                session = await open_session(process, launch_config)
+        memory_stats.track(session.capabilities)
+        if emulate:
+            with events.span('emulation', to=config.device):
+                await emulate_device(session, config.device)
+
+        if auto_size:
+            with events.span('preflight'):
+                dashboard = await read_search_progress(session, userinfo_url, track=track_loads)
+            counter = dashboard.get(config.device) if dashboard else None
+            if counter is None:
+                if num_searches is None:
+                    raise ValueError("Search progress unknown and no number of searches given")
+                print("Search progress unknown, running the requested number of searches")
+            elif counter.remaining_searches == 0:
+                print(f"No {config.device} searches left today on this profile")
+                return 0
+            else:
+                num_searches = min(num_searches or counter.remaining_searches, counter.remaining_searches)
+
+        # Term selection and the journal hit files; keep them off the event loop
+        selected_terms = await asyncio.to_thread(corpus.select_terms, num_searches, terms_file, avoid_recent)
+        if not selected_terms:
+            raise ValueError(f"No search terms found in {terms_file or corpus.TERMS_FILE}")
+        num_searches = len(selected_terms)
+        print(f"Performing {num_searches} searches")
+
+        page_loaded_at = pacer.clock.now()
+        if navigation == 'home':
+            with events.span('navigation', page='home'):
+                await load(session, bing_url, track=track_loads)
+
+        scroll_step = 300 if config.is_phone else 500
+        for i, term in enumerate(selected_terms):
+            if stop_event and stop_event.is_set():
+                print("Search stopped by user")
+                break
+            if progress_callback:
+                progress_callback(int((i / num_searches) * 100))
+            print(f"Search {i+1}/{num_searches}: {term}")
+
+            search_started = time.monotonic()
+            outcome = 'error'
+            submit_token = None
+            try:
+                if navigation == 'direct':
+                    page_loaded_at = pacer.clock.now()
+                    with events.span('navigation', page='results'):
+                        await load(session, bing_search.results_url(bing_url, term), track=track_loads)
+                else:
+                    with events.span('search_box_wait'):
+                        search_box = await wait_for_element(session, SEARCH_BOX_CSS, clickable=True)
+                        await dwell(page_loaded_at, min_dwell, pacer.clock)
+                    submit_token = await mark_document(session) if track_loads else None
+
+                    with events.span('typing', chars=len(term)):
+                        if batch_actions:
+                            delays = pacer.in_page_samples('keystroke', len(term))
+                            await run_script(session, actions.TYPE_AND_SUBMIT_SCRIPT, sum(delays), search_box, term, delays)
+                        else:
+                            await session.clear(search_box)
+                            for char in term:
+                                await session.send_keys(search_box, char)
+                                await pacer.pause_async('keystroke')
+                            await session.send_keys(search_box, RETURN)
+                    page_loaded_at = pacer.clock.now()
+
+                with events.span('results_wait'):
+                    if submit_token is not None:
+                        # The results must be on the page the submit loaded, not the home page
+                        await wait_until(lambda: session.execute(waits.NEW_DOCUMENT_SCRIPT, submit_token))
+                    await wait_for_element(session, RESULTS_CSS)
+                    await dwell(page_loaded_at, min_dwell, pacer.clock)
+
+                with events.span('scrolling'):
+                    if batch_actions:
+                        delays = pacer.in_page_samples('scroll', pacing.SCROLLS_PER_SEARCH)
+                        await run_script(session, actions.SCROLL_SCRIPT, sum(delays), scroll_step, delays)
+                    else:
+                        for _ in range(pacing.SCROLLS_PER_SEARCH):
+                            await session.execute(f"window.scrollBy(0, {scroll_step});")
+                            await pacer.pause_async('scroll')
+
+                with events.span('pause'):
+                    await pacer.pause_async('before_next_search')
+                searches_done += 1
+                outcome = 'ok'
+                error_policy.success()
+                await asyncio.to_thread(journal.record, journal_profile, journal_task, term)
+
+                searches_on_session += 1
+                rss = await asyncio.to_thread(memory_stats.sample)
+                reason = browser_memory.recycle_reason(searches_on_session, rss, recycle_after, max_rss_mb)
+                if reason and owned and i + 1 < len(selected_terms):
+                    print(f"Restarting Edge: {reason}")
+                    with events.span('recycle', rss_mb=round(rss / browser_memory.MIB) if rss else None):
+                        await session.quit()
+                        session = None
+                        session = await open_session(process, launch_config)
+                        if emulate:
+                            await emulate_device(session, config.device)
+                    memory_stats.track(session.capabilities)
+                    searches_on_session = 0
+
+                if navigation == 'home':
+                    page_loaded_at = pacer.clock.now()
+                    with events.span('navigation', page='home'):
+                        await load(session, bing_url, track=track_loads)
+
+            except Exception as e:
+                outcome, backoff = error_policy.failure(e, await page_url(session))
+                print(f"Search failed ({outcome} error, retrying in {backoff}s): {run_errors.first_line(e)}")
+                with events.span('backoff', kind=outcome):
+                    await sleep(backoff, pacer.clock)
+                if navigation == 'home':
+                    page_loaded_at = pacer.clock.now()
+                    try:
+                        with events.span('recovery'):
+                            await load(session, bing_url, track=track_loads)
+                    except Exception as recovery_error:
+                        error_policy.check_fatal(recovery_error, await page_url(session))
+            finally:
+                events.emit('search', time.monotonic() - search_started, outcome=outcome, index=i + 1, term=term)
+
+        print(f"{searches_done} searches completed")
+    except run_errors.ProfileAborted as e:
+        print(f"Search aborted, {e}")
+        raise
+    except Exception as e:
+        print(f"An error occurred: {e}")
+    finally:
+        if session and owned:
+            await session.quit()
+        run_events.report_run(events, run_stats, memory_stats, error_policy)
+
+    return searches_done
+
+
+async def quest_session(process, isPhone=None, progress_callback=None, stop_event=None, profile_path=None,
+                        rewards_url=None, pacing_profile=None, parallel_tabs=1, browser_config=None, resume=False,
+                        journal=None, events=None, error_policy=None):
+    """quest() as a coroutine on an engine session. Returns the number of cards clicked."""
+    rewards_url = rewards_url or rewards_quest.REWARDS_URL
+    pacer = pacing.get_pacer(pacing_profile)
+    parallel_tabs = max(1, parallel_tabs)
+    config = resolve_config(browser_config, isPhone, profile_path)
+    track_loads = config.page_load_strategy == 'none'
+
+    journal = run_journal.get_journal(journal)
+    journal_profile = run_journal.profile_key(config.profile_path)
+    clicked_today = set()
+    if resume:
+        clicked_today = set(await asyncio.to_thread(journal.units, journal_profile, run_journal.QUEST))
+    if clicked_today:
+        print(f"Resuming: {len(clicked_today)} card(s) already clicked today")
+
+    run_stats = run_events.Aggregator()
+    events = run_events.get_emitter(events, sinks=[run_stats], task='quest', engine='async',
+                                    profile=run_events.profile_label(config.profile_path), device=config.device)
+
+    memory_stats = browser_memory.MemoryStats()
+    error_policy = error_policy or run_errors.ErrorPolicy()
+
+    cards_clicked = 0
+    session = None
+    main_window = None
+    page_token = None
+
+    async def handle_failure(error):
+        """Gives up on the profile (raising ProfileAborted) or backs off before the next cards"""
+        kind, backoff = error_policy.failure(error, await page_url(session))
+        with events.span('backoff', kind=kind):
+            await sleep(backoff, pacer.clock)
+        return kind
+
+    async def navigate_to_rewards():
+        nonlocal page_token
+        with events.span('navigation', page='rewards'):
+            await load(session, rewards_url, timeout=20, track=track_loads)
+            await wait_for_element(session, "body", timeout=20)
+        page_token = uuid.uuid4().hex
+        await session.execute(card_state.MARK_PAGE_SCRIPT, page_token)
+        with events.span('pause', delay='rewards_settle'):
+            await pacer.pause_async('rewards_settle')
+
+    async def recover():
+        """Gets back to the dashboard, reloading it only if it actually went away"""
+        try:
+            if await session.current_window_handle() != main_window:
+                await session.switch_to_window(main_window)
+            changed = await session.execute(card_state.READ_MARK_SCRIPT) != page_token
+        except WebDriverError:
+            changed = True
+        if changed:
+            with events.span('recovery'):
+                await navigate_to_rewards()
+
+    async def close_activity_tabs():
+        for handle in await session.window_handles():
+            if handle != main_window:
+                await session.switch_to_window(handle)
+                await session.close_window()
+        await session.switch_to_window(main_window)
+
+    async def click_card(container, key):
+        """Clicks the card with key and returns True if an activity tab opened"""
+        card = await session.execute(card_state.FIND_CARD_SCRIPT, container, key)
+        if card is None:
+            return None
+        tabs_before = await session.window_handles()
+        await wait_until(lambda: session.is_clickable(card))
+        await session.click(card)
+        try:
+            await wait_until(lambda: _more_tabs(session, len(tabs_before)))
+        except TimeoutError:
+            return False
+        new_tabs = [handle for handle in await session.window_handles() if handle not in tabs_before]
+        await apply_blocking_to_tabs(session, config, new_tabs, main_window)
+        return True
+
+    async def open_activity_tabs(container, description, keys):
+        """Async quest()'s open_activity_tabs(): returns (keys clicked, error or None)"""
+        clicked = []
+        try:
+            for key in keys:
+                opened = await click_card(container, key)
+                if opened is None:
+                    print(f"mee-card {key} is no longer in {description}, skipping")
+                    continue
+                clicked.append(key)
+                print(f"Clicked mee-card {key} in {description}")
+                if not opened:
+                    await recover()
+                await pacer.pause_async('tab_open' if parallel_tabs > 1 else 'card_click')
+        except Exception as e:
+            return clicked, e
+        return clicked, None
+
+    async def click_cards_in_container(container, description, progress_start, progress_end):
+        nonlocal cards_clicked
+        with events.span('card_scan', group=description):
+            states = json.loads(await session.execute(card_state.CARD_SCAN_SCRIPT, container,
+                                                      card_state.COMPLETED_ICON_SELECTOR))
+        pending = rewards_quest.pending_cards(states, container, description, clicked_today)
+        expected = pacer.expected_duration(pacing.quest_plan(len(pending), parallel_tabs))
+        print(f"Expected pacing time ({pacer.profile} profile): {pacing.format_duration(expected)}")
+        increment = (progress_end - progress_start) / max(1, len(pending))
+
+        for start in range(0, len(pending), parallel_tabs):
+            if stop_event and stop_event.is_set():
+                print(f"Quest stopped by user during {description}")
+                return False
+            batch = pending[start:start + parallel_tabs]
+            card_started = time.monotonic()
+            try:
+                with events.span('tab_open' if parallel_tabs > 1 else 'card_click', cards=len(batch)):
+                    clicked, error = await open_activity_tabs(container, description, batch)
+                    # A clicked card is done, whatever happens to the rest of the batch
+                    cards_clicked += len(clicked)
+                    for key in clicked:
+                        await asyncio.to_thread(journal.record, journal_profile, run_journal.QUEST,
+                                                rewards_quest.journal_unit(container, key))
+                    if error is not None:
+                        raise error
+                with events.span('activity_dwell', cards=len(clicked)):
+                    await pacer.pause_async('activity_dwell')
+                await asyncio.to_thread(memory_stats.sample)  # every tab of the batch is open now
+                with events.span('tab_close'):
+                    await close_activity_tabs()
+                with events.span('pause', delay='after_card'):
+                    await pacer.pause_async('after_card')
+                error_policy.success()
+                events.emit('card', time.monotonic() - card_started, outcome='ok', group=description, cards=len(clicked))
+            except Exception as e:
+                print(f"Error clicking mee-cards in {description}: {e}")
+                events.emit('card', time.monotonic() - card_started, outcome=run_errors.classify(e), group=description)
+                await handle_failure(e)
+                try:
+                    await close_activity_tabs()
+                except WebDriverError:
+                    pass
+                await recover()
+            if progress_callback:
+                progress_callback(min(progress_end, int(progress_start + (start + len(batch)) * increment)))
+        return True
+
+    try:
+        with events.span('driver_launch', pooled=False):
+            session = await open_session(process, config)
+        memory_stats.track(session.capabilities)
+        await navigate_to_rewards()
+        main_window = await session.current_window_handle()
+        if progress_callback:
+            progress_callback(10)
+
+        groups = ((card_state.MAIN_GROUP_SELECTOR, "main card group", 20, 60),
+                  (card_state.MORE_ACTIVITIES_GROUP_SELECTOR, "#more-activities nested card group", 60, 95))
+        for container, description, progress_start, progress_end in groups:
+            if stop_event and stop_event.is_set():
+                print("Quest stopped by user")
+                break
+            try:
+                await wait_for_element(session, container, timeout=15)
+            except TimeoutError as e:
+                print(f"Failed to find {description}")
+                await handle_failure(e)
+                continue
+            if not await click_cards_in_container(container, description, progress_start, progress_end):
+                break
+        print(f"{cards_clicked} card(s) clicked")
+    except run_errors.ProfileAborted as e:
+        print(f"Quest aborted, {e}")
+        raise
+    except Exception as e:
+        print(f"Critical error: {e}")
+    finally:
+        if session:
+            await session.quit()
+        run_events.report_run(events, run_stats, memory_stats, error_policy)
+
+    return cards_clicked
+
+
+async def _more_tabs(session, count):
+    return len(await session.window_handles()) > count
+
+
+async def search_all_session(process, devices=('desktop', 'phone'), progress_callback=None, stop_event=None,
+                             profile_path=None, browser_config=None, **search_kwargs):
+    """search_all() as a coroutine: one session, search_session() once per device on it"""
+    devices = list(devices)
+    config = resolve_config(browser_config, profile_path=profile_path).replace(device=emulation.LAUNCH_DEVICE)
+    session = await open_session(process, config)
+    n = 0
+
+    def device_progress(value):
+        # Each device gets an equal share of the run's progress; n is the current device
+        progress_callback(int((n * 100 + value) / len(devices)))
+
+    searches_done = 0
+    try:
+        for n, device in enumerate(devices):
+            if stop_event and stop_event.is_set():
+                break
+            print(f"\n{device.capitalize()} searches ({n + 1}/{len(devices)})")
+            searches_done += await search_session(
+                process, isPhone=device == 'phone', progress_callback=device_progress if progress_callback else None,
+                stop_event=stop_event, profile_path=profile_path, browser_config=browser_config, emulate=True, session=session,
+                **search_kwargs)
+    finally:
+        await session.quit()
+
+    return searches_done
+
+
+FLOWS = {
+    'search': search_session,
+    'search-all': search_all_session,
+    'quest': quest_session,
+}
+
+
+class Engine:
+    """
+    Runs search or quest on many profiles as coroutines on one event loop.
+    A drop-in for ProfileExecutor in the CLI: same run() arguments and results.
+
+    Args:
+        max_sessions (int): How many browser sessions may be open at the same time.
+        pacer (Pacer, optional): Pacer used for the 'profile_gap' delay between profile starts.
+    """
+    def __init__(self, max_sessions=10, pacer=None):
+        self.max_sessions = max(1, max_sessions)
+        self.pacer = pacing.get_pacer(pacer)
+        self.stop_event = threading.Event()
+
+    def run(self, task, profiles, progress_callback=None, **task_kwargs):
+        """
+        Runs task once per profile and returns a ProfileResult per profile, in input order.
+
+        Args:
+            task (str): A key of FLOWS, e.g. 'search' or 'quest'.
+            profiles (list): (profile_name, profile_path) pairs; a None path is the default profile.
+            progress_callback (callable, optional): Called with (profile_name, progress 0-100).
+            **task_kwargs: Extra keyword arguments passed to every flow, as for search()/quest().
+        """
+        self.stop_event.clear()
+        return asyncio.run(self._run(FLOWS[task], profiles, progress_callback, task_kwargs))
+
+    def stop(self):
+        """Stops every profile; safe to call from any thread"""
+        self.stop_event.set()
+
+    async def _run(self, flow, profiles, progress_callback, task_kwargs):
+        results = [ProfileResult(name) for name, _ in profiles]
+        process = DriverProcess(startup.resolve_driver().path)
+        await process.start()
+        slots = asyncio.Semaphore(self.max_sessions)
+        # Profiles of one Edge user data directory take turns, as in ProfileExecutor
+        user_data_locks = {os.path.dirname(path): asyncio.Lock() for _, path in profiles if path}
+        try:
+            await asyncio.gather(*(
+                self._run_one(index, flow, name, path, result, slots, process, progress_callback, task_kwargs,
+                              user_data_locks.get(os.path.dirname(path)) if path else None)
+                for index, ((name, path), result) in enumerate(zip(profiles, results))
+            ))
+        finally:
+            await process.stop()
+        return results
+
+    async def _run_one(self, index, flow, name, path, result, slots, process, progress_callback, task_kwargs,
+                       user_data_lock=None):
+        def report(value):
+            if progress_callback:
+                progress_callback(name, value)
+
+        if user_data_lock is not None:
+            if user_data_lock.locked():
+                print(f"Profile {name} waits for another profile of its Edge user data directory to finish")
+            async with user_data_lock:
+                await self._run_slot(index, flow, name, path, result, slots, process, report, task_kwargs)
+        else:
+            await self._run_slot(index, flow, name, path, result, slots, process, report, task_kwargs)
+
+    async def _run_slot(self, index, flow, name, path, result, slots, process, report, task_kwargs):
+        async with slots:
+            # Stagger starts the same way ProfileExecutor does
+            if index >= self.max_sessions:
+                await self.pacer.pause_async('profile_gap')
+            if self.stop_event.is_set():
+                result.skipped = True
+                return
+
+            print(f"\nRunning {flow.__name__} on profile: {name} ({index + 1})")
+            result.started = time.monotonic()
+            try:
+                result.value = await flow(process, progress_callback=report, stop_event=self.stop_event,
+                                          profile_path=path, **task_kwargs)
+            except Exception as e:
+                result.error = e
+                print(f"Error running {flow.__name__} on profile {name}: {e}")
+            finally:
+                result.finished = time.monotonic()
+                report(100)
@@ -0,0 +1,225 @@
+"""
+What to do when a step of search() or quest() fails.
+
+Failures are sorted into three classes:
+    transient - the page or the network was slow or flaky (timeouts, a click landing on an
+                overlay, a reset connection). Worth another go after a pause.
+    structure - the page is not what the automation expects (missing or stale elements,
+                failing scripts). Usually a one-off, but repeated ones mean every further
+                step will fail the same way.
+    fatal     - nothing more can be done on this profile: the browser or its session is
+                gone, or the profile is signed out and landed on a sign-in page.
+
+An ErrorPolicy gives every class a retry budget for the run and an exponential backoff,
+and trips a circuit breaker after a few failures in a row of any class. A fatal failure,
+an exhausted budget or a tripped breaker raises ProfileAborted, which search() and quest()
+let through so the executor records the profile as failed and moves on to the next one.
+Classification goes by exception class name and message, so selenium's and aiodriver's
+exceptions are handled alike without importing either.
+"""
+TRANSIENT = 'transient'
+STRUCTURE = 'structure'
+FATAL = 'fatal'
+
+# Exception classes, by name, and what they mean
+ERROR_CLASSES = {
+    'InvalidSessionIdException': FATAL,
+    'SessionNotCreatedException': FATAL,
+    'NoSuchDriverException': FATAL,
+    'MaxRetryError': FATAL,              # urllib3: the driver process is gone
+    'ConnectionRefusedError': FATAL,
+    'RemoteDisconnected': FATAL,
+    'TimeoutException': TRANSIENT,
+    'TimeoutError': TRANSIENT,
+    'WebDriverTimeoutError': TRANSIENT,
+    'ElementClickInterceptedException': TRANSIENT,
+    'MoveTargetOutOfBoundsException': TRANSIENT,
+    'NoSuchElementException': STRUCTURE,
+    'NoSuchElementError': STRUCTURE,
+    'StaleElementReferenceException': STRUCTURE,
+    'StaleElementError': STRUCTURE,
+    'ElementNotInteractableException': STRUCTURE,
+    'InvalidSelectorException': STRUCTURE,
+    'JavascriptException': STRUCTURE,
+}
+
+# Driver messages that mean the browser or its session is gone
+FATAL_MESSAGES = (
+    'invalid session id',
+    'session deleted',
+    'not reachable',
+    'disconnected:',
+    'target window already closed',
+)
+
+# Network errors in driver messages; anything else unknown counts as a page-structure failure
+TRANSIENT_MESSAGES = (
+    'net::ERR_',
+    'timeout',
+)
+
+# Where a signed-out profile ends up
+SIGN_IN_URLS = (
+    'login.live.com',
+    'login.microsoftonline.com',
+    'rewards.bing.com/welcome',
+)
+
+# Failures allowed per class and run, and the backoff before a retry: (first, max) seconds,
+# doubled for every failure in a row
+RETRY_BUDGETS = {TRANSIENT: 5, STRUCTURE: 3, FATAL: 0}
+BACKOFF = {TRANSIENT: (2, 20), STRUCTURE: (1, 5), FATAL: (0, 0)}
+
+# Failures in a row, of any class, after which the profile is given up
+BREAKER_THRESHOLD = 3
+
+
+class ProfileAborted(Exception):
+    """Raised when a run gives up on its profile. .kind is the class of the last failure."""
+    def __init__(self, reason, kind=None):
+        super().__init__(reason)
+        self.kind = kind
+
+
+def current_url(driver):
+    """Returns the URL the driver is on, or None if it cannot tell"""
+    try:
+        return driver.current_url
+    except Exception:
+        return None
+
+
+def first_line(error):
+    """Returns the first line of an error message; selenium's go on with a stack trace"""
+    lines = str(error).strip().splitlines()
+    return lines[0] if lines else type(error).__name__
+
+
+def classify(error, url=None):
+    """
+    Returns the class of a failure: TRANSIENT, STRUCTURE or FATAL.
+
+    Args:
+        error (Exception): What was raised.
+        url (str, optional): Page the browser was on, to recognise sign-in redirects.
+    """
+    if url and any(pattern in url for pattern in SIGN_IN_URLS):
+        return FATAL
+    message = str(error)
+    if any(text in message for text in FATAL_MESSAGES):
+        return FATAL
+    for cls in type(error).__mro__:
+        if cls.__name__ in ERROR_CLASSES:
+            return ERROR_CLASSES[cls.__name__]
+    if any(text in message for text in TRANSIENT_MESSAGES):
+        return TRANSIENT
+    return STRUCTURE
+
+
+def fatal_reason(error, url=None):
+    """Returns why a fatal failure ends the run, e.g. 'signed out'"""
+    if url and any(pattern in url for pattern in SIGN_IN_URLS):
+        return "signed out"
+    return f"fatal error: {first_line(error)}"
+
+
+class CircuitBreaker:
+    """
+    Counts failures in a row and opens once there are threshold of them; a success closes
+    it again.
+
+    Args:
+        threshold (int): Failures in a row that open the breaker.
+    """
+    def __init__(self, threshold=BREAKER_THRESHOLD):
+        self.threshold = threshold
+        self.failures = 0
+
+    @property
+    def open(self):
+        return self.failures >= self.threshold
+
+    def record_failure(self):
+        self.failures += 1
+
+    def record_success(self):
+        self.failures = 0
+
+
+class ErrorPolicy:
+    """
+    Retry budgets, backoff and circuit breaker of one run on one profile.
+
+    Args:
+        budgets (dict, optional): Failures allowed per class, replacing those in RETRY_BUDGETS.
+        breaker_threshold (int): See CircuitBreaker.
+    """
+    def __init__(self, budgets=None, breaker_threshold=BREAKER_THRESHOLD):
+        self.budgets = dict(RETRY_BUDGETS, **(budgets or {}))
+        self.breaker = CircuitBreaker(breaker_threshold)
+        self.counts = {TRANSIENT: 0, STRUCTURE: 0, FATAL: 0}
+        self.aborted = None
+
+    def failure(self, error, url=None):
+        """
+        Records a failed step. Raises ProfileAborted if the profile should be given up;
+        otherwise returns (class, seconds to back off before retrying).
+
+        Args:
+            error (Exception): What was raised. A ProfileAborted is raised again as is.
+            url (str, optional): Page the browser was on, see classify().
+        """
+        if isinstance(error, ProfileAborted):
+            raise error
+        kind = classify(error, url)
+        self.counts[kind] += 1
+        self.breaker.record_failure()
+
+        if kind == FATAL:
+            reason = fatal_reason(error, url)
+        elif self.counts[kind] > self.budgets[kind]:
+            reason = f"more than {self.budgets[kind]} {kind} failures"
+        elif self.breaker.open:
+            reason = f"{self.breaker.failures} failures in a row"
+        else:
+            first, longest = BACKOFF[kind]
+            return kind, min(longest, first * 2 ** (self.breaker.failures - 1))
+
+        self._abort(reason, kind, error)
+
+    def check_fatal(self, error, url=None):
+        """
+        Raises ProfileAborted if error is fatal; otherwise does nothing. For an error in the
+        recovery from a failure already recorded, so that one step never counts twice.
+
+        Args:
+            error (Exception): What was raised. A ProfileAborted is raised again as is.
+            url (str, optional): Page the browser was on, see classify().
+        """
+        if isinstance(error, ProfileAborted):
+            raise error
+        if classify(error, url) == FATAL:
+            self.counts[FATAL] += 1
+            self._abort(fatal_reason(error, url), FATAL, error)
+
+    def _abort(self, reason, kind, error):
+        self.aborted = reason
+        raise ProfileAborted(f"gave up on profile: {reason}", kind) from error
+
+    def success(self):
+        """Records a step that went through, closing the circuit breaker"""
+        self.breaker.record_success()
+
+    def summary(self):
+        """Returns {class: failures} for classes that failed, plus 'aborted' if the run gave up"""
+        summary = {kind: count for kind, count in self.counts.items() if count}
+        if self.aborted:
+            summary['aborted'] = self.aborted
+        return summary
+
+    def print_summary(self):
+        summary = self.summary()
+        if not summary:
+            return
+        counts = ', '.join(f"{count} {kind}" for kind, count in summary.items() if kind != 'aborted')
+        print(f"Failures: {counts}" + (f" (gave up: {summary['aborted']})" if self.aborted else ""))
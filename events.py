@@ -0,0 +1,211 @@
+"""
+Structured, timestamped events from search() and quest().
+
+Runs emit an event for every phase they go through (driver launch, navigation, typing,
+scrolling, card clicks, activity dwell, recovery reloads, ...), most of them as spans with
+a duration. Events go to a process-wide EventStream that any number of sinks subscribe to:
+JsonlSink writes them to a file, Aggregator keeps per-phase durations and prints p50/p95.
+The CLI and the GUI subscribe to the same stream.
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+import json
+import math
+import os
+import threading
+import time
+
+
+def deliver(sink, event):
+    """Passes event to sink. A failing sink is reported, never raised into the run."""
+    try:
+        sink(event)
+    except Exception as e:
+        print(f"Event sink {sink!r} failed: {e}")
+
+
+class EventStream:
+    """Fans events out to subscribed sinks. A sink is any callable taking the event dict."""
+    def __init__(self):
+        self._sinks = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, sink):
+        with self._lock:
+            self._sinks.append(sink)
+        return sink
+
+    def unsubscribe(self, sink):
+        with self._lock:
+            if sink in self._sinks:
+                self._sinks.remove(sink)
+
+    def publish(self, event):
+        with self._lock:
+            sinks = list(self._sinks)
+        for sink in sinks:
+            deliver(sink, event)
+
+
+class Emitter:
+    """
+    Emits events carrying a fixed context, e.g. the task and profile of a run.
+
+    Args:
+        stream (EventStream, optional): Stream to publish to. Defaults to the process-wide one.
+        sinks (iterable, optional): Extra sinks that only receive this emitter's events.
+        **context: Fields added to every event.
+    """
+    def __init__(self, stream=None, sinks=(), **context):
+        self.stream = stream or get_stream()
+        self.sinks = tuple(sinks)
+        self.context = context
+
+    def bind(self, **context):
+        """Returns an emitter with more context fields, publishing to the same places"""
+        return Emitter(self.stream, self.sinks, **{**self.context, **context})
+
+    def emit(self, name, duration=None, **fields):
+        """
+        Publishes an event and returns it.
+
+        Args:
+            name (str): Phase or event name, e.g. 'navigation'.
+            duration (float, optional): Seconds the phase took.
+            **fields: Extra fields, e.g. the search term.
+        """
+        event = {'ts': round(time.time(), 3), 'name': name}
+        if duration is not None:
+            event['duration'] = round(duration, 4)
+        event.update(self.context)
+        event.update(fields)
+        self.stream.publish(event)
+        for sink in self.sinks:
+            deliver(sink, event)
+        return event
+
+    @contextmanager
+    def span(self, name, **fields):
+        """Times the enclosed block and emits it as one event, with outcome 'ok' or 'error'"""
+        started = time.monotonic()
+        outcome = 'ok'
+        try:
+            yield fields
+        except BaseException:
+            outcome = 'error'
+            raise
+        finally:
+            self.emit(name, time.monotonic() - started, outcome=outcome, **fields)
+
+
+class JsonlSink:
+    """Appends every event as one JSON line to a file"""
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8', buffering=1)
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        line = json.dumps(event, default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __repr__(self):
+        return f"JsonlSink({self.path!r})"
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+class Aggregator:
+    """
+    Collects the durations of span events per phase.
+
+    Args:
+        **match: Only count events with these field values, e.g. task='search'.
+    """
+    def __init__(self, **match):
+        self.match = match
+        self.durations = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        if 'duration' in event and all(event.get(key) == value for key, value in self.match.items()):
+            with self._lock:
+                self.durations[event['name']].append(event['duration'])
+
+    def summary(self):
+        """Returns {phase: {count, total, p50, p95}} in seconds, slowest total first"""
+        with self._lock:
+            durations = {name: list(values) for name, values in self.durations.items()}
+        rows = {
+            name: {
+                'count': len(values),
+                'total': sum(values),
+                'p50': percentile(values, 0.5),
+                'p95': percentile(values, 0.95),
+            }
+            for name, values in durations.items()
+        }
+        return dict(sorted(rows.items(), key=lambda item: item[1]['total'], reverse=True))
+
+    def print_summary(self, title="Time per phase"):
+        rows = self.summary()
+        if not rows:
+            return
+        print(f"\n{title}:")
+        print(f"  {'phase':<18}{'count':>6}{'total':>10}{'p50':>9}{'p95':>9}")
+        for name, row in rows.items():
+            print(f"  {name:<18}{row['count']:>6}{row['total']:>9.1f}s{row['p50']:>8.2f}s{row['p95']:>8.2f}s")
+
+
+_stream = EventStream()
+
+
+def get_stream():
+    """Returns the process-wide EventStream"""
+    return _stream
+
+
+def get_emitter(events=None, sinks=(), **context):
+    """
+    Returns an emitter for a run: the Emitter passed in (or a new one on the process-wide
+    stream) with context fields and extra sinks added.
+    """
+    if events is None:
+        return Emitter(sinks=sinks, **context)
+    return Emitter(events.stream, events.sinks + tuple(sinks), **{**events.context, **context})
+
+
+def report_run(events, run_stats, memory_stats=None, error_policy=None):
+    """
+    Prints the summaries a search or quest run ends with, and emits the browser memory and
+    failure totals as 'browser_memory' and 'failures' events.
+
+    Args:
+        events (Emitter): The run's emitter.
+        run_stats (Aggregator): The run's per-phase durations.
+        memory_stats (MemoryStats, optional): The browser's memory during the run.
+        error_policy (ErrorPolicy, optional): The run's failures.
+    """
+    run_stats.print_summary()
+    for name, stats in (('browser_memory', memory_stats), ('failures', error_policy)):
+        if stats is None:
+            continue
+        stats.print_summary()
+        summary = stats.summary()
+        if summary:
+            events.emit(name, **summary)
+
+
+def profile_label(profile_path):
+    """Short profile name for events, e.g. 'Profile 1'"""
+    return os.path.basename(profile_path) if profile_path else 'default'
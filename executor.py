@@ -0,0 +1,188 @@
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+import time
+
+import pacing
+
+# Edge locks a user data directory while a browser runs on it, so two profiles of one directory
+# (every profile profiles.py finds lives in Edge's own) cannot run at the same time. Runs take a
+# lock per directory, shared by every executor in the process, and such profiles take turns.
+_user_data_locks = {}
+_user_data_locks_lock = threading.Lock()
+
+
+def user_data_lock(profile_path):
+    """Returns the lock of the user data directory profile_path is in, or None for the default profile"""
+    if not profile_path:
+        return None
+    user_data_dir = os.path.dirname(profile_path)
+    with _user_data_locks_lock:
+        return _user_data_locks.setdefault(user_data_dir, threading.Lock())
+
+
+class ProfileResult:
+    """Outcome of running a task on one profile"""
+    def __init__(self, profile_name):
+        self.profile_name = profile_name
+        self.value = None      # whatever the task returned, e.g. the number of searches done
+        self.error = None      # exception raised by the task, if any
+        self.skipped = False   # True if the run was stopped before this profile started
+        self.started = None
+        self.finished = None
+
+    @property
+    def ok(self):
+        return not self.skipped and self.error is None
+
+    @property
+    def elapsed(self):
+        if self.started is None or self.finished is None:
+            return 0.0
+        return self.finished - self.started
+
+    @property
+    def outcome(self):
+        """Short description of how the run went, e.g. 'done in 42s (result: 10)'"""
+        if self.skipped:
+            return "skipped"
+        if self.error is not None:
+            return f"failed after {self.elapsed:.0f}s ({self.error})"
+        return f"done in {self.elapsed:.0f}s (result: {self.value})"
+
+    def __str__(self):
+        return f"{self.profile_name}: {self.outcome}"
+
+
+class ProfileExecutor:
+    """
+    Runs search() or quest() on several profiles, up to max_workers at a time.
+
+    Each profile runs in its own browser with its own stop event and progress channel.
+    stop() stops every profile, stop(profile_name) stops only that one. Profiles in the same
+    Edge user data directory run one after another whatever max_workers is, see user_data_lock().
+
+    Args:
+        max_workers (int): How many profiles may run at the same time.
+        pacer (Pacer, optional): Pacer used for the 'profile_gap' delay between profile starts.
+        job_context (callable, optional): Called with a profile name, returns a context manager
+            that each profile's worker thread runs in, e.g. Bus.job to route its output.
+        on_start (callable, optional): Called with a profile name when the profile's task starts,
+            after any wait for its user data directory.
+    """
+    def __init__(self, max_workers=1, pacer=None, job_context=None, on_start=None):
+        self.max_workers = max(1, max_workers)
+        self.pacer = pacing.get_pacer(pacer)
+        self.job_context = job_context
+        self.on_start = on_start
+        self.stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._profile_events = {}
+
+    def run(self, task, profiles, progress_callback=None, **task_kwargs):
+        """
+        Runs task once per profile and returns a ProfileResult per profile, in input order.
+
+        Args:
+            task (callable): search or quest. Called with progress_callback, stop_event,
+                profile_path and task_kwargs.
+            profiles (list): (profile_name, profile_path) pairs.
+            progress_callback (callable, optional): Called with (profile_name, progress 0-100).
+            **task_kwargs: Extra keyword arguments passed to every task call.
+        """
+        self.stop_event.clear()
+        results = [ProfileResult(name) for name, _ in profiles]
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="profile")
+        try:
+            futures = [
+                pool.submit(self._run_one, index, task, name, path, result, progress_callback, task_kwargs)
+                for index, ((name, path), result) in enumerate(zip(profiles, results))
+            ]
+            for future in futures:
+                future.result()
+        except KeyboardInterrupt:
+            # Let every profile finish its current step and close its browser
+            self.stop()
+            raise
+        finally:
+            pool.shutdown(wait=True)
+        return results
+
+    def stop(self, profile_name=None):
+        """Stops one profile, or every profile and anything not yet started"""
+        with self._lock:
+            if profile_name is None:
+                self.stop_event.set()
+                events = list(self._profile_events.values())
+            else:
+                events = [self._profile_events[profile_name]] if profile_name in self._profile_events else []
+        for event in events:
+            event.set()
+
+    def _run_one(self, index, task, name, path, result, progress_callback, task_kwargs):
+        if self.job_context is None:
+            return self._run_profile(index, task, name, path, result, progress_callback, task_kwargs)
+        with self.job_context(name):
+            return self._run_profile(index, task, name, path, result, progress_callback, task_kwargs)
+
+    def _run_profile(self, index, task, name, path, result, progress_callback, task_kwargs):
+        # Stagger starts the same way the sequential loop spaced out profiles
+        if index >= self.max_workers:
+            self.pacer.pause('profile_gap')
+        if self.stop_event.is_set():
+            result.skipped = True
+            return
+
+        stop_event = threading.Event()
+        with self._lock:
+            self._profile_events[name] = stop_event
+        if self.stop_event.is_set():
+            # stop() ran between the check above and registering the event
+            stop_event.set()
+
+        def report(value):
+            if progress_callback:
+                progress_callback(name, value)
+
+        lock = user_data_lock(path)
+        if lock is not None and not lock.acquire(blocking=False):
+            print(f"Profile {name} waits for another profile of its Edge user data directory to finish")
+            lock.acquire()
+        try:
+            if stop_event.is_set():
+                result.skipped = True
+                return
+            if self.on_start:
+                self.on_start(name)
+            self._run_task(task, name, path, index, result, stop_event, report, task_kwargs)
+        finally:
+            if lock is not None:
+                lock.release()
+            with self._lock:
+                self._profile_events.pop(name, None)
+
+    def _run_task(self, task, name, path, index, result, stop_event, report, task_kwargs):
+        print(f"\nRunning {task.__name__} on profile: {name} ({index + 1})")
+        result.started = time.monotonic()
+        try:
+            result.value = task(
+                progress_callback=report,
+                stop_event=stop_event,
+                profile_path=path,
+                **task_kwargs
+            )
+        except Exception as e:
+            result.error = e
+            print(f"Error running {task.__name__} on profile {name}: {e}")
+        finally:
+            result.finished = time.monotonic()
+            report(100)
+
+
+def print_summary(results):
+    """Prints one line per profile result"""
+    print("\n" + "-" * 50)
+    print("Profile results:")
+    for result in results:
+        print(f"  {result}")
+    print("-" * 50)
@@ -1,13 +1,18 @@
 import tkinter as tk
-from tkinter import ttk, scrolledtext
+from tkinter import ttk, scrolledtext, filedialog
 import threading
-import queue
 import sys
-import io
-import os
-import time
-from search import search
+from search import search, search_all
 from quest import quest
+from session import SessionPool
+from browser import BrowserConfig, LOAD_PROFILES, DEFAULT_LOAD_PROFILE
+from profiles import get_edge_profiles
+from executor import ProfileExecutor, print_summary
+from pacing import PROFILES, DEFAULT_PROFILE, Pacer
+import events
+from bus import Bus, BusStdout, profile_job, split_job
+import paths
+from console import ConsoleView, CONSOLE_MAX_LINES
 
 # Dark blue theme colors
 DARK_BLUE = "#1e2a38"
@@ -18,33 +23,11 @@ ACCENT_COLOR = "#2ecc71"
 BUTTON_COLOR = "#34495e"
 HOVER_COLOR = "#4e6d8c"
 
-class RedirectText:
-    """Redirect stdout to the console widget"""
-    def __init__(self, text_widget):
-        self.text_widget = text_widget
-        self.queue = queue.Queue()
-        self.update_timer = None
+# Bus defaults
+CONSOLE_MAX_CHUNKS = 2000      # output lines moved into the console per tick
+BUS_INTERVAL_MS = 100          # how often the bus is drained
+BUS_BACKLOG_MS = 10            # next tick when output is still waiting
 
-    def write(self, string):
-        self.queue.put(string)
-        if self.update_timer is None:
-            self.update_timer = self.text_widget.after(100, self.update_text)
-
-    def update_text(self):
-        try:
-            while True:
-                text = self.queue.get_nowait()
-                self.text_widget.configure(state="normal")
-                self.text_widget.insert(tk.END, text)
-                self.text_widget.see(tk.END)
-                self.text_widget.configure(state="disabled")
-                self.queue.task_done()
-        except queue.Empty:
-            pass
-        self.update_timer = None
-
-    def flush(self):
-        pass
 
 class EdgeAutomatorGUI:
     def __init__(self, root):
@@ -74,12 +57,35 @@ class EdgeAutomatorGUI:
                        foreground=[('selected', TEXT_COLOR)])
 
         # Variables
-        self.is_phone = tk.BooleanVar(value=False)
+        self.search_device = tk.StringVar(value="desktop")  # 'desktop', 'phone' or 'both'
         self.num_searches = tk.IntVar(value=10)
+        self.terms_file = tk.StringVar(value="")
+        self.auto_size = tk.BooleanVar(value=False)
+        self.navigation = tk.StringVar(value="home")
         self.headless_mode = tk.BooleanVar(value=False)
+        self.reuse_browsers = tk.BooleanVar(value=True)
+        self.batch_actions = tk.BooleanVar(value=False)
+        self.pacing_profile = tk.StringVar(value=DEFAULT_PROFILE)
+        self.load_profile = tk.StringVar(value=DEFAULT_LOAD_PROFILE)
+        self.low_memory = tk.BooleanVar(value=False)
+        self.resume = tk.BooleanVar(value=False)
+        self.record_events = tk.BooleanVar(value=False)
+        self.events_sink = None
+        self.max_parallel = tk.IntVar(value=1)
+        self.parallel_tabs = tk.IntVar(value=1)
+        self.browser_max_jobs = tk.IntVar(value=10)
+        self.console_max_lines = tk.IntVar(value=CONSOLE_MAX_LINES)
         self.search_running = False
         self.quest_running = False
 
+        # Workers publish progress and output here, the Tk loop drains it
+        self.bus = Bus()
+        self.progress_rows = {}    # job -> (progress bar, status label) of one profile
+        self.row_progress = {}     # job -> last progress value, for the overall bars
+
+        # Warm browsers shared by search and quest runs
+        self.session_pool = SessionPool(max_jobs=self.browser_max_jobs.get())
+
         # Edge profiles
         self.edge_profiles = self.get_edge_profiles()
         self.profile_vars = {}  # Will store BooleanVars for profile checkboxes
@@ -105,9 +111,11 @@ class EdgeAutomatorGUI:
         self.setup_console_tab()
         self.setup_misc_tab()
 
-        # Redirect stdout to console
-        self.redirect = RedirectText(self.console_text)
-        sys.stdout = self.redirect
+        # Redirect stdout to the bus, once for every thread
+        self.console = ConsoleView(self.console_text, max_lines=self.console_max_lines.get())
+        self.console_max_lines.trace_add("write", self.apply_console_max_lines)
+        sys.stdout = BusStdout(self.bus)
+        self.root.after(BUS_INTERVAL_MS, self.poll_bus)
 
         # Handle window close
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
@@ -117,8 +125,9 @@ class EdgeAutomatorGUI:
         device_frame = ttk.LabelFrame(self.search_tab, text="Device Selection")
         device_frame.pack(fill=tk.X, padx=10, pady=10)
 
-        ttk.Radiobutton(device_frame, text="Desktop", variable=self.is_phone, value=False).pack(side=tk.LEFT, padx=20, pady=10)
-        ttk.Radiobutton(device_frame, text="Phone (iPhone 10)", variable=self.is_phone, value=True).pack(side=tk.LEFT, padx=20, pady=10)
+        ttk.Radiobutton(device_frame, text="Desktop", variable=self.search_device, value="desktop").pack(side=tk.LEFT, padx=20, pady=10)
+        ttk.Radiobutton(device_frame, text="Phone (iPhone 10)", variable=self.search_device, value="phone").pack(side=tk.LEFT, padx=20, pady=10)
+        ttk.Radiobutton(device_frame, text="Desktop, then Phone (one browser)", variable=self.search_device, value="both").pack(side=tk.LEFT, padx=20, pady=10)
 
         # Search count frame
         search_count_frame = ttk.LabelFrame(self.search_tab, text="Number of Searches")
@@ -127,6 +136,23 @@ class EdgeAutomatorGUI:
         ttk.Label(search_count_frame, text="How many searches:").pack(side=tk.LEFT, padx=10, pady=10)
         search_count_entry = ttk.Entry(search_count_frame, textvariable=self.num_searches, width=5)
         search_count_entry.pack(side=tk.LEFT, padx=10, pady=10)
+        ttk.Checkbutton(search_count_frame, text="Only what is left today (read from Rewards, count above is the limit)",
+                        variable=self.auto_size).pack(side=tk.LEFT, padx=10, pady=10)
+
+        # Search terms frame
+        terms_frame = ttk.LabelFrame(self.search_tab, text="Search Terms")
+        terms_frame.pack(fill=tk.X, padx=10, pady=10)
+
+        ttk.Label(terms_frame, text="Terms file (empty for built-in terms):").pack(side=tk.LEFT, padx=10, pady=10)
+        ttk.Entry(terms_frame, textvariable=self.terms_file, width=30).pack(side=tk.LEFT, padx=10, pady=10)
+        ttk.Button(terms_frame, text="Browse...", command=self.browse_terms_file).pack(side=tk.LEFT, padx=10, pady=10)
+
+        # Navigation mode frame
+        navigation_frame = ttk.LabelFrame(self.search_tab, text="Navigation")
+        navigation_frame.pack(fill=tk.X, padx=10, pady=10)
+
+        ttk.Radiobutton(navigation_frame, text="Type into Bing home page", variable=self.navigation, value="home").pack(side=tk.LEFT, padx=20, pady=10)
+        ttk.Radiobutton(navigation_frame, text="Open results page directly", variable=self.navigation, value="direct").pack(side=tk.LEFT, padx=20, pady=10)
 
         # Profile selection frame
         profile_frame = ttk.LabelFrame(self.search_tab, text="Edge Profiles")
@@ -167,6 +193,10 @@ class EdgeAutomatorGUI:
         self.search_status = ttk.Label(progress_frame, text="Ready")
         self.search_status.pack(padx=10, pady=5)
 
+        # One row per profile, added when a run starts
+        self.search_rows_frame = ttk.Frame(progress_frame)
+        self.search_rows_frame.pack(fill=tk.X, padx=10, pady=5)
+
         # Button frame
         button_frame = ttk.Frame(self.search_tab)
         button_frame.pack(fill=tk.X, padx=10, pady=10)
@@ -184,6 +214,13 @@ class EdgeAutomatorGUI:
 
         ttk.Label(info_frame, text="Note: Quest mode only works properly on desktop.").pack(padx=10, pady=10)
 
+        # Activity tabs frame
+        tabs_frame = ttk.LabelFrame(self.quest_tab, text="Activity Tabs")
+        tabs_frame.pack(fill=tk.X, padx=10, pady=10)
+
+        ttk.Label(tabs_frame, text="Activity tabs open at once:").pack(side=tk.LEFT, padx=10, pady=10)
+        ttk.Entry(tabs_frame, textvariable=self.parallel_tabs, width=5).pack(side=tk.LEFT, padx=10, pady=10)
+
         # Profile selection frame
         profile_frame = ttk.LabelFrame(self.quest_tab, text="Edge Profiles")
         profile_frame.pack(fill=tk.X, padx=10, pady=10)
@@ -223,6 +260,10 @@ class EdgeAutomatorGUI:
         self.quest_status = ttk.Label(progress_frame, text="Ready")
         self.quest_status.pack(padx=10, pady=5)
 
+        # One row per profile, added when a run starts
+        self.quest_rows_frame = ttk.Frame(progress_frame)
+        self.quest_rows_frame.pack(fill=tk.X, padx=10, pady=5)
+
         # Button frame
         button_frame = ttk.Frame(self.quest_tab)
         button_frame.pack(fill=tk.X, padx=10, pady=10)
@@ -242,19 +283,53 @@ class EdgeAutomatorGUI:
         self.console_text.pack(fill=tk.BOTH, expand=True)
         self.console_text.configure(state="disabled")
 
-        # Button to clear console
-        clear_button = ttk.Button(console_frame, text="Clear Console", command=self.clear_console)
-        clear_button.pack(pady=10)
+        # Buttons to clear and save the console
+        button_frame = ttk.Frame(console_frame)
+        button_frame.pack(pady=10)
+        ttk.Button(button_frame, text="Clear Console", command=self.clear_console).pack(side=tk.LEFT, padx=10)
+        ttk.Button(button_frame, text="Save to File...", command=self.save_console).pack(side=tk.LEFT, padx=10)
 
     def setup_misc_tab(self):
         misc_frame = ttk.LabelFrame(self.misc_tab, text="Options")
         misc_frame.pack(fill=tk.X, padx=10, pady=10)
 
         ttk.Checkbutton(misc_frame, text="Headless Mode (No Browser UI)", variable=self.headless_mode).pack(padx=10, pady=10, anchor=tk.W)
+        ttk.Checkbutton(misc_frame, text="Keep browsers open between tasks", variable=self.reuse_browsers).pack(padx=10, pady=10, anchor=tk.W)
+        ttk.Checkbutton(misc_frame, text="Batch typing and scrolling into one browser command", variable=self.batch_actions).pack(padx=10, pady=10, anchor=tk.W)
+        ttk.Checkbutton(misc_frame, text="Record phase timings to events.jsonl in the data folder", variable=self.record_events, command=self.update_events_sink).pack(padx=10, pady=10, anchor=tk.W)
+        ttk.Checkbutton(misc_frame, text="Resume: count work already done today on each profile", variable=self.resume).pack(padx=10, pady=10, anchor=tk.W)
+        ttk.Checkbutton(misc_frame, text="Low memory: lean Edge processes, restarted every few dozen searches", variable=self.low_memory).pack(padx=10, pady=10, anchor=tk.W)
+
+        pacing_frame = ttk.Frame(misc_frame)
+        pacing_frame.pack(fill=tk.X, padx=10, pady=5)
+        ttk.Label(pacing_frame, text="Pacing profile:").pack(side=tk.LEFT)
+        ttk.Combobox(pacing_frame, textvariable=self.pacing_profile, values=sorted(PROFILES), state="readonly", width=10).pack(side=tk.LEFT, padx=10)
+
+        load_frame = ttk.Frame(misc_frame)
+        load_frame.pack(fill=tk.X, padx=10, pady=5)
+        ttk.Label(load_frame, text="Page-load profile:").pack(side=tk.LEFT)
+        ttk.Combobox(load_frame, textvariable=self.load_profile, values=list(LOAD_PROFILES), state="readonly", width=10).pack(side=tk.LEFT, padx=10)
+
+        parallel_frame = ttk.Frame(misc_frame)
+        parallel_frame.pack(fill=tk.X, padx=10, pady=5)
+        ttk.Label(parallel_frame, text="Profiles to run at the same time:").pack(side=tk.LEFT)
+        ttk.Entry(parallel_frame, textvariable=self.max_parallel, width=5).pack(side=tk.LEFT, padx=10)
+
+        max_jobs_frame = ttk.Frame(misc_frame)
+        max_jobs_frame.pack(fill=tk.X, padx=10, pady=5)
+        ttk.Label(max_jobs_frame, text="Restart browser after this many tasks:").pack(side=tk.LEFT)
+        ttk.Entry(max_jobs_frame, textvariable=self.browser_max_jobs, width=5).pack(side=tk.LEFT, padx=10)
+
+        console_lines_frame = ttk.Frame(misc_frame)
+        console_lines_frame.pack(fill=tk.X, padx=10, pady=5)
+        ttk.Label(console_lines_frame, text="Console lines to keep:").pack(side=tk.LEFT)
+        ttk.Entry(console_lines_frame, textvariable=self.console_max_lines, width=7).pack(side=tk.LEFT, padx=10)
 
         # Add explanation
         explanation = ttk.Label(self.misc_tab, text="Headless mode runs the browser without showing the UI.\n"
-                                                   "This can be useful for running in the background.")
+                                                   "This can be useful for running in the background.\n\n"
+                                                   "Keeping browsers open lets a quest reuse the browser a search on the\n"
+                                                   "same profile already launched, instead of starting Edge again.")
         explanation.pack(padx=10, pady=10)
 
     def start_search(self):
@@ -266,6 +341,7 @@ class EdgeAutomatorGUI:
         self.stop_search_button.configure(state=tk.NORMAL)
         self.search_status.configure(text="Running...")
         self.search_progress['value'] = 0
+        self.clear_progress_rows('search')
 
         # Create and start search thread
         self.search_thread = threading.Thread(target=self.run_search)
@@ -280,99 +356,88 @@ class EdgeAutomatorGUI:
         self.search_running = False
         self.search_status.configure(text="Stopping...")
 
-        # Set the stop event if it exists
-        if hasattr(self, 'search_stop_event'):
-            self.search_stop_event.set()
+        # Stop every profile the executor is running
+        if hasattr(self, 'search_executor'):
+            self.search_executor.stop()
+
+    def browse_terms_file(self):
+        path = filedialog.askopenfilename(title="Choose a search terms file",
+                                          filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
+        if path:
+            self.terms_file.set(path)
 
     def run_search(self):
+        task, task_kwargs = search, self.search_kwargs()
+        if self.search_device.get() == 'both':
+            task = search_all
+            del task_kwargs['isPhone']
+        with self.bus.job('search'):
+            self.run_task('search', task, task_kwargs)
+
+    def search_kwargs(self):
+        return dict(
+            isPhone=self.search_device.get() == 'phone',
+            num_searches_input=self.num_searches.get(),
+            browser_config=BrowserConfig(headless=self.headless_mode.get(), load_profile=self.load_profile.get(),
+                                         low_memory=self.low_memory.get()),
+            session_pool=self.get_session_pool(),
+            batch_actions=self.batch_actions.get(),
+            navigation=self.navigation.get(),
+            pacing_profile=Pacer(self.pacing_profile.get()),
+            terms_file=self.terms_file.get().strip() or None,
+            resume=self.resume.get(),
+            auto_size=self.auto_size.get()
+        )
+
+    def run_task(self, task_name, task, task_kwargs):
+        """
+        Runs task on the selected profiles. Runs in a worker thread: progress, status and
+        output go to the bus, never to Tk directly.
+        """
         try:
-            # Create a custom stdout to capture search output
-            original_stdout = sys.stdout
-            custom_stdout = io.StringIO()
-            sys.stdout = self.redirect
-
-            # Get search parameters
-            is_phone = self.is_phone.get()
-            num_searches = self.num_searches.get()
-            headless = self.headless_mode.get()
-
-            # Create a stop event for cancellation
-            import threading
-            stop_event = threading.Event()
-            self.search_stop_event = stop_event
-
-            # Add headless option if enabled
-            if headless:
-                from selenium.webdriver.edge.options import Options
-                original_Options = Options
-
-                class HeadlessOptions(Options):
-                    def __init__(self, *args, **kwargs):
-                        super().__init__(*args, **kwargs)
-                        self.add_argument("--headless")
-
-                # Monkey patch the Options class
-                import search as search_module
-                search_module.Options = HeadlessOptions
-
-            # Define progress callback
-            def update_progress(value):
-                self.root.after(0, lambda: self.search_progress.configure(value=value))
+            # Create an executor for the profiles, it owns the stop events
+            pacer = task_kwargs['pacing_profile']
+            executor = ProfileExecutor(max_workers=self.max_parallel.get(), pacer=pacer,
+                                       job_context=self.profile_context(task_name),
+                                       on_start=self.profile_started(task_name))
+            setattr(self, f"{task_name}_executor", executor)
 
-            # Get selected profiles
-            selected_profiles = []
-            for profile_name, var in self.profile_vars.items():
-                if var.get():
-                    selected_profiles.append((profile_name, self.edge_profiles[profile_name]))
+            # Progress of each profile, coalesced by the bus
+            def update_progress(profile_name, value):
+                self.bus.set(profile_job(task_name, profile_name), 'progress', value)
 
+            # Get selected profiles
+            selected_profiles = self.get_selected_profiles()
             if not selected_profiles:
                 print("No profiles selected. Please select at least one profile.")
                 return
 
-            print(f"Running search on {len(selected_profiles)} selected profiles")
-
-            # Run the search function for each selected profile
-            for i, (profile_name, profile_path) in enumerate(selected_profiles):
-                if stop_event.is_set():
-                    break
+            print(f"Running {task_name} on {len(selected_profiles)} selected profiles")
+            for profile_name, _ in selected_profiles:
+                self.bus.set(profile_job(task_name, profile_name), 'status', "Waiting")
 
-                print(f"\nRunning search on profile: {profile_name} ({i+1}/{len(selected_profiles)})")
-
-                # Run the search function with progress updates
-                # Fix for issue: when search count is 1, ensure we still process all profiles
-                search(
-                    isPhone=is_phone,
-                    num_searches_input=num_searches,
+            # Run the task on the selected profiles, several at a time if configured
+            phase_stats = events.get_stream().subscribe(events.Aggregator(task=task_name))
+            try:
+                results = executor.run(
+                    task,
+                    selected_profiles,
                     progress_callback=update_progress,
-                    stop_event=stop_event,
-                    profile_path=profile_path
+                    **task_kwargs
                 )
-
-                # Reset the stop_event if it was set during the search
-                # This ensures the next profile will be processed even if there was an issue
-                if stop_event.is_set() and i < len(selected_profiles) - 1:
-                    print("Resetting stop event to process next profile...")
-                    stop_event.clear()
-
-                # Update progress to 100% after each profile
-                update_progress(100)
-
-                # Small delay between profiles
-                if i < len(selected_profiles) - 1 and not stop_event.is_set():
-                    print("Waiting before starting next profile...")
-                    time.sleep(3)
-
-            # Restore original Options
-            if headless:
-                search_module.Options = original_Options
+            finally:
+                events.get_stream().unsubscribe(phase_stats)
+            for result in results:
+                self.bus.set(profile_job(task_name, result.profile_name), 'status', result.outcome)
+            print_summary(results)
+            phase_stats.print_summary(f"{task_name.capitalize()} time per phase, all profiles")
 
         except Exception as e:
-            print(f"Error in search: {e}")
+            print(f"Error in {task_name}: {e}")
         finally:
             # Reset UI
-            self.search_running = False
-            self.root.after(0, self.reset_search_ui)
-            sys.stdout = original_stdout
+            setattr(self, f"{task_name}_running", False)
+            self.bus.set(task_name, 'finished', True)
 
     def reset_search_ui(self):
         self.start_search_button.configure(state=tk.NORMAL)
@@ -389,6 +454,7 @@ class EdgeAutomatorGUI:
         self.stop_quest_button.configure(state=tk.NORMAL)
         self.quest_status.configure(text="Running...")
         self.quest_progress.start(10)
+        self.clear_progress_rows('quest')
 
         # Create and start quest thread
         self.quest_thread = threading.Thread(target=self.run_quest)
@@ -403,91 +469,24 @@ class EdgeAutomatorGUI:
         self.quest_running = False
         self.quest_status.configure(text="Stopping...")
 
-        # Set the stop event if it exists
-        if hasattr(self, 'quest_stop_event'):
-            self.quest_stop_event.set()
+        # Stop every profile the executor is running
+        if hasattr(self, 'quest_executor'):
+            self.quest_executor.stop()
 
     def run_quest(self):
-        try:
-            # Create a custom stdout to capture quest output
-            original_stdout = sys.stdout
-            custom_stdout = io.StringIO()
-            sys.stdout = self.redirect
-
-            # Get quest parameters
-            is_phone = False  # Force desktop mode for quest
-            headless = self.headless_mode.get()
-
-            # Create a stop event for cancellation
-            import threading
-            stop_event = threading.Event()
-            self.quest_stop_event = stop_event
-
-            # Add headless option if enabled
-            if headless:
-                from selenium.webdriver.edge.options import Options
-                original_Options = Options
-
-                class HeadlessOptions(Options):
-                    def __init__(self, *args, **kwargs):
-                        super().__init__(*args, **kwargs)
-                        self.add_argument("--headless")
-
-                # Monkey patch the Options class
-                import quest as quest_module
-                quest_module.Options = HeadlessOptions
-
-            # Define progress callback
-            def update_progress(value):
-                self.root.after(0, lambda: self.quest_progress.stop())
-                self.root.after(0, lambda: self.quest_progress.configure(mode='determinate', value=value))
-
-            # Get selected profiles
-            selected_profiles = []
-            for profile_name, var in self.profile_vars.items():
-                if var.get():
-                    selected_profiles.append((profile_name, self.edge_profiles[profile_name]))
-
-            if not selected_profiles:
-                print("No profiles selected. Please select at least one profile.")
-                return
-
-            print(f"Running quest on {len(selected_profiles)} selected profiles")
-
-            # Run the quest function for each selected profile
-            for i, (profile_name, profile_path) in enumerate(selected_profiles):
-                if stop_event.is_set():
-                    break
-
-                print(f"\nRunning quest on profile: {profile_name} ({i+1}/{len(selected_profiles)})")
-
-                # Run the quest function with progress updates
-                quest(
-                    isPhone=is_phone,
-                    progress_callback=update_progress,
-                    stop_event=stop_event,
-                    profile_path=profile_path
-                )
-
-                # Update progress to 100% after each profile
-                update_progress(100)
-
-                # Small delay between profiles
-                if i < len(selected_profiles) - 1 and not stop_event.is_set():
-                    print("Waiting before starting next profile...")
-                    time.sleep(3)
-
-            # Restore original Options
-            if headless:
-                quest_module.Options = original_Options
-
-        except Exception as e:
-            print(f"Error in quest: {e}")
-        finally:
-            # Reset UI
-            self.quest_running = False
-            self.root.after(0, self.reset_quest_ui)
-            sys.stdout = original_stdout
+        with self.bus.job('quest'):
+            self.run_task('quest', quest, self.quest_kwargs())
+
+    def quest_kwargs(self):
+        return dict(
+            isPhone=False,  # Force desktop mode for quest
+            browser_config=BrowserConfig(headless=self.headless_mode.get(), load_profile=self.load_profile.get(),
+                                         low_memory=self.low_memory.get()),
+            session_pool=self.get_session_pool(),
+            pacing_profile=Pacer(self.pacing_profile.get()),
+            parallel_tabs=self.parallel_tabs.get(),
+            resume=self.resume.get()
+        )
 
     def reset_quest_ui(self):
         self.start_quest_button.configure(state=tk.NORMAL)
@@ -496,52 +495,154 @@ class EdgeAutomatorGUI:
         self.quest_progress.stop()
         self.quest_progress['value'] = 100
 
+    def profile_context(self, task_name):
+        """Returns the executor's job_context: binds each profile's worker thread to its job"""
+        def context(profile_name):
+            return self.bus.job(profile_job(task_name, profile_name))
+        return context
+
+    def profile_started(self, task_name):
+        """Returns the executor's on_start: a profile shows "Waiting" until its task really starts"""
+        def started(profile_name):
+            self.bus.set(profile_job(task_name, profile_name), 'status', "Running")
+        return started
+
+    def poll_bus(self):
+        """Applies what workers published since the last tick, then schedules the next tick"""
+        state, lines = self.bus.drain(max_lines=CONSOLE_MAX_CHUNKS)
+        self.console.append("".join(self.format_line(job, line) for job, line in lines))
+
+        changed_tasks = set()
+        for (job, key), value in state.items():
+            task_name, profile_name = split_job(job)
+            if key == 'finished':
+                getattr(self, f"reset_{task_name}_ui")()
+            elif profile_name is not None:
+                bar, status = self.get_progress_row(job)
+                if key == 'progress':
+                    bar['value'] = value
+                    self.row_progress[job] = value
+                    changed_tasks.add(task_name)
+                elif key == 'status':
+                    status.configure(text=value)
+        for task_name in changed_tasks:
+            self.update_overall_progress(task_name)
+
+        # Come back sooner while output is still waiting
+        delay = BUS_BACKLOG_MS if self.bus.pending() else BUS_INTERVAL_MS
+        self.root.after(delay, self.poll_bus)
+
+    def format_line(self, job, line):
+        """Prefixes output of a profile with its job ID, e.g. '[search/Profile 1] '"""
+        if job is None or split_job(job)[1] is None:
+            return line
+        return f"[{job}] {line}"
+
+    def get_progress_row(self, job):
+        """Returns (progress bar, status label) of a profile's row, adding the row if needed"""
+        if job not in self.progress_rows:
+            task_name, profile_name = split_job(job)
+            row = ttk.Frame(getattr(self, f"{task_name}_rows_frame"))
+            row.pack(fill=tk.X, pady=2)
+            ttk.Label(row, text=profile_name, width=20).pack(side=tk.LEFT)
+            bar = ttk.Progressbar(row, orient=tk.HORIZONTAL, length=200, mode='determinate')
+            bar.pack(side=tk.LEFT, padx=10)
+            status = ttk.Label(row, text="")
+            status.pack(side=tk.LEFT, padx=10)
+            self.progress_rows[job] = (bar, status)
+        return self.progress_rows[job]
+
+    def clear_progress_rows(self, task_name):
+        """Removes the profile rows of a task's previous run"""
+        for job in [job for job in self.progress_rows if split_job(job)[0] == task_name]:
+            bar, _ = self.progress_rows.pop(job)
+            bar.master.destroy()
+            self.row_progress.pop(job, None)
+
+    def update_overall_progress(self, task_name):
+        """Sets a task's main progress bar to the average over its profile rows"""
+        jobs = [job for job in self.progress_rows if split_job(job)[0] == task_name]
+        overall = sum(self.row_progress.get(job, 0) for job in jobs) / len(jobs)
+        progress = getattr(self, f"{task_name}_progress")
+        if task_name == 'quest':
+            progress.stop()
+            progress.configure(mode='determinate')
+        progress.configure(value=overall)
+
+    def get_selected_profiles(self):
+        """Returns (profile_name, profile_path) pairs for the ticked profiles"""
+        selected_profiles = []
+        for profile_name, var in self.profile_vars.items():
+            if var.get():
+                selected_profiles.append((profile_name, self.edge_profiles[profile_name]))
+        return selected_profiles
+
+    def get_session_pool(self):
+        """Returns the shared session pool, or None if browsers should not be kept open"""
+        if not self.reuse_browsers.get():
+            return None
+        self.session_pool.max_jobs = max(1, self.browser_max_jobs.get())
+        return self.session_pool
+
     def clear_console(self):
-        self.console_text.configure(state="normal")
-        self.console_text.delete(1.0, tk.END)
-        self.console_text.configure(state="disabled")
+        self.console.clear()
+
+    def save_console(self):
+        path = filedialog.asksaveasfilename(title="Save console output", defaultextension=".txt",
+                                            filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
+        if path:
+            try:
+                self.console.save(path)
+                print(f"Console saved to {path}")
+            except OSError as e:
+                print(f"Could not save console: {e}")
+
+    def apply_console_max_lines(self, *args):
+        try:
+            max_lines = self.console_max_lines.get()
+        except tk.TclError:
+            return  # not a number (yet)
+        if max_lines >= 1:
+            self.console.set_max_lines(max_lines)
 
     def get_edge_profiles(self):
         """
         Scans the Edge user data directory and returns a list of available profiles.
         Returns a dictionary with profile names as keys and paths as values.
         """
-        profiles = {}
-
-        # Path to Edge user data directory
-        edge_data_path = os.path.join(os.environ['LOCALAPPDATA'], 'Microsoft', 'Edge', 'User Data')
-
-        if os.path.exists(edge_data_path):
-            # Add Default profile
-            default_profile_path = os.path.join(edge_data_path, 'Default')
-            if os.path.exists(default_profile_path) and os.path.isdir(default_profile_path):
-                profiles['Default'] = default_profile_path
-
-            # Look for additional profiles (Profile 1, Profile 2, etc.)
-            for item in os.listdir(edge_data_path):
-                if item.startswith('Profile ') and os.path.isdir(os.path.join(edge_data_path, item)):
-                    profiles[item] = os.path.join(edge_data_path, item)
-
-            print(f"Found {len(profiles)} Edge profiles")
-        else:
-            print(f"Edge user data directory not found at: {edge_data_path}")
-
-        return profiles
+        return get_edge_profiles()
+
+    def update_events_sink(self):
+        """Starts or stops writing the event stream to events.jsonl"""
+        if self.record_events.get() and self.events_sink is None:
+            self.events_sink = events.get_stream().subscribe(events.JsonlSink(paths.data_file("events.jsonl")))
+            print(f"Recording phase timings to {self.events_sink.path}")
+        elif not self.record_events.get() and self.events_sink is not None:
+            events.get_stream().unsubscribe(self.events_sink)
+            self.events_sink.close()
+            self.events_sink = None
 
     def on_closing(self):
         # Restore stdout
         sys.stdout = sys.__stdout__
 
+        # Stop recording events
+        self.record_events.set(False)
+        self.update_events_sink()
+
         # Stop any running threads
         self.search_running = False
         self.quest_running = False
 
+        # Quit any browsers kept open between tasks
+        self.session_pool.close_all()
+
         # Close the window
         self.root.destroy()
 
 def main():
     root = tk.Tk()
-    app = EdgeAutomatorGUI(root)
+    EdgeAutomatorGUI(root)
     root.mainloop()
 
 if __name__ == "__main__":
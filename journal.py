@@ -0,0 +1,112 @@
+"""
+Checkpoint journal for search() and quest().
+
+Every completed search and every clicked card is recorded, per profile and per day, in a
+small SQLite database in the data directory. Each record is committed on its own, so a
+crash or Ctrl-C loses at most the unit that was in progress, and a run with resume=True
+picks up where the previous one stopped.
+"""
+from contextlib import closing
+from datetime import date, datetime, timedelta
+import sqlite3
+import threading
+
+import paths
+
+JOURNAL_FILE = 'journal.sqlite3'
+
+# Records older than this many days are dropped when the journal is opened
+KEEP_DAYS = 7
+
+QUEST = 'quest'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS units (
+    id INTEGER PRIMARY KEY,
+    day TEXT NOT NULL,
+    profile TEXT NOT NULL,
+    task TEXT NOT NULL,
+    unit TEXT NOT NULL,
+    completed_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS units_by_day ON units (day, profile, task);
+"""
+
+
+def search_task(device):
+    """Journal task name for searches on a device; desktop and phone searches count separately"""
+    return f"search:{device}"
+
+
+def profile_key(profile_path):
+    """Journal name for a profile, 'default' when running on Edge's default profile"""
+    return profile_path or 'default'
+
+
+class Journal:
+    """
+    Per-profile, per-day record of completed work units.
+
+    Safe to share between threads; every call uses its own connection.
+
+    Args:
+        path (str, optional): SQLite file. Defaults to JOURNAL_FILE in the data directory.
+    """
+    def __init__(self, path=None):
+        self.path = path or paths.data_file(JOURNAL_FILE)
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(SCHEMA)
+            cutoff = (date.today() - timedelta(days=KEEP_DAYS)).isoformat()
+            conn.execute("DELETE FROM units WHERE day < ?", (cutoff,))
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def record(self, profile, task, unit):
+        """Records one completed unit. Errors are printed, never raised, so the run goes on."""
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT INTO units (day, profile, task, unit, completed_at) VALUES (?, ?, ?, ?, ?)",
+                    (date.today().isoformat(), profile, task, unit, datetime.now().isoformat(timespec='seconds'))
+                )
+        except sqlite3.Error as e:
+            print(f"Could not record progress in the journal: {e}")
+
+    def units(self, profile, task, day=None):
+        """Returns the units completed on day (default today), oldest first"""
+        day = (day or date.today()).isoformat()
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT unit FROM units WHERE day = ? AND profile = ? AND task = ? ORDER BY id",
+                (day, profile, task)
+            ).fetchall()
+        return [unit for (unit,) in rows]
+
+    def count(self, profile, task, day=None):
+        """Returns the number of units completed on day (default today)"""
+        day = (day or date.today()).isoformat()
+        with closing(self._connect()) as conn:
+            (count,) = conn.execute(
+                "SELECT COUNT(*) FROM units WHERE day = ? AND profile = ? AND task = ?",
+                (day, profile, task)
+            ).fetchone()
+        return count
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_journal(journal=None):
+    """Passes a Journal through, or returns the process-wide one in the data directory"""
+    global _journal
+    if journal is not None:
+        return journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = Journal()
+        return _journal
@@ -1,13 +1,14 @@
-from selenium import webdriver
-from selenium.webdriver.edge.options import Options
 import argparse
 import os
 import sys
-from getpass import getpass
-import tkinter as tk
 
-from search import search
-from quest import quest
+# Keep the imports here light: modes are imported from the task registry only once selected,
+# so --help and the interactive menu start without loading selenium or tkinter
+import events
+import tasks
+from pacing import PROFILES, DEFAULT_PROFILE, Pacer
+from profiles import get_edge_profiles
+from browser import LOAD_PROFILES, DEFAULT_LOAD_PROFILE, LOW_MEMORY_RECYCLE_AFTER, LOW_MEMORY_MAX_RSS_MB
 
 
 def display_welcome():
@@ -15,19 +16,21 @@ def display_welcome():
     print("EDGE AUTOMATOR TOOL".center(50))
     print("=" * 50)
     print("\nChoose your mode:\n")
-    print("1. Search Mode - Perform automated searches")
-    print("2. Quest Mode - Complete quests and activities")
-    print("3. GUI Mode - Launch graphical interface")
-    print("4. Exit\n")
+    for number, task in enumerate(tasks.TASKS.values(), start=1):
+        print(f"{number}. {task.title} - {task.description}")
+    print(f"{len(tasks.TASKS) + 1}. Exit\n")
 
 
 def get_user_choice():
+    """Returns the name of the mode picked from the menu, or None to exit"""
+    names = list(tasks.TASKS)
+    last = len(names) + 1
     while True:
         try:
-            choice = int(input("Enter your choice (1-4): "))
-            if 1 <= choice <= 4:
-                return choice
-            print("Please enter a number between 1 and 4")
+            choice = int(input(f"Enter your choice (1-{last}): "))
+            if 1 <= choice <= last:
+                return names[choice - 1] if choice < last else None
+            print(f"Please enter a number between 1 and {last}")
         except ValueError:
             print("Invalid input. Please enter a number.")
 
@@ -40,11 +43,31 @@ def get_device_preference():
     return choice == '2'
 
 
-def launch_gui():
-    from gui import EdgeAutomatorGUI
-    root = tk.Tk()
-    app = EdgeAutomatorGUI(root)
-    root.mainloop()
+def get_search_count():
+    while True:
+        try:
+            num_searches = int(input("How many searches would you like to perform on each profile? "))
+            if num_searches >= 1:
+                return num_searches
+            print("Please enter a number of at least 1")
+        except ValueError:
+            print("Invalid input. Please enter a number.")
+
+
+def resolve_profiles(parser, names):
+    """Maps profile names to (name, path) pairs, exiting with an error on unknown names"""
+    edge_profiles = get_edge_profiles()
+    profiles = []
+    for name in names:
+        if name not in edge_profiles:
+            parser.error(f"Unknown Edge profile: {name} (found: {', '.join(edge_profiles) or 'none'})")
+        profiles.append((name, edge_profiles[name]))
+    return profiles
+
+
+def run_entry_point(mode):
+    """Runs a mode that is not a browser task, e.g. the GUI"""
+    tasks.get_task(mode).load()()
 
 
 def main():
@@ -53,36 +76,88 @@ def main():
         description='Edge Automator Tool - Perform automated browser tasks',
         formatter_class=argparse.RawTextHelpFormatter
     )
-    parser.add_argument('--mode', choices=['search', 'quest', 'gui'],
-                        help='Run in specific mode:\n'
-                             'search - Perform automated searches\n'
-                             'quest - Complete quests and activities\n'
-                             'gui - Launch graphical user interface')
+    parser.add_argument('--mode', choices=list(tasks.TASKS),
+                        help='Run in specific mode:\n' + '\n'.join(
+                            f'{task.name} - {task.description}' for task in tasks.TASKS.values()))
     parser.add_argument('--phone', action='store_true',
                         help='Run in phone mode (iPhone 10)')
     parser.add_argument('--interactive', action='store_true',
                         help='Launch in interactive mode to choose options')
+    parser.add_argument('--headless', action='store_true',
+                        help='Run the browser without UI')
+    parser.add_argument('--profile', action='append', metavar='NAME',
+                        help='Edge profile to run on, e.g. "Default" or "Profile 1".\n'
+                             'Repeat to run on several profiles')
+    parser.add_argument('--parallel', type=int, default=1, metavar='N',
+                        help='Run up to N profiles at the same time (default: %(default)s).\n'
+                             'Profiles found in Edge\'s own User Data folder share one user data\n'
+                             'directory, so they always run one after another; only profiles in\n'
+                             'separate user data directories run at the same time')
+    parser.add_argument('--searches', type=int, metavar='N',
+                        help='Number of searches per profile (asked for if not given)')
+    parser.add_argument('--tabs', type=int, default=1, metavar='N',
+                        help='Quest mode: open up to N activity tabs at once (default: %(default)s)')
+    parser.add_argument('--direct', action='store_true',
+                        help='Open each search results page by URL instead of typing\n'
+                             'into the Bing home page')
+    parser.add_argument('--pace', choices=sorted(PROFILES), default=DEFAULT_PROFILE,
+                        help='Pacing profile for delays between actions (default: %(default)s)')
+    parser.add_argument('--batch-actions', action='store_true',
+                        help='Type, submit and scroll each search with one in-page script\n'
+                             'instead of one browser command per keystroke')
+    parser.add_argument('--auto-searches', action='store_true',
+                        help='Read how many searches each profile still needs today from the\n'
+                             'Rewards dashboard and do exactly those (--searches becomes a limit)')
+    parser.add_argument('--terms-file', metavar='PATH',
+                        help='Text file with one search term per line to pick searches from\n'
+                             '(default: built-in terms)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Count work already done today on the profile: searches count\n'
+                             'towards --searches and clicked cards are skipped')
+    parser.add_argument('--events-file', metavar='PATH',
+                        help='Append a JSON line per timed phase (launch, navigation, typing,\n'
+                             'scrolling, card clicks, ...) to PATH')
+    parser.add_argument('--load-profile', choices=list(LOAD_PROFILES), default=DEFAULT_LOAD_PROFILE,
+                        help='Page-load profile: full loads everything, lean skips images, fonts,\n'
+                             'media and trackers, minimal also skips stylesheets (default: %(default)s)')
+    parser.add_argument('--low-memory', action='store_true',
+                        help='Run Edge with fewer renderer processes, a capped JavaScript heap and\n'
+                             f'no background services, and restart it every {LOW_MEMORY_RECYCLE_AFTER} searches\n'
+                             f'or once it uses more than {LOW_MEMORY_MAX_RSS_MB} MiB')
+    parser.add_argument('--recycle-after', type=int, metavar='N',
+                        help='Search mode: restart Edge after every N searches (0: never)')
+    parser.add_argument('--max-rss', type=int, metavar='MB',
+                        help='Search mode: restart Edge once its processes use more than MB MiB\n'
+                             '(needs psutil; 0: never)')
+    parser.add_argument('--engine', choices=['threads', 'async'], default='threads',
+                        help='threads runs each profile in its own thread; async drives every\n'
+                             'browser from one asyncio event loop, for many profiles at once\n'
+                             '(default: %(default)s)')
+    parser.add_argument('--no-daemon', action='store_true',
+                        help='Run in this process even if a daemon (--mode daemon) is running')
+    parser.add_argument('--schedule', metavar='HH:MM',
+                        help='Have the running daemon repeat this run every day at HH:MM\n'
+                             'instead of running it now')
     args = parser.parse_args()
 
-    # Check if GUI mode is specified
-    if args.mode == 'gui':
-        launch_gui()
+    # Check if the GUI (or another mode with its own entry point) is specified
+    if args.mode and not tasks.get_task(args.mode).browser_task:
+        run_entry_point(args.mode)
         return
 
     # Interactive mode if specified or no arguments provided
     if args.interactive or (not args.mode and not args.phone):
         display_welcome()
-        choice = get_user_choice()
+        mode = get_user_choice()
 
-        if choice == 4:
+        if mode is None:
             print("Exiting...")
             sys.exit(0)
-        elif choice == 3:
-            launch_gui()
+        elif not tasks.get_task(mode).browser_task:
+            run_entry_point(mode)
             return
 
-        is_phone = get_device_preference()
-        mode = 'search' if choice == 1 else 'quest'
+        is_phone = get_device_preference() if mode != 'search-all' else False
     else:
         # Non-interactive mode using command line args
         mode = args.mode or 'quest'  # default to quest if not specified
@@ -95,15 +170,119 @@ def main():
 
     # Display configuration
     print("\n" + "-" * 50)
-    print(f"Starting in {'Phone' if is_phone else 'Desktop'} mode")
-    print(f"Running: {mode.capitalize()} Mode")
+    if mode == 'search-all':
+        print("Starting in Desktop mode, then Phone mode in the same browser")
+    else:
+        print(f"Starting in {'Phone' if is_phone else 'Desktop'} mode")
+    print(f"Running: {tasks.get_task(mode).title}")
     print("-" * 50 + "\n")
 
-    # Run the selected mode
+    # Options as plain values, so they can be handed to a daemon as they are
     if mode == 'quest':
-        quest(isPhone=is_phone)
+        options = {
+            'isPhone': is_phone,
+            'headless': args.headless,
+            'load_profile': args.load_profile,
+            'low_memory': args.low_memory,
+            'pacing_profile': args.pace,
+            'parallel_tabs': args.tabs,
+            'resume': args.resume,
+        }
     else:
-        search(isPhone=is_phone)
+        options = {
+            'isPhone': is_phone,
+            'headless': args.headless,
+            'load_profile': args.load_profile,
+            'low_memory': args.low_memory,
+            'recycle_after': args.recycle_after,
+            'max_rss_mb': args.max_rss,
+            'num_searches_input': args.searches,
+            'terms_file': os.path.abspath(args.terms_file) if args.terms_file else None,
+            'resume': args.resume,
+            'auto_size': args.auto_searches,
+            'batch_actions': args.batch_actions,
+            'navigation': 'direct' if args.direct else 'home',
+            'pacing_profile': args.pace,
+        }
+        if mode == 'search-all':
+            del options['isPhone']
+
+    # Hand the run to the daemon if one is running, it has warm browsers
+    import daemon as automator_daemon
+    if args.schedule:
+        try:
+            args.schedule = automator_daemon.parse_time(args.schedule)
+        except ValueError as e:
+            parser.error(f"--schedule: {e}")
+    client = None if args.no_daemon else automator_daemon.find_daemon()
+    if args.schedule and client is None:
+        parser.error("--schedule needs a running daemon (start one with --mode daemon)")
+    if client is not None and args.engine == 'async':
+        parser.error("--engine async runs in this process; add --no-daemon while a daemon is running")
+    if client is not None:
+        if args.profile:
+            resolve_profiles(parser, args.profile)
+        if mode in tasks.SEARCH_TASKS and args.searches is None and not args.auto_searches:
+            options['num_searches_input'] = get_search_count()
+        spec = {
+            'task': mode,
+            'profiles': args.profile or [],
+            'parallel': args.parallel,
+            'events_file': os.path.abspath(args.events_file) if args.events_file else None,
+            'options': options,
+        }
+        try:
+            if args.schedule:
+                schedule = client.add_schedule(f"{mode}-{args.schedule.replace(':', '')}", args.schedule, spec)
+                print(f"Daemon will run {mode} every day at {schedule['at']} (schedule {schedule['name']})")
+                return
+            job = client.run(spec)
+        except ValueError as e:
+            parser.error(f"daemon refused the run: {e}")
+        for result in job['results']:
+            print(f"  {result}")
+        if job['status'] == 'failed':
+            sys.exit(1)
+        return
+
+    task_kwargs = automator_daemon.job_kwargs(options)
+
+    # Every run reports its phases on the process-wide event stream
+    if args.events_file:
+        events.get_stream().subscribe(events.JsonlSink(args.events_file))
+
+    # Drive every profile from one event loop
+    if args.engine == 'async':
+        profiles = resolve_profiles(parser, args.profile) if args.profile else [('default', None)]
+        if mode in tasks.SEARCH_TASKS and args.searches is None and not args.auto_searches:
+            task_kwargs['num_searches_input'] = get_search_count()
+        from engine import Engine
+        from executor import print_summary
+
+        all_profiles = events.get_stream().subscribe(events.Aggregator())
+        results = Engine(max_sessions=args.parallel, pacer=Pacer(args.pace)).run(mode, profiles, **task_kwargs)
+        print_summary(results)
+        all_profiles.print_summary("Time per phase, all profiles")
+        return
+
+    task = tasks.get_task(mode).load()
+
+    # Run the selected mode on the default profile
+    if not args.profile:
+        task(**task_kwargs)
+        return
+
+    # Or on the selected profiles, several at a time if requested
+    profiles = resolve_profiles(parser, args.profile)
+    if mode in tasks.SEARCH_TASKS and args.searches is None and not args.auto_searches:
+        task_kwargs['num_searches_input'] = get_search_count()
+    from executor import ProfileExecutor, print_summary
+
+    all_profiles = events.get_stream().subscribe(events.Aggregator())
+    executor = ProfileExecutor(max_workers=args.parallel, pacer=Pacer(args.pace))
+    results = executor.run(task, profiles, **task_kwargs)
+    print_summary(results)
+    all_profiles.print_summary("Time per phase, all profiles")
 
 
 if __name__ == "__main__":
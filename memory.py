@@ -0,0 +1,131 @@
+"""
+Memory footprint of the Edge instances search() and quest() run, and when to restart them.
+
+The browser behind a session is found through the DevTools port its capabilities report;
+its resident memory is that process plus every child (renderers, GPU, utilities), read
+with psutil. psutil is optional: without it nothing is measured and only the search-count
+limit of the low-memory mode applies.
+"""
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from browser import LOW_MEMORY_RECYCLE_AFTER, LOW_MEMORY_MAX_RSS_MB
+
+MIB = 2 ** 20
+
+
+def debugger_port(capabilities):
+    """Returns the DevTools port of a session from its capabilities, or None"""
+    options = (capabilities or {}).get('ms:edgeOptions') or {}
+    port = options.get('debuggerAddress', '').rpartition(':')[2]
+    return int(port) if port.isdigit() else None
+
+
+def find_browser_pid(port):
+    """Returns the ID of the Edge process listening on port, or None"""
+    for process in psutil.process_iter(['name']):
+        if 'edge' not in (process.info['name'] or '').lower():
+            continue
+        try:
+            connections = getattr(process, 'net_connections', process.connections)(kind='tcp')
+        except psutil.Error:
+            continue
+        if any(c.status == psutil.CONN_LISTEN and c.laddr.port == port for c in connections):
+            return process.pid
+    return None
+
+
+def tree_rss(pid):
+    """Returns the resident memory of a process and all its children in bytes"""
+    root = psutil.Process(pid)
+    total = 0
+    for process in [root] + root.children(recursive=True):
+        try:
+            total += process.memory_info().rss
+        except psutil.Error:
+            pass  # exited in the meantime
+    return total
+
+
+class BrowserMemory:
+    """
+    Measures one browser's process tree.
+
+    Args:
+        capabilities (dict): Capabilities of the session, e.g. driver.capabilities.
+    """
+    def __init__(self, capabilities):
+        self.port = debugger_port(capabilities)
+        self.pid = None
+
+    def rss(self):
+        """Returns the browser tree's resident memory in bytes, or None if it cannot be measured"""
+        if psutil is None or self.port is None:
+            return None
+        try:
+            if self.pid is None:
+                self.pid = find_browser_pid(self.port)
+            return tree_rss(self.pid) if self.pid is not None else None
+        except psutil.Error:
+            self.pid = None
+            return None
+
+
+class MemoryStats:
+    """Browser-tree RSS samples of one run, across browser restarts"""
+    def __init__(self):
+        self.samples = []
+        self.browser = None
+
+    def track(self, capabilities):
+        """Measures the browser of these capabilities from now on. Call after every (re)launch."""
+        self.browser = BrowserMemory(capabilities)
+
+    def sample(self):
+        """Takes a sample and returns it in bytes, or None"""
+        rss = self.browser.rss() if self.browser else None
+        if rss:
+            self.samples.append(rss)
+        return rss
+
+    def summary(self):
+        """Returns {peak_mb, avg_mb, samples}, or None without samples"""
+        if not self.samples:
+            return None
+        return {
+            'peak_mb': round(max(self.samples) / MIB, 1),
+            'avg_mb': round(sum(self.samples) / len(self.samples) / MIB, 1),
+            'samples': len(self.samples),
+        }
+
+    def print_summary(self):
+        summary = self.summary()
+        if summary is None:
+            if psutil is None:
+                print("Browser memory not measured (pip install psutil)")
+            return
+        print(f"Browser memory: peak {summary['peak_mb']} MiB, average {summary['avg_mb']} MiB "
+              f"({summary['samples']} samples)")
+
+
+def recycle_limits(config, recycle_after=None, max_rss_mb=None):
+    """
+    Returns (recycle_after, max_rss_mb) for a run: the values given, else the low-memory
+    defaults if config.low_memory, else None. 0 disables a limit.
+    """
+    if recycle_after is None and config.low_memory:
+        recycle_after = LOW_MEMORY_RECYCLE_AFTER
+    if max_rss_mb is None and config.low_memory:
+        max_rss_mb = LOW_MEMORY_MAX_RSS_MB
+    return recycle_after or None, max_rss_mb or None
+
+
+def recycle_reason(runs, rss, recycle_after=None, max_rss_mb=None):
+    """Returns why the browser should be restarted now, or None"""
+    if recycle_after and runs >= recycle_after:
+        return f"{runs} searches since launch"
+    if max_rss_mb and rss and rss / MIB > max_rss_mb:
+        return f"{rss / MIB:.0f} MiB above the {max_rss_mb} MiB limit"
+    return None
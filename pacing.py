@@ -0,0 +1,199 @@
+"""
+Central pacing for search() and quest().
+
+Every deliberate pause goes through a Pacer, which picks the delay from a named profile
+and sleeps on a clock. Profiles make the total run time predictable and tunable, and the
+virtual clock lets orchestration code and benchmarks run without really waiting.
+"""
+import random
+import threading
+import time
+
+# Delay ranges in seconds, as (min, max), for every named pause
+PROFILES = {
+    'normal': {
+        'keystroke': (0.05, 0.2),          # between typed characters
+        'scroll': (1.0, 3.0),              # after each scroll on a results page
+        'before_next_search': (2.0, 4.0),  # after scrolling, before the next term
+        'page_dwell': (0.0, 0.0),          # minimum time on a page once it is ready
+        'rewards_settle': (2.0, 3.0),      # after the rewards dashboard loads
+        'card_click': (2.0, 4.0),          # after clicking a card
+        'activity_dwell': (3.0, 5.0),      # on an activity tab before closing it
+        'tab_open': (0.5, 1.0),            # between card clicks when activity tabs are batched
+        'after_card': (2.0, 3.0),          # after returning from an activity
+        'profile_gap': (3.0, 3.0),         # between profiles
+    },
+    'fast': {
+        'keystroke': (0.02, 0.08),
+        'scroll': (0.5, 1.0),
+        'before_next_search': (0.5, 1.5),
+        'page_dwell': (0.0, 0.0),
+        'rewards_settle': (0.5, 1.0),
+        'card_click': (0.5, 1.5),
+        'activity_dwell': (1.5, 2.5),
+        'tab_open': (0.2, 0.5),
+        'after_card': (0.5, 1.0),
+        'profile_gap': (1.0, 1.0),
+    },
+    'test': {
+        'keystroke': (0.0, 0.0),
+        'scroll': (0.0, 0.0),
+        'before_next_search': (0.0, 0.0),
+        'page_dwell': (0.0, 0.0),
+        'rewards_settle': (0.0, 0.0),
+        'card_click': (0.0, 0.0),
+        'activity_dwell': (0.0, 0.0),
+        'tab_open': (0.0, 0.0),
+        'after_card': (0.0, 0.0),
+        'profile_gap': (0.0, 0.0),
+    },
+}
+
+DEFAULT_PROFILE = 'normal'
+
+SCROLLS_PER_SEARCH = 3
+
+
+class RealClock:
+    """Wall-clock time, sleeping for real"""
+    def now(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class VirtualClock:
+    """Clock that only moves when slept on, so paced code runs instantly"""
+    def __init__(self, start=0.0):
+        self._now = start
+        self._lock = threading.Lock()
+
+    def now(self):
+        with self._lock:
+            return self._now
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            with self._lock:
+                self._now += seconds
+
+
+class Pacer:
+    """
+    Picks and applies delays from a named profile.
+
+    Args:
+        profile (str): Name of a profile in PROFILES.
+        clock (RealClock or VirtualClock, optional): Clock to sleep on. Defaults to RealClock().
+        overrides (dict, optional): Delay ranges that replace the profile's, by name.
+    """
+    def __init__(self, profile=DEFAULT_PROFILE, clock=None, overrides=None):
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown pacing profile: {profile}")
+        self.profile = profile
+        self.clock = clock or RealClock()
+        self.delays = dict(PROFILES[profile])
+        if overrides:
+            self.delays.update(overrides)
+
+    @property
+    def is_virtual(self):
+        return isinstance(self.clock, VirtualClock)
+
+    def delay_range(self, name):
+        """Returns the (min, max) range for the named delay"""
+        return self.delays[name]
+
+    def sample(self, name):
+        """Returns a random delay for name without sleeping"""
+        return random.uniform(*self.delays[name])
+
+    def samples(self, name, count):
+        """Returns count random delays for name without sleeping"""
+        return [self.sample(name) for _ in range(count)]
+
+    def in_page_samples(self, name, count):
+        """
+        Returns count delays for name to be waited out inside the page rather than on the clock
+        (see actions.py). On a virtual clock the time is added to the clock instead and the
+        page gets zero delays.
+        """
+        delays = self.samples(name, count)
+        if self.is_virtual:
+            self.clock.sleep(sum(delays))
+            return [0.0] * count
+        return delays
+
+    def pause(self, name):
+        """Sleeps for a random delay for name and returns it"""
+        seconds = self.sample(name)
+        self.clock.sleep(seconds)
+        return seconds
+
+    async def pause_async(self, name):
+        """Like pause(), but awaits instead of blocking the thread, for the asyncio engine"""
+        import asyncio  # only the engine needs it, keep it out of main.py's startup
+
+        seconds = self.sample(name)
+        if self.is_virtual:
+            self.clock.sleep(seconds)
+        elif seconds > 0:
+            await asyncio.sleep(seconds)
+        return seconds
+
+    def expected(self, name):
+        """Average delay for name"""
+        low, high = self.delays[name]
+        return (low + high) / 2
+
+    def expected_duration(self, plan):
+        """
+        Returns the expected total pacing time of a planned run, in seconds.
+
+        Args:
+            plan (dict): Number of times each named delay will be applied, e.g. from search_plan().
+        """
+        return sum(self.expected(name) * count for name, count in plan.items())
+
+
+def get_pacer(pacing=None):
+    """Returns a Pacer for a profile name, passes a Pacer through, and defaults to 'normal'"""
+    if isinstance(pacing, Pacer):
+        return pacing
+    return Pacer(pacing or DEFAULT_PROFILE)
+
+
+def search_plan(terms, navigation='home'):
+    """Counts the delays search() will apply for terms"""
+    plan = {
+        'scroll': SCROLLS_PER_SEARCH * len(terms),
+        'before_next_search': len(terms),
+        'page_dwell': len(terms),  # on each results page
+    }
+    if navigation == 'home':
+        plan['keystroke'] = sum(len(term) for term in terms)
+        plan['page_dwell'] += len(terms)  # and on the home page before typing
+    return plan
+
+
+def quest_plan(num_cards, parallel_tabs=1):
+    """Counts the delays quest() will apply for num_cards cards"""
+    if parallel_tabs > 1:
+        batches = -(-num_cards // parallel_tabs)
+        return {
+            'tab_open': num_cards,
+            'activity_dwell': batches,
+            'after_card': batches,
+        }
+    return {
+        'card_click': num_cards,
+        'activity_dwell': num_cards,
+        'after_card': num_cards,
+    }
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    return f"{minutes}m {seconds:02d}s" if minutes else f"{seconds}s"
@@ -0,0 +1,25 @@
+"""
+Where Edge Automator keeps files between runs.
+"""
+import os
+
+APP_NAME = 'EdgeAutomator'
+
+
+def data_dir():
+    """
+    Returns the per-user data directory, creating it if needed.
+    Set EDGE_AUTOMATOR_DATA_DIR to use a different directory.
+    """
+    path = os.environ.get('EDGE_AUTOMATOR_DATA_DIR')
+    if not path:
+        base = (os.environ.get('LOCALAPPDATA') or os.environ.get('XDG_DATA_HOME')
+                or os.path.join(os.path.expanduser('~'), '.local', 'share'))
+        path = os.path.join(base, APP_NAME)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def data_file(name):
+    """Returns the path of a file in the data directory"""
+    return os.path.join(data_dir(), name)
@@ -0,0 +1,118 @@
+"""
+Pre-flight check of how many searches a profile still needs today.
+
+The Rewards dashboard reads its point counters from a JSON endpoint. Fetching that endpoint
+once in the profile's browser gives the desktop and mobile search progress, from which
+search() sizes its run to exactly the remaining work.
+"""
+import os
+
+import actions
+
+# Endpoint the dashboard reads its counters from. Can be overridden, e.g. to point at the local benchmark fixtures
+USERINFO_URL = os.environ.get('EDGE_AUTOMATOR_USERINFO_URL', 'https://rewards.bing.com/api/getuserinfo?type=1')
+
+# Points earned per counted search
+POINTS_PER_SEARCH = 3
+
+# Counter names in the dashboard data, by BrowserConfig device
+COUNTER_KEYS = {
+    'desktop': 'pcSearch',
+    'phone': 'mobileSearch',
+}
+
+# How long the in-page fetch of the counters may take, in seconds
+FETCH_TIMEOUT = 15
+
+# Fetches the counters with the profile's cookies and hands back the parsed JSON. The page's
+# own text is never read, so whatever Edge's JSON viewer renders around it does not matter.
+FETCH_COUNTERS_SCRIPT = """
+const url = arguments[0];
+const done = arguments[arguments.length - 1];
+fetch(url, {credentials: 'include', headers: {Accept: 'application/json'}})
+    .then(response => response.ok ? response.json() : Promise.reject(new Error(`HTTP ${response.status}`)))
+    .then(data => done({data: data}), error => done({error: String(error)}));
+"""
+
+
+class SearchProgress:
+    """
+    Search points earned today on one device.
+
+    Args:
+        device (str): 'desktop' or 'phone'.
+        points (int): Points earned so far.
+        max_points (int): Points available today.
+        points_per_search (int): Points one search earns.
+    """
+    def __init__(self, device, points, max_points, points_per_search=POINTS_PER_SEARCH):
+        self.device = device
+        self.points = points
+        self.max_points = max_points
+        self.points_per_search = points_per_search
+
+    @property
+    def remaining_points(self):
+        return max(0, self.max_points - self.points)
+
+    @property
+    def remaining_searches(self):
+        return -(-self.remaining_points // self.points_per_search)
+
+    def __str__(self):
+        return (f"{self.device} searches: {self.points}/{self.max_points} points, "
+                f"{self.remaining_searches} search(es) left")
+
+
+def parse_counters(data, points_per_search=POINTS_PER_SEARCH):
+    """
+    Returns {device: SearchProgress} from the dashboard's user info. Devices without a
+    counter (e.g. mobile on accounts that cannot earn mobile points yet) are left out.
+    """
+    dashboard = data.get('dashboard', data)
+    counters = dashboard['userStatus']['counters']
+    progress = {}
+    for device, key in COUNTER_KEYS.items():
+        entries = counters.get(key)
+        if not entries:
+            continue
+        points = sum(int(entry.get('pointProgress', 0)) for entry in entries)
+        max_points = sum(int(entry.get('pointProgressMax', 0)) for entry in entries)
+        progress[device] = SearchProgress(device, points, max_points, points_per_search)
+    return progress
+
+
+def fetched_data(outcome):
+    """Returns the data FETCH_COUNTERS_SCRIPT handed back, or raises ValueError with its error"""
+    if not isinstance(outcome, dict) or 'data' not in outcome:
+        error = outcome.get('error') if isinstance(outcome, dict) else None
+        raise ValueError(error or "no data from the dashboard")
+    return outcome['data']
+
+
+def read_search_progress(driver, userinfo_url=None, track=False):
+    """
+    Fetches the dashboard's user info in driver and returns {device: SearchProgress},
+    or None if it could not be read (e.g. not signed in).
+
+    The browser first opens userinfo_url itself, so the fetch runs on the dashboard's origin
+    and sends the profile's cookies.
+
+    Args:
+        driver (WebDriver): Driver running on the profile to check.
+        userinfo_url (str, optional): Defaults to USERINFO_URL.
+        track (bool): Track the navigation, needed with the 'none' page load strategy (see waits.load).
+    """
+    import waits  # selenium, only needed with a driver
+
+    userinfo_url = userinfo_url or USERINFO_URL
+    try:
+        waits.load(driver, userinfo_url, timeout=15, track=track)
+        outcome = actions.run_async_script(driver, FETCH_COUNTERS_SCRIPT, FETCH_TIMEOUT, userinfo_url)
+        progress = parse_counters(fetched_data(outcome))
+    except Exception as e:
+        print(f"Could not read search progress from the Rewards dashboard: {e}")
+        return None
+    for counter in progress.values():
+        print(f"Rewards dashboard: {counter}")
+    return progress
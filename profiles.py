@@ -0,0 +1,29 @@
+import os
+
+
+def get_edge_profiles():
+    """
+    Scans the Edge user data directory and returns a list of available profiles.
+    Returns a dictionary with profile names as keys and paths as values.
+    """
+    profiles = {}
+
+    # Path to Edge user data directory
+    edge_data_path = os.path.join(os.environ.get('LOCALAPPDATA', ''), 'Microsoft', 'Edge', 'User Data')
+
+    if os.path.exists(edge_data_path):
+        # Add Default profile
+        default_profile_path = os.path.join(edge_data_path, 'Default')
+        if os.path.exists(default_profile_path) and os.path.isdir(default_profile_path):
+            profiles['Default'] = default_profile_path
+
+        # Look for additional profiles (Profile 1, Profile 2, etc.)
+        for item in os.listdir(edge_data_path):
+            if item.startswith('Profile ') and os.path.isdir(os.path.join(edge_data_path, item)):
+                profiles[item] = os.path.join(edge_data_path, item)
+
+        print(f"Found {len(profiles)} Edge profiles")
+    else:
+        print(f"Edge user data directory not found at: {edge_data_path}")
+
+    return profiles
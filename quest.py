@@ -1,63 +1,167 @@
-from selenium import webdriver
-from selenium.webdriver.edge.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 import time
-import random
 import os
 
-def quest(isPhone=False, progress_callback=None, stop_event=None, profile_path=None):
+from browser import resolve_config
+import cards as card_state
+import errors as run_errors
+import events as run_events
+import journal as run_journal
+import memory as browser_memory
+import pacing
+import startup
+import waits
+
+# Dashboard the quests run against. Can be overridden, e.g. to point at the local benchmark fixtures
+REWARDS_URL = os.environ.get('EDGE_AUTOMATOR_REWARDS_URL', 'https://rewards.bing.com/')
+
+
+def journal_unit(container_selector, key):
+    """Journal unit of a clicked card. Keys are only unique within a card group."""
+    return f"{container_selector} {key}"
+
+
+def pending_cards(states, container_selector, description, clicked_today):
+    """
+    Returns the keys of the cards still to click, in page order: those that are neither
+    completed on the dashboard nor in clicked_today, the journal units of earlier clicks.
+
+    Args:
+        states (list): Card states from cards.scan_cards().
+        container_selector (str): CSS selector of the card group the states are from.
+        description (str): Name of the card group, for the messages.
+        clicked_today (set): Journal units of the cards clicked earlier today.
+    """
+    print(f"Found {len(states)} mee-card elements in {description}")
+    pending = [state['key'] for state in states if not state['completed']]
+    if len(pending) < len(states):
+        print(f"Skipping {len(states) - len(pending)} already completed card(s) in {description}")
+    journaled = [key for key in pending if journal_unit(container_selector, key) in clicked_today]
+    if journaled:
+        print(f"Skipping {len(journaled)} card(s) in {description} clicked earlier today")
+        pending = [key for key in pending if key not in journaled]
+    return pending
+
+
+def quest(isPhone=None, progress_callback=None, stop_event=None, profile_path=None, session_pool=None,
+          rewards_url=None, pacing_profile=None, parallel_tabs=1, browser_config=None, resume=False,
+          journal=None, events=None, error_policy=None):
     """
     Opens Edge browser, navigates to rewards.bing.com, and completes quests.
+    Cards that are already completed are skipped.
 
     Args:
-        isPhone (bool): If True, uses mobile user agent and viewport size for iPhone 10
+        isPhone (bool, optional): If True, uses mobile user agent and viewport size for iPhone 10;
+            if False, desktop. Defaults to the device of browser_config.
         progress_callback (callable, optional): Function to call with progress updates (0-100).
         stop_event (threading.Event, optional): Event to check for stopping the quest.
         profile_path (str, optional): Path to Edge user profile. If None, uses default profile.
+        session_pool (SessionPool, optional): Pool to borrow a warm driver from. If None, launches
+            a new browser and quits it when done.
+        rewards_url (str, optional): Rewards dashboard to complete quests on. Defaults to REWARDS_URL.
+        pacing_profile (str or Pacer, optional): Pacing profile name from pacing.PROFILES, or a Pacer.
+            Defaults to 'normal'.
+        parallel_tabs (int): How many activity tabs may be open at once. Above 1, cards are clicked
+            in batches whose tabs load and dwell together and are then closed in bulk.
+        browser_config (BrowserConfig, optional): How to launch Edge (headless, extra flags, ...).
+            isPhone and profile_path, if given, take precedence over its device and profile.
+        resume (bool): If True, also skips cards the journal says were clicked today on this
+            profile, even if the dashboard does not show them as completed yet.
+        journal (Journal, optional): Journal clicked cards are recorded in. Defaults to the one
+            in the data directory.
+        events (Emitter, optional): Emitter the run's phase events go to, on top of the process-wide
+            event stream. A p50/p95 summary per phase is printed at the end either way.
+        error_policy (ErrorPolicy, optional): Retry budgets and circuit breaker for failed cards.
+            Defaults to a fresh errors.ErrorPolicy().
+
+    Returns:
+        int: Number of cards clicked.
+
+    Raises:
+        ProfileAborted: If the run gave up on the profile: it is signed out, the browser is gone,
+            or cards kept failing. The browser is closed or handed back first.
     """
-    edge_options = Options()
-
-    if isPhone:
-        iphone_user_agent = (
-            "Mozilla/5.0 (iPhone; CPU iPhone OS 13_2_3 like Mac OS X) "
-            "AppleWebKit/605.1.15 (KHTML, like Gecko) Version/13.0.3 Mobile/15E148 Safari/604.1"
-        )
-        edge_options.add_argument(f"--user-agent={iphone_user_agent}")
-        edge_options.add_argument("--window-size=375,812")
-    else:
-        edge_options.add_argument("--start-maximized")
+    rewards_url = rewards_url or REWARDS_URL
+    pacer = pacing.get_pacer(pacing_profile)
+    parallel_tabs = max(1, parallel_tabs)
+
+    # Work out how to launch Edge
+    config = resolve_config(browser_config, isPhone, profile_path)
+
+    # Every clicked card is recorded, so an interrupted run can be resumed
+    journal = run_journal.get_journal(journal)
+    journal_profile = run_journal.profile_key(config.profile_path)
+    clicked_today = set(journal.units(journal_profile, run_journal.QUEST)) if resume else set()
+    if clicked_today:
+        print(f"Resuming: {len(clicked_today)} card(s) already clicked today")
+
+    # Time every phase of the run
+    run_stats = run_events.Aggregator()
+    events = run_events.get_emitter(events, sinks=[run_stats], task='quest',
+                                    profile=run_events.profile_label(config.profile_path), device=config.device)
+
+    # Measure the browser's memory as cards open and close tabs
+    memory_stats = browser_memory.MemoryStats()
+
+    # Give up on the profile quickly once cards keep failing
+    error_policy = error_policy or run_errors.ErrorPolicy()
 
+    cards_clicked = 0
     driver = None
     try:
-        # Add user data directory if profile path is specified
-        if profile_path:
-            edge_options.add_argument(f"--user-data-dir={os.path.dirname(profile_path)}")
-            edge_options.add_argument(f"--profile-directory={os.path.basename(profile_path)}")
-            print(f"Using Edge profile: {profile_path}")
-
-        driver = webdriver.Edge(options=edge_options)
+        with events.span('driver_launch', pooled=session_pool is not None):
+            if session_pool:
+                driver = session_pool.acquire(config)
+            else:
+                driver = config.create_driver()
+        memory_stats.track(driver.capabilities)
         main_window = None
+        page_token = None
 
         def navigate_to_rewards():
-            driver.get("https://rewards.bing.com/")
-            print("Navigated to rewards.bing.com")
-            WebDriverWait(driver, 20).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "body"))
-            )
-            time.sleep(random.uniform(2, 3))
+            nonlocal page_token
+            navigation_started = time.monotonic()
+            with events.span('navigation', page='rewards'):
+                waits.load(driver, rewards_url, timeout=20, track=config.page_load_strategy == 'none')
+                WebDriverWait(driver, 20).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, "body"))
+                )
+            startup.record_first_navigation(driver, navigation_started)
+            print(f"Navigated to {rewards_url}")
+            # Tag the document so later checks can tell whether it was replaced
+            page_token = card_state.mark_page(driver)
+            with events.span('pause', delay='rewards_settle'):
+                pacer.pause('rewards_settle')
 
-            # Update progress if callback provided
-            if progress_callback:
-                progress_callback(10)
+        def recover():
+            """Gets back to the dashboard, reloading it only if it actually went away"""
+            try:
+                if driver.current_window_handle != main_window:
+                    driver.switch_to.window(main_window)
+            except Exception:
+                pass
+            if card_state.page_changed(driver, page_token):
+                with events.span('recovery'):
+                    navigate_to_rewards()
+
+        def handle_failure(error):
+            """Gives up on the profile (raising ProfileAborted) or backs off before the next card"""
+            kind, backoff = error_policy.failure(error, run_errors.current_url(driver))
+            with events.span('backoff', kind=kind):
+                pacer.clock.sleep(backoff)
+            return kind
 
         def handle_new_tab():
             try:
                 WebDriverWait(driver, 10).until(lambda d: len(d.window_handles) > 1)
                 new_window = [w for w in driver.window_handles if w != main_window][0]
                 driver.switch_to.window(new_window)
-                time.sleep(random.uniform(3, 5))  # Wait for activity to load
+                config.apply_blocking(driver)
+                with events.span('activity_dwell'):
+                    pacer.pause('activity_dwell')  # Wait for activity to load
                 driver.close()
                 driver.switch_to.window(main_window)
                 WebDriverWait(driver, 10).until(
@@ -67,42 +171,138 @@ def quest(isPhone=False, progress_callback=None, stop_event=None, profile_path=N
             except Exception:
                 return False
 
-        def click_cards_in_container(container, description, progress_start, progress_end):
-            cards = container.find_elements(By.TAG_NAME, "mee-card")
-            print(f"Found {len(cards)} mee-card elements in {description}")
+        def open_activity_tabs(container_selector, description, keys):
+            """
+            Clicks every card in keys, leaving their activity tabs open. Returns (keys clicked, error):
+            a failing click ends the batch, and error is what it raised, else None.
+            """
+            clicked = []
+            try:
+                for key in keys:
+                    card = card_state.find_card(driver, container_selector, key)
+                    if card is None:
+                        print(f"mee-card {key} is no longer in {description}, skipping")
+                        continue
+                    tabs_before = driver.window_handles
+                    WebDriverWait(driver, 10).until(EC.element_to_be_clickable(card))
+                    card.click()
+                    clicked.append(key)
+                    print(f"Clicked mee-card {key} in {description}")
+                    try:
+                        WebDriverWait(driver, 10).until(lambda d: len(d.window_handles) > len(tabs_before))
+                        new_tabs = [handle for handle in driver.window_handles if handle not in tabs_before]
+                        config.apply_blocking_to_tabs(driver, new_tabs, main_window)
+                    except TimeoutException:
+                        # No tab opened, reload rewards page only if the click navigated away
+                        recover()
+                    pacer.pause('tab_open')
+            except Exception as e:
+                return clicked, e
+            return clicked, None
+
+        def close_activity_tabs():
+            for handle in driver.window_handles:
+                if handle != main_window:
+                    driver.switch_to.window(handle)
+                    driver.close()
+            driver.switch_to.window(main_window)
+
+        def click_cards_in_container(container_selector, description, progress_start, progress_end):
+            nonlocal cards_clicked
+            # Read the state of every card in one call and only act on the incomplete ones.
+            # Cards are tracked by key and re-resolved before each click, so reloads never leave stale elements.
+            with events.span('card_scan', group=description):
+                states = card_state.scan_cards(driver, container_selector)
+            pending = pending_cards(states, container_selector, description, clicked_today)
+            expected = pacer.expected_duration(pacing.quest_plan(len(pending), parallel_tabs))
+            print(f"Expected pacing time ({pacer.profile} profile): {pacing.format_duration(expected)}")
 
             # Calculate progress increment per card
-            progress_increment = (progress_end - progress_start) / max(1, len(cards))
+            progress_increment = (progress_end - progress_start) / max(1, len(pending))
+
+            if parallel_tabs > 1:
+                # Open a batch of activity tabs, let them load and dwell together, then close them all
+                for start in range(0, len(pending), parallel_tabs):
+                    if stop_event and stop_event.is_set():
+                        print(f"Quest stopped by user during {description}")
+                        return False
+
+                    batch = pending[start:start + parallel_tabs]
+                    try:
+                        with events.span('tab_open', cards=len(batch)):
+                            clicked, error = open_activity_tabs(container_selector, description, batch)
+                            # A clicked card is done, whatever happens to the rest of the batch
+                            cards_clicked += len(clicked)
+                            for key in clicked:
+                                journal.record(journal_profile, run_journal.QUEST, journal_unit(container_selector, key))
+                            if error is not None:
+                                raise error
+                        print(f"Waiting for {len(driver.window_handles) - 1} activity tab(s) to load")
+                        with events.span('activity_dwell', cards=len(clicked)):
+                            pacer.pause('activity_dwell')
+                        memory_stats.sample()  # every tab of the batch is open now
+                        with events.span('tab_close'):
+                            close_activity_tabs()
+                        with events.span('pause', delay='after_card'):
+                            pacer.pause('after_card')
+                        error_policy.success()
+                    except Exception as e:
+                        print(f"Error processing mee-card batch in {description}: {e}")
+                        handle_failure(e)
+                        try:
+                            close_activity_tabs()
+                        except Exception:
+                            pass
+                        recover()
 
-            for i, card in enumerate(cards):
+                    # Update progress if callback provided
+                    if progress_callback:
+                        current_progress = progress_start + (start + len(batch)) * progress_increment
+                        progress_callback(min(progress_end, int(current_progress)))
+                return True
+
+            for done, key in enumerate(pending):
                 # Check if we should stop
                 if stop_event and stop_event.is_set():
                     print(f"Quest stopped by user during {description}")
                     return False
 
+                card_started = time.monotonic()
+                outcome = 'error'
                 try:
-                    driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", card)
-                    WebDriverWait(driver, 10).until(EC.element_to_be_clickable(card))
-                    card.click()
-                    print(f"Clicked mee-card #{i + 1} in {description}")
-                    time.sleep(random.uniform(2, 4))
+                    with events.span('card_click'):
+                        card = card_state.find_card(driver, container_selector, key)
+                        if card is None:
+                            print(f"mee-card {key} is no longer in {description}, skipping")
+                            outcome = 'gone'
+                            continue
+                        WebDriverWait(driver, 10).until(EC.element_to_be_clickable(card))
+                        card.click()
+                        print(f"Clicked mee-card {key} ({done + 1}/{len(pending)}) in {description}")
+                        pacer.pause('card_click')
 
+                    memory_stats.sample()
                     if not handle_new_tab():
-                        # fallback: reload rewards page if no new tab opened
-                        driver.get("https://rewards.bing.com/")
-                        WebDriverWait(driver, 15).until(
-                            EC.presence_of_element_located((By.CSS_SELECTOR, "body"))
-                        )
-                    time.sleep(random.uniform(2, 3))
+                        # fallback: no new tab opened, reload rewards page only if the click navigated away
+                        recover()
+                    with events.span('pause', delay='after_card'):
+                        pacer.pause('after_card')
+                    cards_clicked += 1
+                    outcome = 'ok'
+                    error_policy.success()
+                    journal.record(journal_profile, run_journal.QUEST, journal_unit(container_selector, key))
 
                     # Update progress if callback provided
                     if progress_callback:
-                        current_progress = progress_start + (i + 1) * progress_increment
+                        current_progress = progress_start + (done + 1) * progress_increment
                         progress_callback(min(progress_end, int(current_progress)))
 
                 except Exception as e:
-                    print(f"Error clicking mee-card #{i + 1} in {description}: {e}")
-                    navigate_to_rewards()
+                    print(f"Error clicking mee-card {key} in {description}: {e}")
+                    outcome = handle_failure(e)
+                    recover()
+                finally:
+                    events.emit('card', time.monotonic() - card_started, outcome=outcome, group=description, key=key)
 
             return True
 
@@ -110,54 +310,73 @@ def quest(isPhone=False, progress_callback=None, stop_event=None, profile_path=N
         navigate_to_rewards()
         main_window = driver.current_window_handle
 
+        # Update progress if callback provided
+        if progress_callback:
+            progress_callback(10)
+
         # Check if we should stop before starting
         if stop_event and stop_event.is_set():
             print("Quest stopped by user before starting")
-            return
+            return cards_clicked
 
         # FIRST TASK: Click mee-cards in the main div.m-card-group container
         try:
-            main_card_group = WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "div.m-card-group"))
+            WebDriverWait(driver, 15).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, card_state.MAIN_GROUP_SELECTOR))
             )
-            if not click_cards_in_container(main_card_group, "main card group", 20, 60):
-                return  # Stop if requested
+            if not click_cards_in_container(card_state.MAIN_GROUP_SELECTOR, "main card group", 20, 60):
+                return cards_clicked  # Stop if requested
+        except run_errors.ProfileAborted:
+            raise
         except Exception as e:
             print(f"Failed to find or click cards in main card group: {e}")
+            handle_failure(e)
             if progress_callback:
                 progress_callback(60)  # Skip to next section's progress
 
         # Check if we should stop before second task
         if stop_event and stop_event.is_set():
             print("Quest stopped by user after first task")
-            return
+            return cards_clicked
 
         # SECOND TASK: Click mee-cards inside nested #more-activities section
         try:
-            outer_div = WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.ID, "more-activities"))
+            WebDriverWait(driver, 15).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, card_state.MORE_ACTIVITIES_GROUP_SELECTOR))
             )
-            mee_card_group = outer_div.find_element(By.CSS_SELECTOR, "mee-card-group#more-activities")
-            nested_card_group = mee_card_group.find_element(By.CSS_SELECTOR, "div.m-card-group")
-            if not click_cards_in_container(nested_card_group, "#more-activities nested card group", 60, 95):
-                return  # Stop if requested
+            if not click_cards_in_container(card_state.MORE_ACTIVITIES_GROUP_SELECTOR,
+                                            "#more-activities nested card group", 60, 95):
+                return cards_clicked  # Stop if requested
+        except run_errors.ProfileAborted:
+            raise
         except Exception as e:
             print(f"Failed to find or click cards in #more-activities nested group: {e}")
+            handle_failure(e)
             if progress_callback:
                 progress_callback(95)  # Skip to end progress
 
         print("All tasks completed successfully.")
+        print(f"Page-load profile: {config.describe_load_profile()}")
 
         # Final progress update
         if progress_callback:
             progress_callback(100)
 
+    except run_errors.ProfileAborted as e:
+        print(f"Quest aborted, {e}")
+        raise
     except Exception as e:
         print(f"Critical error: {e}")
     finally:
         if driver:
-            driver.quit()
+            if session_pool:
+                session_pool.release(driver)
+            else:
+                driver.quit()
         print("Browser closed. Quest completed.")
+        run_events.report_run(events, run_stats, memory_stats, error_policy)
+
+    return cards_clicked
 
 if __name__ == "__main__":
     import sys
@@ -1,214 +1,212 @@
-from selenium import webdriver
-from selenium.webdriver.edge.service import Service
-from selenium.webdriver.edge.options import Options
-from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
 
-import random
 import time
 import os
-from datetime import datetime
-
-def search(isPhone=False, num_searches_input=None, progress_callback=None, stop_event=None, profile_path=None):
+from urllib.parse import quote_plus
+
+import actions
+import corpus
+import emulation
+import errors as run_errors
+import events as run_events
+import journal as run_journal
+import memory as browser_memory
+from browser import resolve_config
+import pacing
+import preflight
+from session import SessionPool
+import startup
+import waits
+
+# Site the searches run against. Can be overridden, e.g. to point at the local benchmark fixtures
+BING_URL = os.environ.get('EDGE_AUTOMATOR_BING_URL', 'https://www.bing.com')
+
+# How each search reaches its results page:
+#   home   - load the home page, type the query into the search box and submit it
+#   direct - open the results URL for the query straight away, skipping the home page
+NAVIGATION_MODES = ('home', 'direct')
+
+
+def results_url(bing_url, term):
+    """Returns the results page URL for term, as if it had been typed into the home page"""
+    return f"{bing_url.rstrip('/')}/search?q={quote_plus(term)}&form=QBLH"
+
+
+def ask_search_count():
+    """Asks the user how many searches to perform"""
+    while True:
+        try:
+            num_searches = int(input("How many searches would you like to perform? "))
+            if num_searches >= 1:
+                return num_searches
+            print("Please enter a number of at least 1")
+        except ValueError:
+            print("Invalid input. Please enter a number.")
+
+
+def search(isPhone=None, num_searches_input=None, progress_callback=None, stop_event=None, profile_path=None,
+           session_pool=None, min_dwell=None, bing_url=None, batch_actions=False,
+           navigation='home', pacing_profile=None, browser_config=None, terms_file=None, avoid_recent=True,
+           resume=False, journal=None, auto_size=False, userinfo_url=None, events=None, recycle_after=None,
+           max_rss_mb=None, emulate=False, error_policy=None):
     """
     Opens Edge browser, navigates to Bing.com, and performs searches with a list of search terms.
     Implements human-like behavior by scrolling 3 times with delays between scrolls before moving to the next search term.
     Allows user to specify the number of searches to perform and randomizes search terms.
 
     Args:
-        isPhone (bool): If True, uses mobile user agent and viewport size for iPhone 10
+        isPhone (bool, optional): If True, uses mobile user agent and viewport size for iPhone 10;
+            if False, desktop. Defaults to the device of browser_config.
         num_searches_input (int, optional): Number of searches to perform. If None, will prompt user.
         progress_callback (callable, optional): Function to call with progress updates (0-100).
         stop_event (threading.Event, optional): Event to check for stopping the search.
         profile_path (str, optional): Path to Edge user profile. If None, uses default profile.
+        session_pool (SessionPool, optional): Pool to borrow a warm driver from. If None, launches
+            a new browser and quits it when done.
+        min_dwell (float or tuple, optional): Minimum seconds to stay on each loaded page, or a
+            (min, max) range. Page waits return as soon as the page is ready; this only adds pacing on top.
+            Defaults to the pacing profile's 'page_dwell'.
+        bing_url (str, optional): Home page to search from. Defaults to BING_URL.
+        batch_actions (bool): If True, types and submits each query, and does the scrolling, as one
+            in-page script each instead of one WebDriver call per keystroke and scroll.
+        navigation (str): One of NAVIGATION_MODES. 'direct' opens each results page by URL, which
+            halves the page loads per search.
+        pacing_profile (str or Pacer, optional): Pacing profile name from pacing.PROFILES, or a Pacer.
+            Defaults to 'normal'.
+        browser_config (BrowserConfig, optional): How to launch Edge (headless, extra flags, ...).
+            isPhone and profile_path, if given, take precedence over its device and profile.
+        terms_file (str, optional): Text file with one search term per line to pick from.
+            Defaults to corpus.TERMS_FILE, else the built-in terms.
+        avoid_recent (bool): If True, skips terms used recently by any run on any profile
+            while there are others left, and records the picked terms as used.
+        resume (bool): If True, searches already recorded in the journal today for this profile and
+            device count towards num_searches, so an interrupted run only does the rest.
+        journal (Journal, optional): Journal completed searches are recorded in. Defaults to the one
+            in the data directory.
+        auto_size (bool): If True, first reads the profile's search progress from the Rewards dashboard
+            and performs exactly the searches still needed today on this device. num_searches_input,
+            if given, is then an upper limit. Falls back to num_searches_input if progress cannot be read.
+        userinfo_url (str, optional): Dashboard data to read progress from. Defaults to preflight.USERINFO_URL.
+        events (Emitter, optional): Emitter the run's phase events go to, on top of the process-wide
+            event stream. A p50/p95 summary per phase is printed at the end either way.
+        recycle_after (int, optional): Restart the browser after this many searches. Defaults to
+            browser.LOW_MEMORY_RECYCLE_AFTER in low-memory mode, else never; 0 disables it.
+        max_rss_mb (int, optional): Restart the browser once its process tree uses more than this many
+            MiB (needs psutil). Defaults to browser.LOW_MEMORY_MAX_RSS_MB in low-memory mode, else never.
+        emulate (bool): If True, launches (or borrows) a desktop browser and switches it to the device
+            with DevTools emulation, so that desktop and phone runs can share one browser.
+        error_policy (ErrorPolicy, optional): Retry budgets and circuit breaker for failed searches.
+            Defaults to a fresh errors.ErrorPolicy().
+
+    Returns:
+        int: Number of searches that completed.
+
+    Raises:
+        ProfileAborted: If the run gave up on the profile: it is signed out, the browser is gone,
+            or searches kept failing. The browser is closed or handed back first.
     """
-    # Setup Edge options
-    edge_options = Options()
-
-    if isPhone:
-        # iPhone 10 user agent
-        iphone_user_agent = "Mozilla/5.0 (iPhone; CPU iPhone OS 13_2_3 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/13.0.3 Mobile/15E148 Safari/604.1"
-        edge_options.add_argument(f"--user-agent={iphone_user_agent}")
-        # Set viewport size to match iPhone 10
-        edge_options.add_argument("--window-size=375,812")  # Scaled down for browser
-    else:
-        edge_options.add_argument("--start-maximized")
-
-    # List of search terms
-    search_terms = [
-        # Technology (10)
-        "latest technology news 2023",
-        "best new gadgets 2023",
-        "AI advancements this year",
-        "cybersecurity tips for beginners",
-        "how to build a PC",
-        "smart home device reviews",
-        "upcoming smartphone releases",
-        "best laptops for programming",
-        "cloud computing trends",
-        "blockchain technology explained",
-
-        # Food/Cooking (10)
-        "best recipes for dinner tonight",
-        "quick healthy meals under 30 minutes",
-        "vegetarian meal prep ideas",
-        "baking tips for beginners",
-        "international cuisine recipes",
-        "keto diet meal plans",
-        "instant pot recipes 2023",
-        "gluten-free dessert ideas",
-        "meal prep for weight loss",
-        "food presentation techniques",
-
-        # Learning/Education (10)
-        "how to learn programming fast",
-        "best online courses 2023",
-        "language learning techniques",
-        "mathematics for beginners",
-        "science experiments for kids",
-        "history documentaries to watch",
-        "photography tips for beginners",
-        "music theory basics",
-        "public speaking skills",
-        "critical thinking exercises",
-
-        # Travel (10)
-        "top travel destinations 2023",
-        "budget travel tips Europe",
-        "best beaches in the world",
-        "solo travel safety tips",
-        "eco-friendly travel options",
-        "hidden gem vacation spots",
-        "road trip packing list",
-        "cultural etiquette guide",
-        "best travel credit cards",
-        "how to travel with pets",
-
-        # Fitness/Health (10)
-        "fitness tips for beginners at home",
-        "yoga routines for flexibility",
-        "weight training fundamentals",
-        "nutrition for muscle building",
-        "mental health self-care tips",
-        "home workout no equipment",
-        "running tips for beginners",
-        "sleep improvement techniques",
-        "stress management exercises",
-        "posture correction exercises",
-
-        # Books/Literature (10)
-        "best book recommendations 2023",
-        "classic novels everyone should read",
-        "self-improvement books 2023",
-        "how to read more books",
-        "sci-fi book series to start",
-        "biographies of famous people",
-        "book club discussion ideas",
-        "speed reading techniques",
-        "best audiobook platforms",
-        "writing your first novel",
-
-        # Lifestyle (10)
-        "sustainable living ideas for homes",
-        "minimalism for beginners",
-        "zero waste lifestyle tips",
-        "ethical fashion brands",
-        "mindfulness meditation guide",
-        "digital detox methods",
-        "tiny house living pros and cons",
-        "homemade natural cleaning products",
-        "capsule wardrobe essentials",
-        "financial independence tips",
-
-        # Productivity (10)
-        "best productivity tools 2023",
-        "time management techniques",
-        "how to stop procrastinating",
-        "notetaking apps comparison",
-        "morning routine for success",
-        "email management strategies",
-        "focus techniques for studying",
-        "remote work best practices",
-        "goal setting frameworks",
-        "decision making strategies",
-
-        # Hobbies (10)
-        "gardening tips for spring 2023",
-        "indoor plant care guide",
-        "beginner painting techniques",
-        "woodworking projects for starters",
-        "knitting patterns for beginners",
-        "home brewing beer guide",
-        "astronomy for amateurs",
-        "bird watching essentials",
-        "chess strategies for beginners",
-        "collecting rare coins guide"
-    ]
-
-    # Get number of searches to perform
+    if navigation not in NAVIGATION_MODES:
+        raise ValueError(f"Unknown navigation mode: {navigation}")
+    bing_url = bing_url or BING_URL
+    pacer = pacing.get_pacer(pacing_profile)
+    if min_dwell is None:
+        min_dwell = pacer.delay_range('page_dwell')
+
+    # Work out how to launch Edge
+    config = resolve_config(browser_config, isPhone, profile_path)
+    # An emulating run launches a desktop browser and switches it to the device once it is up
+    launch_config = config.replace(device=emulation.LAUNCH_DEVICE) if emulate else config
+    # Without a page load strategy, navigations must be tracked explicitly
+    track_loads = config.page_load_strategy == 'none'
+
+    # Get number of searches to perform, unless the dashboard is asked below
+    num_searches = None
     if num_searches_input is not None:
-        # Ensure num_searches is exactly what was requested (minimum 1, maximum length of search_terms)
-        num_searches = min(max(1, num_searches_input), len(search_terms))
-        print(f"Performing {num_searches} searches")
-    else:
-        # Ask user for number of searches to perform
-        while True:
-            try:
-                num_searches = int(input(f"How many searches would you like to perform? (1-{len(search_terms)}): "))
-                if 1 <= num_searches <= len(search_terms):
-                    break
-                print(f"Please enter a number between 1 and {len(search_terms)}")
-            except ValueError:
-                print("Invalid input. Please enter a number.")
-
-    # Randomize search terms without repeating (unless necessary)
-    available_terms = search_terms.copy()
-    random.shuffle(available_terms)
-
-    # If requested searches exceed available terms, allow duplicates
-    selected_terms = []
-    # Ensure we select exactly num_searches terms, no more, no less
-    for i in range(num_searches):
-        if not available_terms:  # If we've used all terms, reset the list
-            available_terms = [term for term in search_terms if term not in selected_terms[-5:]]  # Avoid recent duplicates
-            if not available_terms:  # If still empty, use all terms
-                available_terms = search_terms.copy()
-            random.shuffle(available_terms)
-
-        selected_terms.append(available_terms.pop(0))
-
-    # Double-check that we have exactly num_searches terms
-    if len(selected_terms) != num_searches:
-        print(f"Warning: Expected {num_searches} search terms but got {len(selected_terms)}. Adjusting...")
-        while len(selected_terms) < num_searches:
-            # Add more terms if needed
-            if not available_terms:
-                available_terms = search_terms.copy()
-                random.shuffle(available_terms)
-            selected_terms.append(available_terms.pop(0))
-        # Trim excess terms if needed
-        selected_terms = selected_terms[:num_searches]
-
+        num_searches = max(1, num_searches_input)
+    elif not auto_size:
+        num_searches = ask_search_count()
+
+    # Every completed search is recorded, so an interrupted run can be resumed
+    journal = run_journal.get_journal(journal)
+    journal_profile = run_journal.profile_key(config.profile_path)
+    journal_task = run_journal.search_task(config.device)
+    if resume and not auto_size:
+        done_today = journal.count(journal_profile, journal_task)
+        if done_today >= num_searches:
+            print(f"All {num_searches} searches were already done today on this profile")
+            if progress_callback:
+                progress_callback(100)
+            return 0
+        if done_today:
+            print(f"Resuming: {done_today} of {num_searches} searches already done today")
+            num_searches -= done_today
+
+    # Time every phase of the run
+    run_stats = run_events.Aggregator()
+    events = run_events.get_emitter(events, sinks=[run_stats], task='search',
+                                    profile=run_events.profile_label(config.profile_path), device=config.device)
+
+    # Give up on the profile quickly once searches keep failing
+    error_policy = error_policy or run_errors.ErrorPolicy()
+
+    # Measure the browser, and restart it when it has done enough or grown too big
+    memory_stats = browser_memory.MemoryStats()
+    recycle_after, max_rss_mb = browser_memory.recycle_limits(config, recycle_after, max_rss_mb)
+    searches_on_driver = 0
+
+    searches_done = 0
     driver = None
     try:
-        # Add user data directory if profile path is specified
-        if profile_path:
-            edge_options.add_argument(f"--user-data-dir={os.path.dirname(profile_path)}")
-            edge_options.add_argument(f"--profile-directory={os.path.basename(profile_path)}")
-            print(f"Using Edge profile: {profile_path}")
-
-        # Initialize the driver
-        driver = webdriver.Edge(options=edge_options)
+        # Initialize the driver, borrowing a warm one if a pool was given
+        with events.span('driver_launch', pooled=session_pool is not None):
+            if session_pool:
+                driver = session_pool.acquire(launch_config)
+            else:
+                driver = launch_config.create_driver()
+        memory_stats.track(driver.capabilities)
+        if emulate:
+            with events.span('emulation', to=config.device):
+                emulation.emulate(driver, config.device)
+
+        if auto_size:
+            # Size the run to exactly what the profile still needs today
+            with events.span('preflight'):
+                dashboard = preflight.read_search_progress(driver, userinfo_url, track=track_loads)
+            counter = dashboard.get(config.device) if dashboard else None
+            if counter is None:
+                print("Search progress unknown, running the requested number of searches")
+                if num_searches is None:
+                    num_searches = ask_search_count()
+            elif counter.remaining_searches == 0:
+                print(f"No {config.device} searches left today on this profile")
+                if progress_callback:
+                    progress_callback(100)
+                return 0
+            elif num_searches is None:
+                num_searches = counter.remaining_searches
+            else:
+                num_searches = min(num_searches, counter.remaining_searches)
+
+        # Pick random terms, preferring ones no run has used recently
+        selected_terms = corpus.select_terms(num_searches, terms_file, avoid_recent)
+        if not selected_terms:
+            raise ValueError(f"No search terms found in {terms_file or corpus.TERMS_FILE}")
+        if len(selected_terms) < num_searches:
+            print(f"Only {len(selected_terms)} search terms available")
+            num_searches = len(selected_terms)
+        print(f"Performing {num_searches} searches")
 
-        # Navigate to Bing.com
-        driver.get("https://www.bing.com")
-        print("Navigated to Bing.com")
+        expected = pacer.expected_duration(pacing.search_plan(selected_terms, navigation))
+        print(f"Expected pacing time ({pacer.profile} profile, excluding page loads): {pacing.format_duration(expected)}")
 
-        # Wait for page to load
-        time.sleep(random.uniform(2.0, 3.0))
+        # Navigate to Bing.com, the search box wait below covers the page load
+        if navigation == 'home':
+            page_loaded_at = pacer.clock.now()
+            navigation_started = time.monotonic()
+            with events.span('navigation', page='home'):
+                waits.load(driver, bing_url, track=track_loads)
+            startup.record_first_navigation(driver, navigation_started)
+            print("Navigated to Bing.com")
 
         # Perform searches with human-like behavior
         for i, term in enumerate(selected_terms):
@@ -224,67 +222,180 @@ def search(isPhone=False, num_searches_input=None, progress_callback=None, stop_
 
             print(f"\nSearch {i+1}/{num_searches}: {term}")
 
-            # Find the search box
+            search_started = time.monotonic()
+            outcome = 'error'
             try:
-                search_box = WebDriverWait(driver, 10).until(
-                    EC.element_to_be_clickable((By.ID, "sb_form_q"))
-                )
-
-                # Clear the search box
-                search_box.clear()
-
-                # Type the search term with random delays between keystrokes to mimic human typing
-                for char in term:
-                    search_box.send_keys(char)
-                    time.sleep(random.uniform(0.05, 0.2))  # Random delay between keystrokes
-
-                # Submit the search
-                search_box.send_keys(Keys.RETURN)
-                print(f"Submitted search: {term}")
+                if navigation == 'direct':
+                    # Go straight to the results page, no home page or typing involved
+                    page_loaded_at = pacer.clock.now()
+                    navigation_started = time.monotonic()
+                    with events.span('navigation', page='results'):
+                        waits.load(driver, results_url(bing_url, term), track=track_loads)
+                    startup.record_first_navigation(driver, navigation_started)
+                    print(f"Opened results for: {term}")
+                else:
+                    # Find the search box
+                    with events.span('search_box_wait'):
+                        search_box = waits.wait_for_search_box(driver, min_dwell=min_dwell, since=page_loaded_at,
+                                                               clock=pacer.clock)
+                    submit_token = waits.mark_document(driver) if track_loads else None
+
+                    with events.span('typing', chars=len(term)):
+                        if batch_actions:
+                            # Type and submit in one round trip, with the same keystroke delays
+                            actions.type_and_submit(driver, search_box, term, pacer.in_page_samples('keystroke', len(term)))
+                        else:
+                            # Clear the search box
+                            search_box.clear()
+
+                            # Type the search term with random delays between keystrokes to mimic human typing
+                            for char in term:
+                                search_box.send_keys(char)
+                                pacer.pause('keystroke')  # Random delay between keystrokes
+
+                            # Submit the search
+                            search_box.send_keys(Keys.RETURN)
+                    print(f"Submitted search: {term}")
+                    page_loaded_at = pacer.clock.now()
 
                 # Wait for search results to load
-                time.sleep(random.uniform(2.0, 3.0))
+                with events.span('results_wait'):
+                    waits.wait_for_results(driver, min_dwell=min_dwell, since=page_loaded_at, clock=pacer.clock,
+                                           after=None if navigation == 'direct' else submit_token)
 
                 # Scroll down 3 times with delays in between to mimic human behavior
-                for scroll in range(3):
-                    # Scroll down
-                    if isPhone:
-                        # For mobile, use smaller scroll steps
-                        driver.execute_script("window.scrollBy(0, 300);")
+                # For mobile, use smaller scroll steps
+                scroll_step = 300 if config.is_phone else 500
+                with events.span('scrolling'):
+                    if batch_actions:
+                        actions.scroll(driver, scroll_step, pacer.in_page_samples('scroll', pacing.SCROLLS_PER_SEARCH))
+                        print(f"Scrolled {pacing.SCROLLS_PER_SEARCH} times")
                     else:
-                        driver.execute_script("window.scrollBy(0, 500);")
+                        for scroll in range(pacing.SCROLLS_PER_SEARCH):
+                            # Scroll down
+                            driver.execute_script(f"window.scrollBy(0, {scroll_step});")
 
-                    print(f"Scroll {scroll+1}/3")
+                            print(f"Scroll {scroll+1}/{pacing.SCROLLS_PER_SEARCH}")
 
-                    # Random delay between scrolls (1-3 seconds)
-                    time.sleep(random.uniform(1.0, 3.0))
+                            # Random delay between scrolls
+                            pacer.pause('scroll')
 
                 # Additional delay before moving to the next search term
-                time.sleep(random.uniform(2.0, 4.0))
+                with events.span('pause'):
+                    pacer.pause('before_next_search')
+                searches_done += 1
+                outcome = 'ok'
+                error_policy.success()
+                journal.record(journal_profile, journal_task, term)
+
+                searches_on_driver += 1
+                rss = memory_stats.sample()
+                reason = browser_memory.recycle_reason(searches_on_driver, rss, recycle_after, max_rss_mb)
+                if reason and i + 1 < len(selected_terms):
+                    print(f"Restarting Edge: {reason}")
+                    with events.span('recycle', rss_mb=round(rss / browser_memory.MIB) if rss else None):
+                        if session_pool:
+                            session_pool.discard(driver)
+                            driver = None
+                            driver = session_pool.acquire(launch_config)
+                        else:
+                            driver.quit()
+                            driver = None
+                            driver = launch_config.create_driver()
+                        if emulate:
+                            emulation.emulate(driver, config.device)
+                    memory_stats.track(driver.capabilities)
+                    searches_on_driver = 0
 
                 # Navigate back to Bing.com for the next search
-                driver.get("https://www.bing.com")
-                time.sleep(random.uniform(1.5, 2.5))
-
-            except (TimeoutException, NoSuchElementException) as e:
-                print(f"Error finding search box: {e}")
-                # Try to navigate back to Bing.com and continue
-                driver.get("https://www.bing.com")
-                time.sleep(random.uniform(2.0, 3.0))
+                if navigation == 'home':
+                    page_loaded_at = pacer.clock.now()
+                    with events.span('navigation', page='home'):
+                        waits.load(driver, bing_url, track=track_loads)
+
+            except Exception as e:
+                # Gives up on the profile (raising ProfileAborted) or says how long to back off
+                outcome, backoff = error_policy.failure(e, run_errors.current_url(driver))
+                print(f"Search failed ({outcome} error, retrying in {backoff}s): {run_errors.first_line(e)}")
+                with events.span('backoff', kind=outcome):
+                    pacer.clock.sleep(backoff)
+                # Navigate back to Bing.com and continue; direct navigation loads the next page anyway
+                if navigation == 'home':
+                    page_loaded_at = pacer.clock.now()
+                    try:
+                        with events.span('recovery'):
+                            waits.load(driver, bing_url, track=track_loads)
+                    except Exception as recovery_error:
+                        # Part of the failure counted above: only gives up if fatal, else the next search tries again
+                        error_policy.check_fatal(recovery_error, run_errors.current_url(driver))
+            finally:
+                events.emit('search', time.monotonic() - search_started, outcome=outcome, index=i + 1, term=term)
 
         print("\nAll searches completed successfully")
+        print(f"Page-load profile: {config.describe_load_profile()}")
 
         # Final progress update
         if progress_callback:
             progress_callback(100)
 
+    except run_errors.ProfileAborted as e:
+        print(f"Search aborted, {e}")
+        raise
     except Exception as e:
         print(f"An error occurred: {e}")
     finally:
-        # Close the browser when done
+        # Close the browser when done, or hand it back to the pool for the next task
         if driver:
-            driver.quit()
+            if session_pool:
+                session_pool.release(driver)
+            else:
+                driver.quit()
         print("Browser closed. Search completed.")
+        run_events.report_run(events, run_stats, memory_stats, error_policy)
+
+    return searches_done
+
+
+def search_all(devices=('desktop', 'phone'), progress_callback=None, stop_event=None, session_pool=None,
+               **search_kwargs):
+    """
+    Performs the searches of several devices in one browser: search() runs once per device, each
+    time on the same desktop browser switched to the device with emulation (see emulation.py).
+
+    Args:
+        devices (iterable): Devices from browser.DEVICES to search as, in order.
+        progress_callback (callable, optional): Function to call with the overall progress (0-100).
+        stop_event (threading.Event, optional): Event to check for stopping the searches.
+        session_pool (SessionPool, optional): Pool to borrow the browser from. If None, one browser
+            is launched for this call and quit at the end.
+        **search_kwargs: Further search() arguments, e.g. num_searches_input or auto_size, used for
+            every device.
+
+    Returns:
+        int: Number of searches that completed, all devices together.
+    """
+    devices = list(devices)
+    pool = session_pool or SessionPool()
+    n = 0
+
+    def device_progress(value):
+        # Each device gets an equal share of the run's progress; n is the current device
+        progress_callback(int((n * 100 + value) / len(devices)))
+
+    searches_done = 0
+    try:
+        for n, device in enumerate(devices):
+            if stop_event and stop_event.is_set():
+                break
+            print(f"\n{device.capitalize()} searches ({n + 1}/{len(devices)})")
+            searches_done += search(isPhone=device == 'phone',
+                                    progress_callback=device_progress if progress_callback else None,
+                                    stop_event=stop_event, session_pool=pool, emulate=True, **search_kwargs)
+    finally:
+        if session_pool is None:
+            pool.close_all()
+
+    return searches_done
 
 if __name__ == "__main__":
     # Allow command-line execution with optional phone mode
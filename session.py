@@ -0,0 +1,154 @@
+import threading
+
+import emulation
+
+
+class _Session:
+    """A live driver plus the bookkeeping the pool needs to recycle it"""
+    def __init__(self, key, driver, user_data_dir=None):
+        self.key = key
+        self.driver = driver
+        self.user_data_dir = user_data_dir
+        self.jobs = 0
+
+
+class SessionPool:
+    """
+    Hands out warm Edge drivers to search() and quest() so that consecutive tasks on the
+    same profile do not each pay for a cold browser launch.
+
+    Drivers are keyed by their BrowserConfig, so two runs share a driver only if they would
+    have launched Edge the same way (same profile, device and headless setting). A driver is
+    checked out by acquire() and handed back by release(), which resets its tab and window
+    state and keeps it around for the next task. After max_jobs tasks a driver is quit and
+    the next acquire() launches a fresh one. Drivers that search() switched to another device
+    (see emulation.py) are switched back on release, so their key still describes them.
+
+    Edge locks a whole user data directory while it runs, so profiles of one directory cannot
+    have browsers open at the same time. Before launching a browser, the pool quits the idle
+    ones on the same directory; checked-out ones must be released first (ProfileExecutor runs
+    such profiles one after another).
+    """
+    def __init__(self, max_jobs=10):
+        self.max_jobs = max_jobs
+        self._lock = threading.Lock()
+        self._idle = {}  # key -> _Session waiting for its next task
+        self._busy = {}  # id(driver) -> _Session currently checked out
+
+    def acquire(self, browser_config):
+        """
+        Returns a driver launched from browser_config, reusing an idle one if possible.
+
+        Args:
+            browser_config (BrowserConfig): How the driver should have been launched.
+        """
+        key = browser_config.key()
+        with self._lock:
+            session = self._idle.pop(key, None)
+
+        if session is not None and not self._is_alive(session.driver):
+            print("Warm Edge session is no longer responding, launching a new one")
+            self._quit(session.driver)
+            session = None
+
+        if session is None:
+            self._evict(browser_config.user_data_dir)
+            session = _Session(key, browser_config.create_driver(), browser_config.user_data_dir)
+        else:
+            print(f"Reusing warm Edge session ({session.jobs} task(s) so far)")
+
+        with self._lock:
+            self._busy[id(session.driver)] = session
+        return session.driver
+
+    def release(self, driver):
+        """
+        Hands a driver back to the pool. The driver is quit instead of kept if it has
+        reached max_jobs, if its state cannot be reset, or if it did not come from this pool.
+        """
+        with self._lock:
+            session = self._busy.pop(id(driver), None)
+
+        if session is None:
+            self._quit(driver)
+            return
+
+        session.jobs += 1
+        if session.jobs >= self.max_jobs:
+            print(f"Recycling Edge session after {session.jobs} task(s)")
+            self._quit(driver)
+            return
+
+        if not self._reset(driver):
+            self._quit(driver)
+            return
+
+        with self._lock:
+            if session.key not in self._idle:
+                self._idle[session.key] = session
+                return
+        # Another driver with the same options is already idle, keep only one
+        self._quit(driver)
+
+    def discard(self, driver):
+        """Quits a checked-out driver instead of keeping it, e.g. to restart a browser that grew too big"""
+        with self._lock:
+            self._busy.pop(id(driver), None)
+        self._quit(driver)
+
+    def _evict(self, user_data_dir):
+        """Quits the idle drivers holding user_data_dir, so a browser for another of its profiles can start"""
+        if user_data_dir is None:
+            return
+        with self._lock:
+            holding = [key for key, session in self._idle.items() if session.user_data_dir == user_data_dir]
+            sessions = [self._idle.pop(key) for key in holding]
+        for session in sessions:
+            print("Closing the warm Edge session of another profile in the same user data directory")
+            self._quit(session.driver)
+
+    def close_all(self):
+        """Quits every driver owned by the pool, idle or checked out"""
+        with self._lock:
+            sessions = list(self._idle.values()) + list(self._busy.values())
+            self._idle.clear()
+            self._busy.clear()
+        for session in sessions:
+            self._quit(session.driver)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close_all()
+
+    @staticmethod
+    def _is_alive(driver):
+        try:
+            driver.current_window_handle
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _reset(driver):
+        """Closes every tab but the first one and leaves it on a blank page, without device emulation"""
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            emulation.emulate(driver, emulation.LAUNCH_DEVICE)
+            driver.get("about:blank")
+            return True
+        except Exception as e:
+            print(f"Could not reset Edge session: {e}")
+            return False
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
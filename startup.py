@@ -0,0 +1,339 @@
+"""
+Fast Edge startup.
+
+Letting webdriver.Edge() find msedgedriver through Selenium Manager and spawn a fresh
+driver process costs time on every launch. This module resolves the driver once per
+machine and caches its path and version, keeps a single msedgedriver running for the
+whole process and attaches every new browser session to it. Each launch is timed by
+phase (driver resolve, driver spawn, browser spawn, first navigation).
+"""
+from collections import deque
+import atexit
+import json
+import os
+import re
+import subprocess
+import threading
+import time
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chromium.remote_connection import ChromiumRemoteConnection
+from selenium.webdriver.edge.options import Options
+from selenium.webdriver.edge.service import Service
+
+import paths
+
+CACHE_FILE = 'msedgedriver.json'
+
+# Path to an msedgedriver to use as is, skipping resolution and the cache
+DRIVER_ENV = 'EDGE_AUTOMATOR_DRIVER'
+# Set to 0 to spawn one msedgedriver per browser instead of sharing one
+SHARED_SERVICE_ENV = 'EDGE_AUTOMATOR_SHARED_SERVICE'
+
+
+class DriverInfo:
+    """A resolved msedgedriver binary"""
+    def __init__(self, path, version=None, cached=False):
+        self.path = path
+        self.version = version
+        self.cached = cached  # True if read from the cache rather than resolved just now
+
+    def __str__(self):
+        return f"msedgedriver {self.version or '(unknown version)'} at {self.path}"
+
+
+class LaunchTimings:
+    """Seconds spent in each phase of getting a browser ready"""
+    PHASES = ('driver_resolve', 'driver_spawn', 'browser_spawn', 'first_navigation')
+
+    def __init__(self):
+        self.phases = {}
+        self.shared_service = False
+
+    def record(self, phase, started):
+        self.phases[phase] = time.monotonic() - started
+
+    @property
+    def total(self):
+        return sum(self.phases.values())
+
+    def as_dict(self):
+        return {phase: round(seconds, 3) for phase, seconds in self.phases.items()}
+
+    def __str__(self):
+        parts = []
+        for phase in self.PHASES:
+            if phase in self.phases:
+                parts.append(f"{phase.replace('_', ' ')} {self.phases[phase]:.2f}s")
+        if self.shared_service and 'driver_spawn' in self.phases:
+            parts.append("shared driver")
+        return ", ".join(parts) + f" (total {self.total:.2f}s)"
+
+
+class SharedSessionDriver(webdriver.Remote):
+    """A browser session on a SharedService. Quitting it releases its hold on the service."""
+    def __init__(self, shared_service, **kwargs):
+        super().__init__(**kwargs)
+        self.shared_service = shared_service
+
+    def quit(self):
+        try:
+            super().quit()
+        finally:
+            service, self.shared_service = self.shared_service, None
+            if service is not None:
+                service.release()
+
+
+class SharedService:
+    """
+    One msedgedriver process that browser sessions attach to over its local HTTP endpoint.
+    msedgedriver handles many sessions at once, so concurrent profiles can share it.
+
+    The service counts the sessions attached to it. A retired service (one replaced after the
+    driver path changed) keeps running until its last session quits.
+    """
+    def __init__(self, driver_path):
+        self.driver_path = driver_path
+        self.sessions = 0
+        self.retired = False
+        self._service = None
+        self._lock = threading.Lock()
+
+    def _running(self):
+        return (self._service is not None and self._service.process is not None
+                and self._service.process.poll() is None and self._service.is_connectable())
+
+    def ensure_running(self):
+        """
+        Starts the driver process if it is not running or no longer answers. Returns True if
+        it had to be started.
+        """
+        with self._lock:
+            if self._running():
+                return False
+            if self._service is not None:
+                print("Shared msedgedriver stopped answering, starting it again")
+                self._stop_service()
+            self._service = Service(executable_path=self.driver_path)
+            self._service.start()
+            return True
+
+    def connect(self, options):
+        """Opens a new browser session on the running driver"""
+        with self._lock:
+            self.sessions += 1
+            service_url = self._service.service_url
+        executor = ChromiumRemoteConnection(
+            remote_server_addr=service_url,
+            vendor_prefix='ms',
+            browser_name='MicrosoftEdge',
+            keep_alive=True,
+        )
+        try:
+            return SharedSessionDriver(self, command_executor=executor, options=options)
+        except BaseException:
+            self.release()
+            raise
+
+    def release(self):
+        """Called when a session quits. Stops a retired service once nothing uses it."""
+        with self._lock:
+            self.sessions = max(0, self.sessions - 1)
+            if self.retired and self.sessions == 0:
+                self._stop_service()
+
+    def retire(self):
+        """Stops the service as soon as no session uses it; no new sessions should attach"""
+        with self._lock:
+            self.retired = True
+            if self.sessions == 0:
+                self._stop_service()
+
+    def stop(self):
+        with self._lock:
+            self._stop_service()
+
+    def _stop_service(self):
+        if self._service is not None:
+            try:
+                self._service.stop()
+            except Exception:
+                pass
+            self._service = None
+
+
+_lock = threading.Lock()
+_driver_info = None
+_shared_service = None
+_retired_services = []  # replaced services that still had sessions attached
+_recent_launches = deque(maxlen=20)
+
+
+def _cache_path():
+    return paths.data_file(CACHE_FILE)
+
+
+def _read_cache():
+    """Returns the cached DriverInfo if the binary it points at is unchanged, else None"""
+    try:
+        with open(_cache_path(), 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+        if os.path.getmtime(entry['path']) != entry['mtime']:
+            return None
+        return DriverInfo(entry['path'], entry.get('version'), cached=True)
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _write_cache(info):
+    try:
+        with open(_cache_path(), 'w', encoding='utf-8') as f:
+            json.dump({'path': info.path, 'version': info.version, 'mtime': os.path.getmtime(info.path)}, f)
+    except OSError as e:
+        print(f"Could not cache msedgedriver location: {e}")
+
+
+def _selenium_manager_path(options):
+    """Asks Selenium Manager for msedgedriver, the same way webdriver.Edge() would"""
+    from selenium.webdriver.common.driver_finder import DriverFinder
+    service = Service()
+    try:
+        return DriverFinder(service, options).get_driver_path()  # Selenium 4.20+
+    except TypeError:
+        return DriverFinder.get_path(service, options)  # older Selenium 4 releases
+
+
+def driver_version(path):
+    """Returns the version reported by msedgedriver --version, or None"""
+    try:
+        output = subprocess.run([path, '--version'], capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = re.search(r'\d+(?:\.\d+)+', output)
+    return match.group(0) if match else None
+
+
+def resolve_driver(options=None, refresh=False):
+    """
+    Returns a DriverInfo for msedgedriver. Resolved through Selenium Manager at most once
+    per machine; later calls, also from later runs, read the cache.
+
+    Args:
+        options (Options, optional): Edge options, used by Selenium Manager to match the browser.
+        refresh (bool): Ignore the cache and resolve again, e.g. after an Edge update.
+    """
+    global _driver_info
+    with _lock:
+        explicit = os.environ.get(DRIVER_ENV)
+        if explicit:
+            return DriverInfo(explicit)
+        if _driver_info is not None and not refresh:
+            return _driver_info
+
+        info = None if refresh else _read_cache()
+        if info is None:
+            path = _selenium_manager_path(options or Options())
+            info = DriverInfo(path, driver_version(path))
+            _write_cache(info)
+            print(f"Resolved {info}")
+        _driver_info = info
+        return info
+
+
+def _shared_enabled():
+    return os.environ.get(SHARED_SERVICE_ENV, '1').lower() not in ('0', 'false', 'no')
+
+
+def _get_shared_service(driver_path):
+    global _shared_service
+    with _lock:
+        if _shared_service is not None and _shared_service.driver_path != driver_path:
+            # Sessions still attached to the old driver keep working; it stops after their quit()
+            _shared_service.retire()
+            _retired_services.append(_shared_service)
+            _shared_service = None
+        if _shared_service is None:
+            _shared_service = SharedService(driver_path)
+        return _shared_service
+
+
+def _launch(options, timings, refresh):
+    started = time.monotonic()
+    info = resolve_driver(options, refresh=refresh)
+    timings.record('driver_resolve', started)
+
+    if _shared_enabled():
+        service = _get_shared_service(info.path)
+        started = time.monotonic()
+        timings.shared_service = not service.ensure_running()
+        timings.record('driver_spawn', started)
+        started = time.monotonic()
+        driver = service.connect(options)
+        timings.record('browser_spawn', started)
+    else:
+        # webdriver.Edge() spawns its driver and browser in one go
+        started = time.monotonic()
+        driver = webdriver.Edge(options=options, service=Service(executable_path=info.path))
+        timings.record('browser_spawn', started)
+    return info, driver
+
+
+def launch(options):
+    """
+    Starts Edge with options and returns the driver, with its LaunchTimings attached
+    as driver.launch_timings.
+    """
+    timings = LaunchTimings()
+    try:
+        info, driver = _launch(options, timings, refresh=False)
+    except WebDriverException as e:
+        if os.environ.get(DRIVER_ENV) or _driver_info is None or not _driver_info.cached:
+            raise
+        # The cached driver may no longer match the installed Edge
+        print(f"Edge did not start with the cached msedgedriver, resolving it again: {e.msg}")
+        timings = LaunchTimings()
+        info, driver = _launch(options, timings, refresh=True)
+
+    driver.launch_timings = timings
+    with _lock:
+        _recent_launches.append(timings)
+    print(f"Edge started: {timings}")
+    return driver
+
+
+def record_first_navigation(driver, started):
+    """
+    Records how long the first page load of a freshly launched driver took and prints the
+    launch summary. Does nothing for drivers that already loaded a page (e.g. pooled ones).
+
+    Args:
+        driver (WebDriver): Driver returned by launch().
+        started (float): time.monotonic() when the navigation began.
+    """
+    timings = getattr(driver, 'launch_timings', None)
+    if timings is None or 'first_navigation' in timings.phases:
+        return
+    timings.record('first_navigation', started)
+    print(f"Time to first page: {timings}")
+
+
+def recent_launches():
+    """Returns the LaunchTimings of the most recent launches in this process, oldest first"""
+    with _lock:
+        return list(_recent_launches)
+
+
+def shutdown():
+    """Stops the shared msedgedriver and any retired ones. Sessions still attached to them stop working."""
+    global _shared_service
+    with _lock:
+        services = _retired_services + ([_shared_service] if _shared_service is not None else [])
+        _retired_services.clear()
+        _shared_service = None
+    for service in services:
+        service.stop()
+
+
+atexit.register(shutdown)
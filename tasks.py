@@ -0,0 +1,59 @@
+"""
+Registry of the modes main.py can run.
+
+Modes are registered by module and attribute name and imported only when one is selected,
+so --help, argument errors and the interactive menu never load selenium or tkinter.
+Keep this module free of heavy imports.
+"""
+import importlib
+
+
+class Task:
+    """
+    A mode of the tool.
+
+    Args:
+        name (str): Value of --mode.
+        title (str): Name shown in the interactive menu.
+        description (str): One-line summary for --help and the menu.
+        target (str): "module:attribute" of the callable that runs the mode.
+        browser_task (bool): Whether the callable is a search()/quest() style browser task
+            rather than an entry point of its own.
+    """
+    def __init__(self, name, title, description, target, browser_task=True):
+        self.name = name
+        self.title = title
+        self.description = description
+        self.target = target
+        self.browser_task = browser_task
+
+    def load(self):
+        """Imports and returns the callable behind this mode"""
+        module_name, attribute = self.target.split(':')
+        return getattr(importlib.import_module(module_name), attribute)
+
+
+TASKS = {}
+
+
+def register(name, title, description, target, browser_task=True):
+    """Adds a mode to the registry, in menu order"""
+    TASKS[name] = Task(name, title, description, target, browser_task)
+    return TASKS[name]
+
+
+def get_task(name):
+    """Returns the registered Task called name"""
+    return TASKS[name]
+
+
+register('search', 'Search Mode', 'Perform automated searches', 'search:search')
+register('quest', 'Quest Mode', 'Complete quests and activities', 'quest:quest')
+register('gui', 'GUI Mode', 'Launch graphical user interface', 'gui:main', browser_task=False)
+register('daemon', 'Daemon Mode', 'Keep browsers warm and run queued and scheduled jobs', 'daemon:main',
+         browser_task=False)
+register('search-all', 'Desktop + Phone Search', 'Perform desktop, then phone searches in one browser',
+         'search:search_all')
+
+# Modes that take search()'s arguments
+SEARCH_TASKS = ('search', 'search-all')
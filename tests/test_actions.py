@@ -0,0 +1,37 @@
+"""In-page action scripts, on a stand-in driver"""
+import types
+
+import pytest
+
+import actions
+
+
+class StubDriver:
+    """Records script timeouts; execute_async_script returns or raises what it is given"""
+    def __init__(self, outcome):
+        self.timeouts = types.SimpleNamespace(script=30)
+        self.outcome = outcome
+        self.timeout_during_script = None
+
+    def set_script_timeout(self, seconds):
+        self.timeouts.script = seconds
+
+    def execute_async_script(self, script, *args):
+        self.timeout_during_script = self.timeouts.script
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+        return self.outcome
+
+
+def test_script_timeout_covers_the_delays_and_is_restored():
+    driver = StubDriver('done')
+    assert actions.scroll(driver, 300, delays=[1.0, 2.0]) == 'done'
+    assert driver.timeout_during_script == 3.0 + actions.SCRIPT_TIMEOUT_MARGIN
+    assert driver.timeouts.script == 30
+
+
+def test_script_timeout_is_restored_when_the_script_fails():
+    driver = StubDriver(TimeoutError("script timeout"))
+    with pytest.raises(TimeoutError):
+        actions.run_async_script(driver, "", 5)
+    assert driver.timeouts.script == 30
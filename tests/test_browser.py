@@ -0,0 +1,35 @@
+"""BrowserConfig's URL blocking, on a stand-in driver"""
+from browser import BrowserConfig
+
+
+class StubDriver:
+    """Records which tab each DevTools command went to"""
+    def __init__(self):
+        self.current = 'main'
+        self.blocked = {}  # tab -> patterns
+        self.switch_to = self  # driver.switch_to.window(handle)
+
+    def window(self, handle):
+        self.current = handle
+
+    def execute_cdp_cmd(self, cmd, params):
+        if cmd == 'Network.setBlockedURLs':
+            self.blocked[self.current] = params['urls']
+        return {}
+
+
+def test_blocking_is_applied_in_every_new_tab():
+    config = BrowserConfig(load_profile='lean')
+    driver = StubDriver()
+    config.apply_blocking(driver)
+    config.apply_blocking_to_tabs(driver, ['activity 1', 'activity 2'], 'main')
+    assert sorted(driver.blocked) == ['activity 1', 'activity 2', 'main']
+    assert driver.blocked['activity 1'] == config.blocked_patterns()
+    assert driver.current == 'main'
+
+
+def test_nothing_to_block_leaves_the_tabs_alone():
+    driver = StubDriver()
+    BrowserConfig(load_profile='full').apply_blocking_to_tabs(driver, ['activity 1'], 'main')
+    assert driver.blocked == {}
+    assert driver.current == 'main'
@@ -0,0 +1,81 @@
+"""The bus between worker threads and the GUI"""
+import threading
+
+from bus import Bus, BusStdout, profile_job, split_job
+
+
+def test_job_ids():
+    assert profile_job('search', 'Profile 1') == 'search/Profile 1'
+    assert split_job('search/Profile 1') == ('search', 'Profile 1')
+    assert split_job('search') == ('search', None)
+
+
+def test_state_keeps_only_the_latest_value():
+    bus = Bus()
+    for value in range(10):
+        bus.set('search/a', 'progress', value)
+    bus.set('search/b', 'progress', 5)
+    state, lines = bus.drain()
+    assert state == {('search/a', 'progress'): 9, ('search/b', 'progress'): 5}
+    assert lines == []
+    assert not bus.pending()
+
+
+def test_output_is_split_into_lines_per_job():
+    bus = Bus()
+    bus.write('a', "one\ntw")
+    bus.write('b', "other\n")
+    bus.write('a', "o\n")
+    assert bus.drain()[1] == [('a', "one\n"), ('b', "other\n"), ('a', "two\n")]
+
+
+def test_unfinished_line_waits_for_its_newline_or_a_flush():
+    bus = Bus()
+    bus.write('a', "half")
+    assert not bus.pending()
+    bus.flush_job('a')
+    assert bus.drain()[1] == [('a', "half")]
+
+
+def test_drain_takes_at_most_max_lines():
+    bus = Bus()
+    bus.write('a', "1\n2\n3\n")
+    assert [line for _, line in bus.drain(max_lines=2)[1]] == ["1\n", "2\n"]
+    assert bus.pending()
+    assert bus.drain()[1] == [('a', "3\n")]
+
+
+def test_backlog_drops_the_oldest_lines():
+    bus = Bus(backlog=2)
+    bus.write('a', "1\n2\n3\n")
+    assert bus.drain()[1] == [('a', "2\n"), ('a', "3\n")]
+
+
+def test_job_binds_only_the_calling_thread():
+    bus = Bus()
+    seen = []
+    with bus.job('search'):
+        worker = threading.Thread(target=lambda: seen.append(bus.current_job()))
+        worker.start()
+        worker.join()
+        assert bus.current_job() == 'search'
+        with bus.job('search/a'):
+            assert bus.current_job() == 'search/a'
+        assert bus.current_job() == 'search'
+    assert bus.current_job() is None
+    assert seen == [None]
+
+
+def test_stdout_writes_to_the_bound_job():
+    bus = Bus()
+    stdout = BusStdout(bus, default_job='gui')
+
+    def worker():
+        with bus.job('search/a'):
+            print("from a", file=stdout, end="")
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    print("from gui", file=stdout)
+    assert bus.drain()[1] == [('search/a', "from a"), ('gui', "from gui\n")]
@@ -0,0 +1,79 @@
+"""The GUI console, on a stand-in for the Tk text widget"""
+from console import ConsoleView
+
+
+class StubText:
+    """Keeps the text as a string and understands the few indexes the console uses"""
+    def __init__(self):
+        self.text = ""
+        self.inserts = 0
+
+    def index(self, index):
+        assert index == "end-1c"
+        lines = self.text.split("\n")
+        return f"{len(lines)}.{len(lines[-1])}"
+
+    def insert(self, index, text):
+        self.text += text
+        self.inserts += 1
+
+    def delete(self, start, end):
+        if end == "end":
+            self.text = ""
+            return
+        # "1.0" up to the start of line n: drops the first n - 1 lines
+        n = int(str(end).split(".")[0])
+        self.text = "\n".join(self.text.split("\n")[n - 1:])
+
+    def configure(self, **options):
+        pass
+
+    def see(self, index):
+        pass
+
+
+def printed(console, *lines):
+    console.append("".join(lines))
+
+
+def test_output_is_inserted_once_per_tick():
+    widget = StubText()
+    console = ConsoleView(widget)
+    printed(console, "one\n", "two\n")
+    console.append("")
+    assert widget.text == "one\ntwo\n"
+    assert widget.inserts == 1
+
+
+def test_widget_and_ring_keep_only_the_newest_lines():
+    widget = StubText()
+    console = ConsoleView(widget, max_lines=3)
+    printed(console, *(f"line {i}\n" for i in range(10)))
+    assert widget.text.split("\n")[-3:] == ["line 8", "line 9", ""]
+    assert list(console.lines) == ["line 7", "line 8", "line 9"]
+
+
+def test_lowering_max_lines_trims_right_away():
+    widget = StubText()
+    console = ConsoleView(widget, max_lines=10)
+    printed(console, *(f"line {i}\n" for i in range(10)))
+    console.set_max_lines(2)
+    assert list(console.lines) == ["line 8", "line 9"]
+    assert widget.text.count("\n") <= 2
+
+
+def test_save_writes_buffered_lines_and_the_unfinished_one(tmp_path):
+    console = ConsoleView(StubText())
+    printed(console, "done\nhalf")
+    path = tmp_path / "console.txt"
+    console.save(str(path))
+    assert path.read_text(encoding="utf-8") == "done\nhalf"
+
+
+def test_clear_empties_widget_and_buffer():
+    widget = StubText()
+    console = ConsoleView(widget)
+    printed(console, "done\nhalf")
+    console.clear()
+    assert widget.text == ""
+    assert not console.lines and console.partial == ""
@@ -0,0 +1,43 @@
+"""Search term sampling and the recently used terms"""
+import random
+
+import corpus
+
+
+def test_term_hash_ignores_case_and_spacing():
+    assert corpus.term_hash('Weather  today ') == corpus.term_hash('weather today')
+    assert corpus.term_hash('weather today') != corpus.term_hash('weather')
+
+
+def test_reservoir_sample_avoids_excluded_terms():
+    terms = ['alpha', 'beta', 'gamma', 'delta']
+    exclude = {corpus.term_hash('alpha'), corpus.term_hash('beta')}
+    assert sorted(corpus.reservoir_sample(terms, 2, exclude, random.Random(1))) == ['delta', 'gamma']
+
+
+def test_reservoir_sample_falls_back_to_excluded_terms():
+    terms = ['alpha', 'beta', 'gamma', 'delta']
+    exclude = {corpus.term_hash('alpha'), corpus.term_hash('beta')}
+    chosen = corpus.reservoir_sample(terms, 3, exclude, random.Random(1))
+    assert len(chosen) == 3
+    assert {'gamma', 'delta'} <= set(chosen)
+
+
+def test_reservoir_sample_drops_repeated_terms():
+    chosen = corpus.reservoir_sample(['Weather', 'weather ', 'news'], 3, rng=random.Random(1))
+    assert len(chosen) == 2
+
+
+def test_reservoir_sample_reads_a_long_corpus_lazily():
+    terms = (f"term {i}" for i in range(100000))
+    chosen = corpus.reservoir_sample(terms, 5, rng=random.Random(1))
+    assert len(set(chosen)) == 5
+
+
+def test_recent_terms_keep_only_the_newest(tmp_path):
+    recent = corpus.RecentTerms(str(tmp_path / 'recent.bin'), capacity=2)
+    recent.add(['alpha', 'beta'])
+    recent.add(['gamma'])
+    assert corpus.RecentTerms(recent.path).load() == {corpus.term_hash('beta'), corpus.term_hash('gamma')}
+    recent.clear()
+    assert recent.load() == set()
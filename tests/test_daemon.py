@@ -0,0 +1,52 @@
+"""Daemon schedules"""
+from datetime import datetime
+
+import pytest
+
+from daemon import Schedule, validate_spec
+
+
+def test_schedule_due_once_a_day_from_its_time():
+    schedule = Schedule('search-0730', '07:30', {})
+    assert not schedule.due(datetime(2026, 10, 17, 7, 29))
+    assert schedule.due(datetime(2026, 10, 17, 7, 30))
+    assert schedule.due(datetime(2026, 10, 17, 23, 0))
+    schedule.last_run = '2026-10-17'
+    assert not schedule.due(datetime(2026, 10, 17, 23, 0))
+    assert schedule.due(datetime(2026, 10, 18, 7, 30))
+
+
+def test_schedule_round_trips_through_a_dict():
+    schedule = Schedule('quest', '21:00', {'task': 'quest'}, last_run='2026-10-17')
+    assert Schedule(**schedule.as_dict()).as_dict() == schedule.as_dict()
+
+
+def test_schedule_time_is_zero_padded():
+    schedule = Schedule('search-0730', '7:30', {})
+    assert schedule.at == '07:30'
+    assert not schedule.due(datetime(2026, 10, 17, 7, 29))
+    # '10:00' >= '7:30' would be False as text
+    assert schedule.due(datetime(2026, 10, 17, 10, 0))
+
+
+@pytest.mark.parametrize('at', ['25:00', '7.30', '', None])
+def test_schedule_rejects_bad_times(at):
+    with pytest.raises(ValueError):
+        Schedule('bad', at, {})
+
+
+@pytest.mark.parametrize('spec', [
+    [],
+    {'task': 'gui'},
+    {'task': 'search', 'options': {}},
+    {'task': 'quest', 'options': []},
+    {'task': 'quest', 'profiles': 'Default'},
+])
+def test_rejects_specs_the_daemon_cannot_run(spec):
+    with pytest.raises(ValueError):
+        validate_spec(spec)
+
+
+def test_accepts_a_sized_search():
+    validate_spec({'task': 'search', 'profiles': ['Default'], 'options': {'num_searches_input': 10}})
+    validate_spec({'task': 'search', 'options': {'auto_size': True}})
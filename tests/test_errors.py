@@ -0,0 +1,68 @@
+"""Failure classification, retry budgets, backoff and the circuit breaker"""
+import pytest
+
+import errors
+
+
+class NoSuchElementException(Exception):
+    """Stands in for selenium's, which is classified by name"""
+
+
+@pytest.mark.parametrize('error, url, kind', [
+    (TimeoutError("page load"), None, errors.TRANSIENT),
+    (Exception("net::ERR_CONNECTION_RESET"), None, errors.TRANSIENT),
+    (NoSuchElementException("#sb_form_q"), None, errors.STRUCTURE),
+    (Exception("something else"), None, errors.STRUCTURE),
+    (Exception("invalid session id"), None, errors.FATAL),
+    (TimeoutError("page load"), 'https://login.live.com/oauth', errors.FATAL),
+])
+def test_classify(error, url, kind):
+    assert errors.classify(error, url) == kind
+
+
+def test_backoff_doubles_for_failures_in_a_row():
+    policy = errors.ErrorPolicy()
+    assert policy.failure(TimeoutError()) == (errors.TRANSIENT, 2)
+    assert policy.failure(TimeoutError()) == (errors.TRANSIENT, 4)
+
+
+def test_budget_exhausted():
+    policy = errors.ErrorPolicy()
+    for _ in range(errors.RETRY_BUDGETS[errors.STRUCTURE]):
+        policy.failure(NoSuchElementException())
+        policy.success()
+    with pytest.raises(errors.ProfileAborted) as aborted:
+        policy.failure(NoSuchElementException())
+    assert aborted.value.kind == errors.STRUCTURE
+    assert policy.summary() == {errors.STRUCTURE: 4, 'aborted': "more than 3 structure failures"}
+
+
+def test_breaker_opens_on_failures_in_a_row():
+    policy = errors.ErrorPolicy(breaker_threshold=2)
+    policy.failure(TimeoutError())
+    with pytest.raises(errors.ProfileAborted, match="2 failures in a row"):
+        policy.failure(NoSuchElementException())
+
+
+def test_success_closes_breaker():
+    policy = errors.ErrorPolicy(breaker_threshold=2)
+    for _ in range(3):
+        policy.failure(TimeoutError())
+        policy.success()
+    assert not policy.breaker.open
+    assert policy.summary() == {errors.TRANSIENT: 3}
+
+
+def test_fatal_failure_gives_up_at_once():
+    policy = errors.ErrorPolicy()
+    with pytest.raises(errors.ProfileAborted, match="signed out"):
+        policy.failure(TimeoutError(), 'https://login.live.com/')
+
+
+def test_check_fatal_does_not_count_other_failures():
+    policy = errors.ErrorPolicy()
+    policy.failure(TimeoutError())
+    policy.check_fatal(TimeoutError())
+    assert policy.counts[errors.TRANSIENT] == 1
+    with pytest.raises(errors.ProfileAborted):
+        policy.check_fatal(Exception("invalid session id"))
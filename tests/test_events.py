@@ -0,0 +1,34 @@
+"""Phase events, their sinks and the per-phase summary"""
+import events
+
+
+def broken_sink(event):
+    raise OSError("disk full")
+
+
+def test_failing_sinks_do_not_stop_the_run_or_the_other_sinks():
+    stream = events.EventStream()
+    on_stream, on_emitter = [], []
+    stream.subscribe(broken_sink)
+    stream.subscribe(on_stream.append)
+    emitter = events.Emitter(stream, sinks=(broken_sink, on_emitter.append), task='search')
+
+    event = emitter.emit('navigation', duration=0.5)
+    assert event['task'] == 'search'
+    assert on_stream == [event]
+    assert on_emitter == [event]
+
+
+def test_aggregator_counts_matching_spans_only():
+    stream = events.EventStream()
+    stats = stream.subscribe(events.Aggregator(task='search'))
+    search = events.Emitter(stream, task='search')
+    for duration in (1.0, 2.0, 3.0):
+        search.emit('typing', duration=duration)
+    search.emit('start')
+    events.Emitter(stream, task='quest').emit('typing', duration=9.0)
+
+    summary = stats.summary()
+    assert list(summary) == ['typing']
+    assert summary['typing']['count'] == 3
+    assert summary['typing']['total'] == 6.0
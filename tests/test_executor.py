@@ -0,0 +1,139 @@
+"""ProfileExecutor with plain functions standing in for search() and quest()"""
+import threading
+import time
+
+from bus import Bus
+from executor import ProfileExecutor, user_data_lock
+from pacing import Pacer
+
+PROFILES = [('Default', None), ('Profile 1', None), ('Profile 2', None)]
+
+
+def executor(max_workers):
+    return ProfileExecutor(max_workers=max_workers, pacer=Pacer('test'))
+
+
+def peak_concurrency(profiles, max_workers=3):
+    """Most profiles running at once, with tasks that take 50 ms each"""
+    lock = threading.Lock()
+    active, peak = [0], [0]
+
+    def task(progress_callback, stop_event, profile_path):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+
+    executor(max_workers).run(task, profiles)
+    return peak[0]
+
+
+def test_results_in_input_order():
+    def task(progress_callback, stop_event, profile_path, offset):
+        return offset + len(profile_path or '')
+
+    profiles = [('a', '/x/Profile 10'), ('b', None), ('c', '/x/P')]
+    results = executor(3).run(task, profiles, offset=1)
+    assert [(r.profile_name, r.value) for r in results] == [('a', 14), ('b', 1), ('c', 5)]
+    assert all(r.ok for r in results)
+
+
+def test_runs_at_most_max_workers_at_once():
+    assert peak_concurrency(PROFILES + [('Profile 3', None)], max_workers=2) == 2
+
+
+def test_failed_profile_does_not_stop_the_others():
+    def task(progress_callback, stop_event, profile_path):
+        if profile_path == 'broken':
+            raise RuntimeError("no browser")
+        return 'done'
+
+    results = executor(1).run(task, [('a', 'broken'), ('b', None)])
+    assert str(results[0].error) == "no browser"
+    assert not results[0].ok
+    assert results[1].value == 'done'
+
+
+def test_reports_progress_per_profile_and_ends_at_100():
+    reports = []
+
+    def task(progress_callback, stop_event, profile_path):
+        progress_callback(50)
+
+    executor(1).run(task, PROFILES[:2], progress_callback=lambda name, value: reports.append((name, value)))
+    assert reports == [('Default', 50), ('Default', 100), ('Profile 1', 50), ('Profile 1', 100)]
+
+
+def test_stop_skips_profiles_not_yet_started():
+    run = executor(1)
+    stopped = []
+
+    def task(progress_callback, stop_event, profile_path):
+        run.stop()
+        stopped.append(stop_event.is_set())
+
+    results = run.run(task, PROFILES)
+    assert stopped == [True]
+    assert [r.skipped for r in results] == [False, True, True]
+
+
+def test_stop_one_profile():
+    run = executor(2)
+    started = threading.Barrier(2)
+    seen = {}
+
+    def task(progress_callback, stop_event, profile_path):
+        started.wait(timeout=5)
+        if profile_path == '/edge/first':
+            run.stop('Profile 1')
+        else:
+            stop_event.wait(timeout=5)
+        time.sleep(0.05)
+        seen[profile_path] = stop_event.is_set()
+
+    # Separate user data directories, so the two profiles run at the same time
+    run.run(task, [('Default', '/edge/first'), ('Profile 1', '/copy/second')])
+    assert seen == {'/edge/first': False, '/copy/second': True}
+
+
+def test_each_profile_runs_in_its_job_context():
+    bus = Bus()
+    jobs = []
+
+    def task(progress_callback, stop_event, profile_path):
+        jobs.append(bus.current_job())
+
+    ProfileExecutor(max_workers=2, pacer=Pacer('test'), job_context=bus.job).run(task, PROFILES[:2])
+    assert sorted(jobs) == ['Default', 'Profile 1']
+
+
+def test_profiles_of_one_user_data_dir_run_one_after_another():
+    profiles = [('Default', '/edge/Default'), ('Profile 1', '/edge/Profile 1'), ('Profile 2', '/edge/Profile 2')]
+    assert peak_concurrency(profiles) == 1
+
+
+def test_profiles_of_separate_user_data_dirs_overlap():
+    profiles = [('a', '/a/Default'), ('b', '/b/Default'), ('c', '/c/Default')]
+    assert peak_concurrency(profiles) == 3
+
+
+def test_user_data_lock_is_shared_per_directory():
+    assert user_data_lock(None) is None
+    assert user_data_lock('/edge/Default') is user_data_lock('/edge/Profile 1')
+    assert user_data_lock('/edge/Default') is not user_data_lock('/other/Default')
+
+
+def test_on_start_runs_once_the_user_data_dir_is_free():
+    order = []
+
+    def task(progress_callback, stop_event, profile_path):
+        order.append(('task', profile_path))
+        time.sleep(0.02)
+
+    run = ProfileExecutor(max_workers=2, pacer=Pacer('test'),
+                          on_start=lambda name: order.append(('start', name)))
+    run.run(task, [('Default', '/edge/Default'), ('Profile 1', '/edge/Profile 1')])
+    # The second profile only counts as started after the first one finished
+    assert [entry[0] for entry in order] == ['start', 'task', 'start', 'task']
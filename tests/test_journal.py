@@ -0,0 +1,35 @@
+"""The per-profile, per-day journal that lets an interrupted run resume"""
+from datetime import date
+
+import journal
+from journal import Journal
+
+DESKTOP = journal.search_task('desktop')
+PHONE = journal.search_task('phone')
+
+
+def test_task_and_profile_names():
+    assert DESKTOP == 'search:desktop'
+    assert journal.profile_key(None) == 'default'
+    assert journal.profile_key('Profile 1') == 'Profile 1'
+
+
+def test_resumes_across_instances(tmp_path):
+    path = str(tmp_path / 'journal.sqlite3')
+    first = Journal(path)
+    first.record('Profile 1', DESKTOP, 'weather')
+    first.record('Profile 1', DESKTOP, 'news')
+    first.record('Profile 2', DESKTOP, 'sports')
+
+    reopened = Journal(path)
+    assert reopened.count('Profile 1', DESKTOP) == 2
+    assert reopened.units('Profile 1', DESKTOP) == ['weather', 'news']
+    assert reopened.units('Profile 2', DESKTOP) == ['sports']
+
+
+def test_devices_and_days_count_separately(tmp_path):
+    log = Journal(str(tmp_path / 'journal.sqlite3'))
+    log.record('Profile 1', DESKTOP, 'weather')
+    assert log.count('Profile 1', PHONE) == 0
+    assert log.count('Profile 1', journal.QUEST) == 0
+    assert log.count('Profile 1', DESKTOP, day=date(2000, 1, 1)) == 0
@@ -0,0 +1,74 @@
+"""Pacer on a virtual clock: paced code runs instantly and its time can be checked"""
+import pytest
+
+import pacing
+
+
+def fixed_pacer(profile='normal'):
+    """A Pacer on a virtual clock whose delays are all the middle of the profile's ranges"""
+    delays = {name: ((low + high) / 2,) * 2 for name, (low, high) in pacing.PROFILES[profile].items()}
+    return pacing.Pacer(profile, clock=pacing.VirtualClock(), overrides=delays)
+
+
+def run_plan(pacer, plan):
+    for name, count in plan.items():
+        for _ in range(count):
+            pacer.pause(name)
+
+
+@pytest.mark.parametrize('profile', sorted(pacing.PROFILES))
+@pytest.mark.parametrize('navigation', ['home', 'direct'])
+def test_expected_duration_matches_paced_search(profile, navigation):
+    pacer = fixed_pacer(profile)
+    plan = pacing.search_plan(['weather', 'news today'], navigation)
+    run_plan(pacer, plan)
+    assert pacer.clock.now() == pytest.approx(pacer.expected_duration(plan))
+
+
+def test_search_plan_types_only_from_the_home_page():
+    assert pacing.search_plan(['abc', 'de'], 'home')['keystroke'] == 5
+    assert 'keystroke' not in pacing.search_plan(['abc', 'de'], 'direct')
+
+
+
+def test_search_plan_dwells_on_the_home_page_and_the_results():
+    assert pacing.search_plan(['abc', 'de'], 'home')['page_dwell'] == 4
+    assert pacing.search_plan(['abc', 'de'], 'direct')['page_dwell'] == 2
+    pacer = pacing.Pacer('test', clock=pacing.VirtualClock(), overrides={'page_dwell': (1.5, 1.5)})
+    assert pacer.expected_duration(pacing.search_plan(['abc', 'de'], 'home')) == pytest.approx(6.0)
+
+def test_expected_duration_of_quest():
+    pacer = pacing.Pacer('normal', clock=pacing.VirtualClock())
+    assert pacer.expected_duration(pacing.quest_plan(4)) == pytest.approx(4 * (3.0 + 4.0 + 2.5))
+
+
+def test_parallel_quest_dwells_once_per_batch():
+    assert pacing.quest_plan(5, parallel_tabs=2) == {'tab_open': 5, 'activity_dwell': 3, 'after_card': 3}
+
+def test_virtual_clock_only_moves_when_slept_on():
+    clock = pacing.VirtualClock(start=10.0)
+    clock.sleep(2.5)
+    clock.sleep(-1)
+    assert clock.now() == 12.5
+
+
+def test_pause_stays_within_range_and_advances_the_clock():
+    pacer = pacing.Pacer('fast', clock=pacing.VirtualClock())
+    seconds = pacer.pause('scroll')
+    assert 0.5 <= seconds <= 1.0
+    assert pacer.clock.now() == seconds
+
+
+def test_virtual_clock_absorbs_in_page_delays():
+    pacer = fixed_pacer()
+    assert pacer.in_page_samples('scroll', 3) == [0.0, 0.0, 0.0]
+    assert pacer.clock.now() == pytest.approx(3 * 2.0)
+
+
+def test_get_pacer():
+    pacer = pacing.Pacer('fast')
+    assert pacing.get_pacer(pacer) is pacer
+    assert pacing.get_pacer('test').profile == 'test'
+    assert pacing.get_pacer().profile == pacing.DEFAULT_PROFILE
+    with pytest.raises(ValueError):
+        pacing.Pacer('unknown')
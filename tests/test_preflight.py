@@ -0,0 +1,41 @@
+"""Reading the remaining searches from the dashboard's counters"""
+import pytest
+
+import preflight
+
+
+def test_parse_counters():
+    data = {'dashboard': {'userStatus': {'counters': {
+        'pcSearch': [{'pointProgress': 30, 'pointProgressMax': 90}],
+        'mobileSearch': [],
+    }}}}
+    progress = preflight.parse_counters(data)
+    assert list(progress) == ['desktop']
+    assert progress['desktop'].remaining_points == 60
+    assert progress['desktop'].remaining_searches == 20
+
+
+def test_parse_counters_sums_entries_and_rounds_up():
+    data = {'userStatus': {'counters': {
+        'pcSearch': [{'pointProgress': 85, 'pointProgressMax': 90}],
+        'mobileSearch': [{'pointProgress': 10, 'pointProgressMax': 30},
+                         {'pointProgress': 0, 'pointProgressMax': 30}],
+    }}}
+    progress = preflight.parse_counters(data)
+    assert progress['desktop'].remaining_searches == 2
+    assert progress['phone'].remaining_points == 50
+    assert progress['phone'].remaining_searches == 17
+
+
+def test_nothing_left_once_the_maximum_is_reached():
+    progress = preflight.SearchProgress('desktop', 95, 90)
+    assert progress.remaining_points == 0
+    assert progress.remaining_searches == 0
+
+
+def test_fetched_data():
+    assert preflight.fetched_data({'data': {'userStatus': {}}}) == {'userStatus': {}}
+    with pytest.raises(ValueError, match="HTTP 401"):
+        preflight.fetched_data({'error': "Error: HTTP 401"})
+    with pytest.raises(ValueError):
+        preflight.fetched_data(None)
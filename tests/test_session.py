@@ -0,0 +1,138 @@
+"""SessionPool with stand-in drivers, so no browser is launched"""
+from session import SessionPool
+
+
+class StubDriver:
+    """Records what the pool does to it. Tabs are plain handles, the first one is 'main'."""
+    def __init__(self):
+        self.window_handles = ['main']
+        self.current = 'main'
+        self.url = None
+        self.alive = True
+        self.quits = 0
+        self.cdp = []  # DevTools commands sent, e.g. to reset device emulation
+        self.switch_to = self  # driver.switch_to.window(handle)
+
+    @property
+    def current_window_handle(self):
+        if not self.alive:
+            raise RuntimeError("invalid session id")
+        return self.current
+
+    def window(self, handle):
+        self.current = handle
+
+    def close(self):
+        self.window_handles.remove(self.current)
+
+    def get(self, url):
+        self.url = url
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.cdp.append(cmd)
+        return {}
+
+    def quit(self):
+        self.quits += 1
+        self.alive = False
+
+
+class StubConfig:
+    """Stands in for BrowserConfig. Every driver it creates is recorded in launched."""
+    def __init__(self, launched, *arguments, user_data_dir=None):
+        self.launched = launched
+        self.arguments = arguments
+        self.user_data_dir = user_data_dir
+
+    def key(self):
+        return self.arguments + (self.user_data_dir,)
+
+    def create_driver(self):
+        driver = StubDriver()
+        self.launched.append(driver)
+        return driver
+
+
+def test_reuses_idle_driver_launched_the_same_way():
+    pool, launched = SessionPool(), []
+    driver = pool.acquire(StubConfig(launched, '--headless'))
+    pool.release(driver)
+    assert pool.acquire(StubConfig(launched, '--headless')) is driver
+    assert len(launched) == 1
+
+
+def test_launches_another_driver_for_other_options():
+    pool, launched = SessionPool(), []
+    driver = pool.acquire(StubConfig(launched, '--headless'))
+    pool.release(driver)
+    assert pool.acquire(StubConfig(launched)) is not driver
+    assert len(launched) == 2
+
+
+def test_release_closes_extra_tabs_and_blanks_the_page():
+    pool, launched = SessionPool(), []
+    driver = pool.acquire(StubConfig(launched))
+    driver.window_handles.append('activity')
+    pool.release(driver)
+    assert driver.window_handles == ['main']
+    assert driver.current == 'main'
+    assert driver.url == 'about:blank'
+    assert driver.cdp  # back to the launch device
+    assert driver.quits == 0
+
+
+def test_recycles_driver_after_max_jobs():
+    pool, launched = SessionPool(max_jobs=2), []
+    driver = pool.acquire(StubConfig(launched))
+    pool.release(driver)
+    pool.release(pool.acquire(StubConfig(launched)))
+    assert driver.quits == 1
+    assert pool.acquire(StubConfig(launched)) is not driver
+
+
+def test_replaces_idle_driver_that_stopped_responding():
+    pool, launched = SessionPool(), []
+    driver = pool.acquire(StubConfig(launched))
+    pool.release(driver)
+    driver.alive = False
+    assert pool.acquire(StubConfig(launched)) is not driver
+    assert driver.quits == 1
+
+
+def test_keeps_one_idle_driver_per_key():
+    pool, launched = SessionPool(), []
+    first = pool.acquire(StubConfig(launched))
+    second = pool.acquire(StubConfig(launched))
+    pool.release(first)
+    pool.release(second)
+    assert first.quits == 0
+    assert second.quits == 1
+
+
+def test_quits_drivers_it_did_not_hand_out():
+    pool = SessionPool()
+    stranger = StubDriver()
+    pool.release(stranger)
+    assert stranger.quits == 1
+
+
+def test_close_all_quits_idle_and_checked_out_drivers():
+    pool, launched = SessionPool(), []
+    idle = pool.acquire(StubConfig(launched))
+    busy = pool.acquire(StubConfig(launched, '--headless'))
+    pool.release(idle)
+    pool.close_all()
+    assert idle.quits == 1
+    assert busy.quits == 1
+
+
+def test_launch_closes_idle_drivers_of_the_same_user_data_dir():
+    pool, launched = SessionPool(), []
+    same = pool.acquire(StubConfig(launched, 'Default', user_data_dir='/edge'))
+    other = pool.acquire(StubConfig(launched, 'Default', user_data_dir='/other'))
+    pool.release(same)
+    pool.release(other)
+    pool.acquire(StubConfig(launched, 'Profile 1', user_data_dir='/edge'))
+    assert same.quits == 1
+    assert other.quits == 0
+    assert pool.acquire(StubConfig(launched, 'Default', user_data_dir='/other')) is other
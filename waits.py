@@ -0,0 +1,112 @@
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+import random
+import uuid
+
+import pacing
+
+# Elements that tell us a Bing page is ready to be used
+SEARCH_BOX = (By.ID, "sb_form_q")
+RESULTS_CONTAINER = (By.ID, "b_results")
+
+# How often conditions are re-checked while waiting
+POLL_INTERVAL = 0.1
+
+MARK_DOCUMENT_SCRIPT = "window.__edgeAutomatorNav = arguments[0];"
+NEW_DOCUMENT_SCRIPT = "return window.__edgeAutomatorNav !== arguments[0] && document.readyState !== 'loading';"
+
+
+def dwell(since, min_dwell, clock=None):
+    """
+    Pacing layer: sleeps for whatever is left of the minimum dwell time.
+    The time already spent waiting for the page counts towards the dwell.
+
+    Args:
+        since (float): clock.now() value the dwell is measured from.
+        min_dwell (float or tuple, optional): Minimum seconds to stay on the page, or a
+            (min, max) range to pick a random value from. None or 0 disables the dwell.
+        clock (RealClock or VirtualClock, optional): Clock to measure and sleep on. Defaults to real time.
+    """
+    if not min_dwell:
+        return
+    if isinstance(min_dwell, (tuple, list)):
+        target = random.uniform(*min_dwell)
+    else:
+        target = min_dwell
+    clock = clock or pacing.RealClock()
+    clock.sleep(target - (clock.now() - since))
+
+
+def wait_until(driver, condition, timeout=10, min_dwell=None, since=None, clock=None):
+    """
+    Returns as soon as condition holds instead of sleeping for a fixed time.
+    Raises TimeoutException if it does not hold within timeout seconds.
+
+    Args:
+        driver (WebDriver): Driver to poll.
+        condition (callable): Expected condition, as used with WebDriverWait.
+        timeout (float): Maximum seconds to wait for the condition.
+        min_dwell (float or tuple, optional): See dwell().
+        since (float, optional): clock.now() value the dwell is measured from.
+            Defaults to when this call started.
+        clock (RealClock or VirtualClock, optional): Clock the dwell uses. Defaults to real time.
+    """
+    clock = clock or pacing.RealClock()
+    if since is None:
+        since = clock.now()
+    result = WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(condition)
+    dwell(since, min_dwell, clock)
+    return result
+
+
+def mark_document(driver):
+    """
+    Tags the current document before a navigation, so new_document() can tell when it
+    has been replaced. Returns the tag.
+    """
+    token = uuid.uuid4().hex
+    try:
+        driver.execute_script(MARK_DOCUMENT_SCRIPT, token)
+    except Exception:
+        pass  # e.g. no document yet, anything that loads next is new
+    return token
+
+
+def new_document(token):
+    """Condition: the document tagged with token has been replaced and the new one is parsed"""
+    return lambda driver: driver.execute_script(NEW_DOCUMENT_SCRIPT, token)
+
+
+def load(driver, url, timeout=30, track=False):
+    """
+    Navigates to url.
+
+    With the 'none' page load strategy driver.get() returns before the old document is gone,
+    so any element wait could match the previous page. track=True tags the old document first
+    and waits until it has been replaced.
+    """
+    token = mark_document(driver) if track else None
+    driver.get(url)
+    if track:
+        WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(new_document(token))
+
+
+def wait_for_search_box(driver, timeout=10, min_dwell=None, since=None, clock=None):
+    """Waits for the Bing search box to be clickable and returns it"""
+    return wait_until(driver, EC.element_to_be_clickable(SEARCH_BOX), timeout, min_dwell, since, clock)
+
+
+def wait_for_results(driver, timeout=10, min_dwell=None, since=None, clock=None, after=None):
+    """
+    Waits for the Bing results container to be present and returns it.
+    If after is a mark_document() tag, the container must be on a newer document.
+    """
+    results_present = EC.presence_of_element_located(RESULTS_CONTAINER)
+    if after is None:
+        condition = results_present
+    else:
+        replaced = new_document(after)
+        condition = lambda driver: replaced(driver) and results_present(driver)
+    return wait_until(driver, condition, timeout, min_dwell, since, clock)